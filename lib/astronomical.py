@@ -18,6 +18,7 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 # Import required library modules
 from lib.system  import system
 from lib         import properties
+from lib         import solar
 
 # Import required Kivy modules
 from kivy.logger import Logger
@@ -85,46 +86,22 @@ class astro():
         # Get station timezone
         Tz = pytz.timezone(self.app.config['Station']['Timezone'])
 
-        # Set pressure to 0 to match the United States Naval Observatory Astronomical
-        # Almanac
-        self.observer.pressure = 0
-
-        # The code is initialising. Calculate sunset/sunrise times for current day
-        # starting at midnight today in UTC
+        # The code is initialising. Use sunset/sunrise times for current day
         if self.astro_data['Sunset'][0] == '-':
+            date = datetime.now(pytz.utc).astimezone(Tz).date()
 
-            # Set Observer time to midnight today in UTC
-            UTC = datetime.now(pytz.utc)
-            Midnight = datetime(UTC.year, UTC.month, UTC.day, 0, 0, 0)
-            self.observer.date = Midnight.strftime('%Y/%m/%d %H:%M:%S')
-
-        # Dusk has passed. Calculate sunset/sunrise times for tomorrow starting at
-        # time of last Dusk in UTC
+        # Dusk has passed. Use sunset/sunrise times for the day after the last
+        # sunrise
         else:
-
-            # Set Observer time to last Sunset time in UTC
-            Dusk = self.astro_data['Dusk'][0].astimezone(pytz.utc) + timedelta(minutes=1)
-            self.observer.date = Dusk.strftime('%Y/%m/%d %H:%M:%S')
-
-        # Calculate Dawn time in UTC
-        self.observer.horizon = '-6'
-        Dawn = self.observer.next_rising(self.sun, use_center=True)
-        Dawn = pytz.utc.localize(Dawn.datetime().replace(second=0, microsecond=0))
-
-        # Calculate Sunrise time in UTC
-        self.observer.horizon = '-0:34'
-        Sunrise = self.observer.next_rising(self.sun)
-        Sunrise = pytz.utc.localize(Sunrise.datetime().replace(second=0, microsecond=0))
-
-        # Calculate Sunset time in UTC
-        self.observer.horizon = '-0:34'
-        Sunset = self.observer.next_setting(self.sun)
-        Sunset = pytz.utc.localize(Sunset.datetime().replace(second=0, microsecond=0))
-
-        # Calculate Dusk time in UTC
-        self.observer.horizon = '-6'
-        Dusk = self.observer.next_setting(self.sun, use_center=True)
-        Dusk = pytz.utc.localize(Dusk.datetime().replace(second=0, microsecond=0))
+            date = self.astro_data['Sunrise'][0].date() + timedelta(days=1)
+
+        # Extract Dawn/Dusk and Sunrise/Sunset times in UTC from the shared
+        # solar event cache
+        events  = solar.events(self.app.config, date)
+        Dawn    = events.dawn.replace(second=0, microsecond=0)
+        Sunrise = events.sunrise.replace(second=0, microsecond=0)
+        Sunset  = events.sunset.replace(second=0, microsecond=0)
+        Dusk    = events.dusk.replace(second=0, microsecond=0)
 
         # Define Dawn/Dusk and Sunrise/Sunset times in Station timezone
         self.astro_data['Dawn'][0]    = Dawn.astimezone(Tz)
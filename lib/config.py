@@ -265,6 +265,13 @@ def update():
                 print('  No changes required')
             print('')
 
+        # Copy secondary station sections from current configuration file
+        for section in current_config.sections():
+            if section.startswith('Station:'):
+                new_config.add_section(section)
+                for key in current_config[section]:
+                    new_config.set(section, key, current_config[section][key])
+
         # Verify station details for updated configuration
         new_config = verify_station(new_config)
 
@@ -919,6 +926,23 @@ def default_config_file():
                                                          ('rest_api',              {'Type': 'dependent',                              'Desc': 'REST API services'}),
                                                          ('SagerInterval',         {'Type': 'default',   'Value': '6',                'Desc': 'Interval in hours between Sager Forecasts'}),
                                                          ('Timeout',               {'Type': 'default',   'Value': '20',               'Desc': 'Timeout in seconds for API requests'}),
+                                                         ('ForecastInterval',      {'Type': 'default',   'Value': '3',                'Desc': 'Interval in hours between forecast downloads'}),
+                                                         ('ForecastFile',          {'Type': 'default',   'Value': 'forecast.json',    'Desc': 'Stored forecast file (blank to disable)'}),
+                                                         ('Multiprocess',          {'Type': 'default',   'Value': '0',                'Desc': 'Run observation pipeline in separate process'}),
+                                                         ('StateFile',             {'Type': 'default',   'Value': 'wfpiconsole.state', 'Desc': 'Derived state checkpoint file (blank to disable)'}),
+                                                         ('CaptureFile',           {'Type': 'default',   'Value': '',                 'Desc': 'Observation capture file (blank to disable)'}),
+                                                         ('HealthFile',            {'Type': 'default',   'Value': '',                 'Desc': 'Hub and device status file (blank to disable)'}),
+                                                         ('Tracing',               {'Type': 'default',   'Value': '0',                'Desc': 'Message latency tracing toggle'}),
+                                                         ('Profiling',             {'Type': 'default',   'Value': '0',                'Desc': 'Profiler mode (0, sample or cprofile)'}),
+                                                         ('ProfileDir',            {'Type': 'default',   'Value': 'profiles',         'Desc': 'Profile output directory'}),
+                                                         ('MetricsPort',           {'Type': 'default',   'Value': '',                 'Desc': 'Prometheus metrics port (blank to disable)'}),
+                                                         ('MetricsHost',           {'Type': 'default',   'Value': '127.0.0.1',        'Desc': 'Prometheus metrics bind address'}),
+                                                         ('UDPBufferSize',         {'Type': 'default',   'Value': '262144',           'Desc': 'UDP socket receive buffer size in bytes (blank for system default)'}),
+                                                         ('RelayPort',             {'Type': 'default',   'Value': '',                 'Desc': 'Display relay server port (blank to disable)'}),
+                                                         ('RelayHost',             {'Type': 'default',   'Value': '127.0.0.1',        'Desc': 'Display relay server bind address or address to subscribe to'}),
+                                                         ('RelayKey',              {'Type': 'default',   'Value': '',                 'Desc': 'Display relay authentication key (required unless RelayHost is 127.0.0.1)'}),
+                                                         ('RestURL',               {'Type': 'default',   'Value': 'https://swd.weatherflow.com/swd/rest', 'Desc': 'WeatherFlow REST API base URL'}),
+                                                         ('WebsocketURL',          {'Type': 'default',   'Value': 'wss://swd.weatherflow.com/swd/data',   'Desc': 'WeatherFlow Websocket base URL'}),
                                                          ('Hardware',              {'Type': 'default',   'Value': hardware,           'Desc': 'Hardware type'}),
                                                          ('Version',               {'Type': 'default',   'Value': ver,                'Desc': 'Version number'})])
 
@@ -0,0 +1,306 @@
+""" Runs the observation pipeline of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations in a separate data process
+and applies the display snapshots it returns, or the display snapshots served
+by the relay server of another console, to the user interface.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib.observation_parser import set_display
+from lib.system             import system
+from lib                    import device_status
+from lib                    import relay
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+from kivy.clock             import Clock
+from kivy.app               import App
+
+# Import required system modules
+from multiprocessing.connection import Listener
+import subprocess
+import threading
+import socket
+import queue
+import json
+import sys
+import os
+
+
+def apply_display(app, category, values, ob_type):
+
+    """ Apply display values received from the data process to the user
+    interface
+
+    INPUTS:
+        app                 Running wfpiconsole app
+        category            Display category (Obs, Met, Sager or Status)
+        values              Dictionary of changed display values
+        ob_type             Latest observation message type
+    """
+
+    if category == 'Obs':
+        set_display(app, values, ob_type)
+    elif category == 'Met':
+        for key, value in values.items():
+            app.CurrentConditions.Met[key] = value
+        if hasattr(app, 'ForecastPanel'):
+            for panel in getattr(app, 'ForecastPanel'):
+                panel.setForecastIcon()
+    elif category == 'Sager':
+        for key, value in values.items():
+            app.CurrentConditions.Sager[key] = value
+    elif category == 'Status':
+        for state in values.values():
+            device_status.store(device_status.restore(state))
+
+
+# Define methods called by the user interface on each object owned by the data
+# process, methods answered from the state sent by the data process, and the
+# attributes included in that state
+REMOTE_METHODS    = {'obsParser':         ['resetDisplay', 'reformat_display', 'save_derived_state'],
+                     'forecast':          ['parse_forecast', 'reset_forecast', 'fetch_forecast', 'schedule_forecast'],
+                     'sager':             ['get_forecast_text', 'reset_forecast', 'fetch_forecast', 'schedule_forecast']}
+REMOTE_QUERIES    = {'connection_client': ['activeThreads']}
+REMOTE_ATTRIBUTES = {'connection_client': ['connected', '_keep_running', '_switch_device']}
+
+
+# ==============================================================================
+# DEFINE 'remote_object' CLASS
+# ==============================================================================
+class remote_object():
+
+    """ Forwards method calls and attribute changes made on the user interface
+    side to the named object owned by the data process. Queries are answered
+    from the latest state of the object sent by the data process
+
+    INPUTS:
+        client              data_client object
+        name                Name of object owned by the data process
+    """
+
+    def __init__(self, client, name):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attribute):
+        state = self._client.state.get(self._name, {})
+        if attribute in REMOTE_QUERIES.get(self._name, []):
+            return lambda: state.get(attribute)
+        if attribute in REMOTE_ATTRIBUTES.get(self._name, []):
+            return state.get(attribute)
+        if attribute in REMOTE_METHODS.get(self._name, []):
+            def remote_call(*args):
+                self._client.send(('call', self._name, attribute, args))
+            return remote_call
+        raise AttributeError(f'{self._name} has no remote attribute {attribute}')
+
+    def __setattr__(self, attribute, value):
+        self._client.state.setdefault(self._name, {})[attribute] = value
+        self._client.send(('set', self._name, attribute, value))
+
+
+# ==============================================================================
+# DEFINE 'data_client' CLASS
+# ==============================================================================
+class data_client():
+
+    def __init__(self):
+        self.app        = App.get_running_app()
+        self.system     = system()
+        self.listener   = None
+        self.connection = None
+        self.process    = None
+        self.state      = {}
+        self.send_lock  = threading.Lock()
+
+    def start(self):
+
+        """ Start the data process and replace the observation pipeline objects
+        with proxies that forward to the data process
+        """
+
+        # Open listener for data process connection
+        authkey = os.urandom(16)
+        self.listener = Listener(authkey=authkey)
+        environment = dict(os.environ,
+                           WFPICONSOLE_DATA_ADDRESS=self.listener.address,
+                           WFPICONSOLE_DATA_KEY=authkey.hex())
+
+        # Start data process and wait for connection in background
+        Logger.info(f'DataClient: {self.system.log_time()} - Starting data process')
+        self.process = subprocess.Popen([sys.executable, '-m', 'service.data_process'], env=environment)
+        threading.Thread(target=self.accept, daemon=True).start()
+
+        # Replace observation pipeline objects with proxies
+        self.app.obsParser         = remote_object(self, 'obsParser')
+        self.app.connection_client = remote_object(self, 'connection_client')
+        self.app.forecast          = remote_object(self, 'forecast')
+        self.app.sager             = remote_object(self, 'sager')
+
+        # Schedule display snapshots to be applied each frame
+        self.app.Sched.dataClient = Clock.schedule_interval(self.receive, 0)
+
+    def accept(self):
+
+        """ Accept connection from the data process
+        """
+
+        try:
+            self.connection = self.listener.accept()
+            Logger.info(f'DataClient: {self.system.log_time()} - Data process connected')
+            self.send_config()
+        except OSError as error:
+            Logger.error(f'DataClient: {self.system.log_time()} - Data process connection failed: {error}')
+
+    def send(self, command):
+
+        """ Send command to the data process
+
+        INPUTS:
+            command             Command tuple
+        """
+
+        if self.connection is None:
+            return
+        with self.send_lock:
+            try:
+                self.connection.send(command)
+            except (OSError, EOFError):
+                Logger.warning(f'DataClient: {self.system.log_time()} - Unable to send command to data process')
+
+    def send_config(self):
+
+        """ Send the current configuration to the data process, so that the data
+        process reflects changes made on the settings screen
+        """
+
+        config = {section: dict(self.app.config[section]) for section in self.app.config.sections()}
+        self.send(('config', config))
+
+    def receive(self, dt):
+
+        """ Apply all display snapshots waiting in the data process connection
+        """
+
+        if self.connection is None:
+            return
+        try:
+            while self.connection.poll():
+                message = self.connection.recv()
+                if message[0] == 'display':
+                    apply_display(self.app, *message[1:])
+                elif message[0] == 'state':
+                    self.state.update(message[1])
+        except (OSError, EOFError):
+            Logger.error(f'DataClient: {self.system.log_time()} - Data process connection lost')
+            self.connection = None
+
+    def stop(self):
+
+        """ Stop the data process
+        """
+
+        self.app.Sched.dataClient.cancel()
+        self.send(('stop',))
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.terminate()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.listener.close()
+
+
+# ==============================================================================
+# DEFINE 'relay_client' CLASS
+# ==============================================================================
+class relay_client():
+
+    """ Subscribes to the display values served by the relay server of another
+    console, in place of running a connection service and observation parser
+    """
+
+    def __init__(self):
+        self.app        = App.get_running_app()
+        self.system     = system()
+        self.connection = None
+        self.messages   = queue.SimpleQueue()
+        self.stopped    = threading.Event()
+
+    def start(self):
+
+        """ Receive display messages from the relay server in background and
+        schedule display messages to be applied each frame
+        """
+
+        Logger.info(f'RelayClient: {self.system.log_time()} - Starting relay connection')
+        threading.Thread(target=self.listen, name='RelayClient', daemon=True).start()
+        self.app.Sched.relayClient = Clock.schedule_interval(self.receive, 0)
+
+    def listen(self):
+
+        """ Connect to the relay server and queue the display messages it
+        sends, reconnecting until stopped
+        """
+
+        address = (self.app.config['System'].get('RelayHost', '127.0.0.1'),
+                   int(self.app.config['System'].get('RelayPort', '') or 0))
+        key = self.app.config['System'].get('RelayKey', '')
+        while not self.stopped.is_set():
+            try:
+                self.connection = socket.create_connection(address, timeout=relay.TIMEOUT)
+                stream = self.connection.makefile('rb')
+                challenge = json.loads(stream.readline(relay.LINE_LENGTH))['challenge']
+                if challenge is not None:
+                    self.connection.sendall(relay.encode({'digest': relay.digest(key, challenge)}))
+                self.connection.settimeout(None)
+                Logger.info(f'RelayClient: {self.system.log_time()} - Connected to {address[0]}:{address[1]}')
+                for line in stream:
+                    self.messages.put(json.loads(line))
+                Logger.error(f'RelayClient: {self.system.log_time()} - Relay server connection lost')
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                if not self.stopped.is_set():
+                    Logger.warning(f'RelayClient: {self.system.log_time()} - Relay server connection failed: {error}')
+            if self.connection is not None:
+                self.connection.close()
+            self.stopped.wait(10)
+
+    def receive(self, dt):
+
+        """ Apply all display messages received from the relay server
+        """
+
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            apply_display(self.app, message['category'], message['values'], message['ob_type'])
+
+    def stop(self):
+
+        """ Disconnect from the relay server
+        """
+
+        self.stopped.set()
+        self.app.Sched.relayClient.cancel()
+        if self.connection is not None:
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
@@ -0,0 +1,328 @@
+""" Calculates and formats the derived variables displayed on the Raspberry Pi
+Python console for WeatherFlow Tempest and Smart Home Weather stations,
+recomputing only the variables whose inputs have changed.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Each derived variable is declared as a node naming the device observations
+and upstream derived variables it is calculated from, and the message types
+that update it. Nodes are evaluated in dependency order. Stateless nodes are
+only recalculated when the version of one of their inputs has changed, while
+stateful nodes (daily extremes, accumulations and trends that depend on the
+time of the observation) are recalculated on every message of their types.
+
+Each display variable is declared with the observation or derived variable it
+is formatted from, and is only reformatted when that variable has changed.
+
+Custom panels can add derived and display variables with register_node() and
+register_display() without changes to the observation parser.
+"""
+
+# Import required library modules
+from lib import derived_variables  as derive
+from lib import observation_format as observation
+
+# Define message types that update each group of variables
+OUT_AIR = ('obs_out_air', 'obs_st')
+SKY     = ('obs_sky', 'obs_st')
+IN_AIR  = ('obs_in_air',)
+RAPID   = ('rapid_wind',)
+STRIKE  = ('obs_out_air', 'obs_st', 'evt_strike')
+
+
+# ==============================================================================
+# DEFINE 'derived_node' CLASS
+# ==============================================================================
+class derived_node():
+
+    """ Derived variable declaration
+
+    INPUTS:
+        name                Derived variable name in derive_obs
+        device_inputs       Device observations the variable is derived from
+        derive_inputs       Derived variables the variable is derived from
+        function            Function returning the derived variable, called
+                            as function(device_obs, derive_obs, device,
+                            api_data, config)
+        ob_types            Message types that update the variable
+        stateful            Recalculate on every message of ob_types
+    """
+
+    __slots__ = ('name', 'device_inputs', 'derive_inputs', 'function', 'ob_types', 'stateful')
+
+    def __init__(self, name, device_inputs, derive_inputs, function, ob_types, stateful=False):
+        self.name          = name
+        self.device_inputs = tuple(device_inputs)
+        self.derive_inputs = tuple(derive_inputs)
+        self.function      = function
+        self.ob_types      = tuple(ob_types)
+        self.stateful      = stateful
+
+
+# ==============================================================================
+# DEFINE 'display_node' CLASS
+# ==============================================================================
+class display_node():
+
+    """ Display variable declaration
+
+    INPUTS:
+        name                Display variable name in display_obs
+        source              'device' or 'derive'
+        key                 Observation or derived variable name, or a
+                            (name, period) tuple for accumulations
+        units               [Units] configuration key, or a fixed unit when
+                            no such key exists
+        format_type         observation.format() type(s)
+        ob_types            Message types that update the variable
+    """
+
+    __slots__ = ('name', 'source', 'key', 'units', 'format_type', 'ob_types')
+
+    def __init__(self, name, source, key, units, format_type, ob_types):
+        self.name        = name
+        self.source      = source
+        self.key         = key
+        self.units       = units
+        self.format_type = format_type
+        self.ob_types    = tuple(ob_types)
+
+
+# Define derived variables
+derived_nodes = [
+    derived_node('feelsLike',    ['outTemp', 'humidity', 'windSpd'], [], lambda obs, drv, device, api, config: derive.feels_like(obs['outTemp'], obs['humidity'], obs['windSpd'], config),                    OUT_AIR),
+    derived_node('dewPoint',     ['outTemp', 'humidity'],            [], lambda obs, drv, device, api, config: derive.dew_point(obs['outTemp'], obs['humidity']),                                          OUT_AIR),
+    derived_node('outTempDiff',  ['outTemp', 'obTime'],              [], lambda obs, drv, device, api, config: derive.temp_diff(obs['outTemp'], obs['obTime'], device, api, config),                      OUT_AIR, stateful=True),
+    derived_node('outTempTrend', ['outTemp', 'obTime'],              [], lambda obs, drv, device, api, config: derive.temp_trend(obs['outTemp'], obs['obTime'], device, api, config),                     OUT_AIR, stateful=True),
+    derived_node('outTempMax',   ['outTemp', 'obTime'],              [], lambda obs, drv, device, api, config: derive.temp_max(obs['outTemp'], obs['obTime'], drv['outTempMax'], device, api, config),    OUT_AIR, stateful=True),
+    derived_node('outTempMin',   ['outTemp', 'obTime'],              [], lambda obs, drv, device, api, config: derive.temp_min(obs['outTemp'], obs['obTime'], drv['outTempMin'], device, api, config),    OUT_AIR, stateful=True),
+    derived_node('SLP',          ['pressure'],                       [], lambda obs, drv, device, api, config: derive.SLP(obs['pressure'], device, config),                                               OUT_AIR),
+    derived_node('SLPTrend',     ['pressure', 'obTime'],             [], lambda obs, drv, device, api, config: derive.SLP_trend(obs['pressure'], obs['obTime'], device, api, config),                     OUT_AIR, stateful=True),
+    derived_node('SLPMax',       ['pressure', 'obTime'],             [], lambda obs, drv, device, api, config: derive.SLP_max(obs['pressure'], obs['obTime'], drv['SLPMax'], device, api, config),        OUT_AIR, stateful=True),
+    derived_node('SLPMin',       ['pressure', 'obTime'],             [], lambda obs, drv, device, api, config: derive.SLP_min(obs['pressure'], obs['obTime'], drv['SLPMin'], device, api, config),        OUT_AIR, stateful=True),
+    derived_node('strikeCount',  ['strikeMinute'],                   [], lambda obs, drv, device, api, config: derive.strike_count(obs['strikeMinute'], drv['strikeCount'], device, api, config),         OUT_AIR, stateful=True),
+    derived_node('strikeFreq',   ['obTime'],                         [], lambda obs, drv, device, api, config: derive.strike_frequency(obs['obTime'], device, api, config),                              OUT_AIR, stateful=True),
+    derived_node('strikeDeltaT', ['strikeTime'],                     [], lambda obs, drv, device, api, config: derive.strike_delta_t(obs['strikeTime'], config),                                          STRIKE,  stateful=True),
+    derived_node('uvIndex',      ['uvIndex'],                        [], lambda obs, drv, device, api, config: derive.uv_index(obs['uvIndex']),                                                           SKY),
+    derived_node('peakSun',      ['radiation'],                      [], lambda obs, drv, device, api, config: derive.peak_sun_hours(obs['radiation'], drv['peakSun'], device, api, config),              SKY,     stateful=True),
+    derived_node('windSpd',      ['windSpd'],                        [], lambda obs, drv, device, api, config: derive.beaufort_scale(obs['windSpd']),                                                     SKY),
+    derived_node('windDir',      ['windDir', 'windSpd'],             [], lambda obs, drv, device, api, config: derive.cardinal_wind_dir(obs['windDir'], obs['windSpd']),                                  SKY),
+    derived_node('windAvg',      ['windSpd'],                        [], lambda obs, drv, device, api, config: derive.avg_wind_speed(obs['windSpd'], drv['windAvg'], device, api, config),                SKY,     stateful=True),
+    derived_node('gustMax',      ['windGust'],                       [], lambda obs, drv, device, api, config: derive.max_wind_gust(obs['windGust'], drv['gustMax'], device, api, config),                SKY,     stateful=True),
+    derived_node('rainRate',     ['minuteRain'],                     [], lambda obs, drv, device, api, config: derive.rain_rate(obs['minuteRain']),                                                       SKY),
+    derived_node('rainAccum',    ['minuteRain', 'dailyRain'],        [], lambda obs, drv, device, api, config: derive.rain_accumulation(obs['minuteRain'], obs['dailyRain'], drv['rainAccum'], device, api, config), SKY, stateful=True),
+    derived_node('inTempMax',    ['inTemp', 'obTime'],               [], lambda obs, drv, device, api, config: derive.temp_max(obs['inTemp'], obs['obTime'], drv['inTempMax'], device, api, config),      IN_AIR,  stateful=True),
+    derived_node('inTempMin',    ['inTemp', 'obTime'],               [], lambda obs, drv, device, api, config: derive.temp_min(obs['inTemp'], obs['obTime'], drv['inTempMin'], device, api, config),      IN_AIR,  stateful=True),
+    derived_node('rapidWindDir', ['rapidWindDir', 'rapidWindSpd'],   [], lambda obs, drv, device, api, config: derive.cardinal_wind_dir(obs['rapidWindDir'], obs['rapidWindSpd']),                        RAPID),
+]
+
+# Define display variables
+display_nodes = [
+    display_node('outTemp',       'device', 'outTemp',                  'Temp',      'Temp',                 OUT_AIR),
+    display_node('FeelsLike',     'derive', 'feelsLike',                'Temp',      'Temp',                 OUT_AIR),
+    display_node('DewPoint',      'derive', 'dewPoint',                 'Temp',      'Temp',                 OUT_AIR),
+    display_node('outTempDiff',   'derive', 'outTempDiff',              'Temp',      'Temp',                 OUT_AIR),
+    display_node('outTempTrend',  'derive', 'outTempTrend',             'Temp',      'Temp',                 OUT_AIR),
+    display_node('outTempMax',    'derive', 'outTempMax',               'Temp',      ['Temp', 'Time'],       OUT_AIR),
+    display_node('outTempMin',    'derive', 'outTempMin',               'Temp',      ['Temp', 'Time'],       OUT_AIR),
+    display_node('Humidity',      'device', 'humidity',                 'Other',     'Humidity',             OUT_AIR),
+    display_node('SLP',           'derive', 'SLP',                      'Pressure',  'Pressure',             OUT_AIR),
+    display_node('SLPTrend',      'derive', 'SLPTrend',                 'Pressure',  'Pressure',             OUT_AIR),
+    display_node('SLPMax',        'derive', 'SLPMax',                   'Pressure',  ['Pressure', 'Time'],   OUT_AIR),
+    display_node('SLPMin',        'derive', 'SLPMin',                   'Pressure',  ['Pressure', 'Time'],   OUT_AIR),
+    display_node('StrikeDist',    'device', 'strikeDist',               'Distance',  'StrikeDistance',       STRIKE),
+    display_node('StrikeDeltaT',  'derive', 'strikeDeltaT',             'Other',     'TimeDelta',            STRIKE),
+    display_node('StrikeFreq',    'derive', 'strikeFreq',               'Other',     'StrikeFrequency',      OUT_AIR),
+    display_node('Strikes3hr',    'device', 'strike3hr',                'Other',     'StrikeCount',          OUT_AIR),
+    display_node('StrikesToday',  'derive', ('strikeCount', 'today'),   'Other',     'StrikeCount',          OUT_AIR),
+    display_node('StrikesMonth',  'derive', ('strikeCount', 'month'),   'Other',     'StrikeCount',          OUT_AIR),
+    display_node('StrikesYear',   'derive', ('strikeCount', 'year'),    'Other',     'StrikeCount',          OUT_AIR),
+    display_node('Radiation',     'device', 'radiation',                'Other',     'Radiation',            SKY),
+    display_node('UVIndex',       'derive', 'uvIndex',                  'Other',     'UV',                   SKY),
+    display_node('peakSun',       'derive', 'peakSun',                  'Other',     'peakSun',              SKY),
+    display_node('RainRate',      'derive', 'rainRate',                 'Precip',    'Precip',               SKY),
+    display_node('TodayRain',     'derive', ('rainAccum', 'today'),     'Precip',    'Precip',               SKY),
+    display_node('YesterdayRain', 'derive', ('rainAccum', 'yesterday'), 'Precip',    'Precip',               SKY),
+    display_node('MonthRain',     'derive', ('rainAccum', 'month'),     'Precip',    'Precip',               SKY),
+    display_node('YearRain',      'derive', ('rainAccum', 'year'),      'Precip',    'Precip',               SKY),
+    display_node('WindSpd',       'derive', 'windSpd',                  'Wind',      'Wind',                 SKY),
+    display_node('WindGust',      'device', 'windGust',                 'Wind',      'Wind',                 SKY),
+    display_node('AvgWind',       'derive', 'windAvg',                  'Wind',      'Wind',                 SKY),
+    display_node('MaxGust',       'derive', 'gustMax',                  'Wind',      'Wind',                 SKY),
+    display_node('WindDir',       'derive', 'windDir',                  'Direction', 'Direction',            SKY),
+    display_node('inTemp',        'device', 'inTemp',                   'Temp',      'Temp',                 IN_AIR),
+    display_node('inTempMax',     'derive', 'inTempMax',                'Temp',      ['Temp', 'Time'],       IN_AIR),
+    display_node('inTempMin',     'derive', 'inTempMin',                'Temp',      ['Temp', 'Time'],       IN_AIR),
+    display_node('rapidSpd',      'device', 'rapidWindSpd',             'Wind',      'Wind',                 RAPID),
+    display_node('rapidDir',      'derive', 'rapidWindDir',             'degrees',   'Direction',            RAPID),
+]
+
+
+def register_node(node):
+
+    """ Register an additional derived variable
+
+    INPUTS:
+        node                derived_node object
+    """
+
+    derived_nodes.append(node)
+
+
+def register_display(node):
+
+    """ Register an additional display variable
+
+    INPUTS:
+        node                display_node object
+    """
+
+    display_nodes.append(node)
+
+
+def dependency_order(nodes):
+
+    """ Sort derived variables so that each variable follows the derived
+    variables it depends on, keeping declaration order where possible
+
+    INPUTS:
+        nodes               List of derived_node objects
+
+    OUTPUT:
+        ordered             List of derived_node objects in dependency order
+    """
+
+    names   = {node.name for node in nodes}
+    ordered = []
+    placed  = set()
+    pending = list(nodes)
+    while pending:
+        ready = [node for node in pending
+                 if all(name in placed or name not in names or name == node.name for name in node.derive_inputs)]
+        if not ready:
+            raise ValueError('Derived variable dependency cycle: ' + ', '.join(node.name for node in pending))
+        for node in ready:
+            ordered.append(node)
+            placed.add(node.name)
+        pending = [node for node in pending if node.name not in placed]
+    return ordered
+
+
+# ==============================================================================
+# DEFINE 'derived_engine' CLASS
+# ==============================================================================
+class derived_engine():
+
+    """ Evaluates the derived and display variables of an observation parser,
+    tracking a version number for each device observation and derived
+    variable so that unchanged variables are neither recalculated nor
+    reformatted
+    """
+
+    def __init__(self):
+        self.nodes     = []
+        self.displays  = []
+        self.versions  = {}
+        self.seen      = {}
+        self.computed  = {}
+        self.formatted = {}
+        self.build()
+
+    def build(self):
+
+        """ Order the registered derived variables and index the variables
+        updated by each message type
+        """
+
+        self.nodes    = dependency_order(derived_nodes)
+        self.displays = list(display_nodes)
+        self.by_type  = {}
+        self.display_by_type = {}
+        for node in self.nodes:
+            for ob_type in node.ob_types:
+                self.by_type.setdefault(ob_type, []).append(node)
+        for node in self.displays:
+            for ob_type in node.ob_types:
+                self.display_by_type.setdefault(ob_type, []).append(node)
+        self.display_by_type['obs_all'] = self.displays
+
+    def invalidate(self):
+
+        """ Force all derived variables to be recalculated and all display
+        variables to be reformatted, for example after a configuration change
+        """
+
+        self.computed  = {}
+        self.formatted = {}
+
+    def bump(self, source, key, value, previous):
+        if value != previous:
+            self.versions[(source, key)] = self.versions.get((source, key), 0) + 1
+
+    def derive(self, parser, device, config, ob_type):
+
+        """ Recalculate the derived variables updated by a message whose inputs
+        have changed
+
+        INPUTS:
+            parser              obs_parser object
+            device              Device ID
+            config              Console configuration object
+            ob_type             Latest message type
+        """
+
+        # Rebuild if custom derived or display variables have been registered
+        if len(self.nodes) != len(derived_nodes) or len(self.displays) != len(display_nodes):
+            self.build()
+
+        # Update device observation versions
+        for key, value in parser.device_obs.items():
+            if key not in self.seen or self.seen[key] != value:
+                self.versions[('device', key)] = self.versions.get(('device', key), 0) + 1
+                self.seen[key] = value
+
+        # Recalculate derived variables
+        for node in self.by_type.get(ob_type, []):
+            inputs = (device,
+                      tuple(self.versions.get(('device', key), 0) for key in node.device_inputs),
+                      tuple(self.versions.get(('derive', key), 0) for key in node.derive_inputs))
+            if not node.stateful and self.computed.get(node.name) == inputs:
+                continue
+            previous = parser.derive_obs.get(node.name)
+            value = node.function(parser.device_obs, parser.derive_obs, device, parser.api_data, config)
+            parser.derive_obs[node.name] = value
+            self.computed[node.name] = inputs
+            self.bump('derive', node.name, value, previous)
+
+    def format(self, parser, config, ob_type):
+
+        """ Reformat the display variables updated by a message whose source
+        variable has changed. 'obs_all' reformats every display variable
+
+        INPUTS:
+            parser              obs_parser object
+            config              Console configuration object
+            ob_type             Latest message type, or 'obs_all'
+        """
+
+        for node in self.display_by_type.get(ob_type, []):
+            name = node.key[0] if isinstance(node.key, tuple) else node.key
+            version = self.versions.get((node.source, name), 0)
+            if ob_type != 'obs_all' and self.formatted.get(node.name) == version:
+                continue
+            values = parser.device_obs if node.source == 'device' else parser.derive_obs
+            value  = values[node.key[0]][node.key[1]] if isinstance(node.key, tuple) else values[node.key]
+            units  = config['Units'].get(node.units, node.units)
+            parser.display_obs[node.name] = observation.format(observation.units(value, units), node.format_type, config)
+            self.formatted[node.name] = version
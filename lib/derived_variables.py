@@ -19,15 +19,19 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 from lib.request_api import weatherflow_api
 from lib.system      import system
 from lib             import derived_variables as derive
+from lib             import wall_clock
+from lib             import devices
+from lib             import solar
+from lib.records     import Ob, Extreme, Average, Gust, PeakSun, Trend, Reading, Labelled, FeelsLike
+from lib.records     import Frequency, RainRate, Direction, Beaufort, UVIndex, Accumulation
 
 # Import required Python modules
 from kivy.logger  import Logger
 from datetime     import datetime
 import bisect
-import ephem
+import numpy as np
 import math
 import pytz
-import time
 
 
 def dew_point(out_temp, humidity):
@@ -43,7 +47,7 @@ def dew_point(out_temp, humidity):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'c']
+    error_output = Ob(None, 'c')
     if out_temp[0] is None:
         Logger.warning(f'dewPoint: {system().log_time()} - out_temp is None')
         return error_output
@@ -62,7 +66,7 @@ def dew_point(out_temp, humidity):
         dew_point = None
 
     # Return Dew Point
-    return [dew_point, 'c']
+    return Ob(dew_point, 'c')
 
 
 def feels_like(out_temp, humidity, wind_spd, config):
@@ -81,7 +85,7 @@ def feels_like(out_temp, humidity, wind_spd, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'c', '-', '-']
+    error_output = FeelsLike(None, 'c')
     if out_temp[0] is None:
         Logger.warning(f'feelsLike: {system().log_time()} - out_temp is None')
         return error_output
@@ -138,7 +142,62 @@ def feels_like(out_temp, humidity, wind_spd, config):
         idx = bisect.bisect(cutoffs, feels_like[0])
 
     # Return 'Feels Like' temperature
-    return [feels_like[0], feels_like[1], description[idx], icon[idx]]
+    return FeelsLike(feels_like[0], feels_like[1], description[idx], icon[idx])
+
+
+# ==============================================================================
+# DEFINE 'pressure_reducer' CLASS
+# ==============================================================================
+class pressure_reducer():
+
+    """ Reduces station pressure to sea level pressure at a fixed elevation.
+    The elevation dependent constants are calculated once, and the reducer
+    accepts a single station pressure or a NumPy array of station pressures
+
+    INPUTS:
+        elevation           Elevation of pressure sensor above sea level    [m]
+    """
+
+    # Define required constants
+    P0      = 1013.25
+    Rd      = 287.05
+    gamma_s = 0.0065
+    g       = 9.80665
+    T0      = 288.15
+
+    def __init__(self, elevation):
+        self.elevation   = elevation
+        self.exponent    = (self.Rd * self.gamma_s) / self.g
+        self.inverse     = self.g / (self.Rd * self.gamma_s)
+        self.coefficient = self.P0**self.exponent * (self.gamma_s * elevation) / self.T0
+
+    def __call__(self, pressure):
+        return pressure * (1 + self.coefficient * pressure**-self.exponent)**self.inverse
+
+
+# Pressure reducers keyed by elevation
+reducers = {}
+
+
+def station_reducer(device, config):
+
+    """ Return the pressure reducer for the elevation of a device
+
+    INPUTS:
+        device              Device ID
+        config              Station configuration
+
+    OUTPUT:
+        reducer             pressure_reducer object, or None if the device or
+                            its elevation is unknown
+    """
+
+    descriptor = devices.lookup(device, config)
+    if descriptor is None or descriptor.elevation is None:
+        return None
+    if descriptor.elevation not in reducers:
+        reducers[descriptor.elevation] = pressure_reducer(descriptor.elevation)
+    return reducers[descriptor.elevation]
 
 
 def SLP(pressure, device, config):
@@ -155,32 +214,20 @@ def SLP(pressure, device, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mb', None]
+    error_output = Reading(None, 'mb')
     if pressure[0] is None:
         Logger.warning(f'SLP: {system().log_time()} - pressure is None')
         return error_output
 
-    # Extract required configuration variables
-    elevation = config['Station']['Elevation']
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        height = config['Station']['OutAirHeight']
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        height = config['Station']['TempestHeight']
-
-    # Define required constants
-    P0      = 1013.25
-    Rd      = 287.05
-    gamma_s = 0.0065
-    g       = 9.80665
-    T0      = 288.15
-    elevation = float(elevation) + float(height)
+    # Extract pressure reducer for device elevation
+    reducer = station_reducer(device, config)
+    if reducer is None:
+        Logger.warning(f'SLP: {system().log_time()} - unknown device {device}')
+        return error_output
 
     # Calculate and return sea level pressure
-    SLP = (pressure[0]
-           * (1 + ((P0 / pressure[0])**((Rd * gamma_s) / g))
-           * ((gamma_s * elevation) / T0))**(g / (Rd * gamma_s))
-           )
-    return [SLP, 'mb', SLP]
+    SLP = reducer(pressure[0])
+    return Reading(SLP, 'mb', SLP)
 
 
 def SLP_trend(pressure, ob_time, device, api_data, config):
@@ -200,7 +247,7 @@ def SLP_trend(pressure, ob_time, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mb/hr', '-', '-']
+    error_output = Trend(None, 'mb/hr')
     if pressure[0] is None:
         Logger.warning(f'SLP_trend: {system().log_time()} - pressure is None')
         return error_output
@@ -209,10 +256,11 @@ def SLP_trend(pressure, ob_time, device, api_data, config):
         return error_output
 
     # Define index of pressure in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 1
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 6
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'SLP_trend: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['pressure']
 
     # If REST API services are enabled, extract required observations from
     # WeatherFlow API data based on device type indicated in API call
@@ -283,7 +331,7 @@ def SLP_trend(pressure, ob_time, device, api_data, config):
         tendency = '-'
 
     # Return pressure trend
-    return [trend, 'mb/hr', trend_txt, tendency]
+    return Trend(trend, 'mb/hr', trend_txt, tendency)
 
 
 def SLP_max(pressure, ob_time, max_pres, device, api_data, config):
@@ -303,7 +351,7 @@ def SLP_max(pressure, ob_time, max_pres, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mb', '-', None, time.time()]
+    error_output = Extreme(None, 'mb', updated=wall_clock.time())
     if pressure[0] is None:
         Logger.warning(f'SLP_max: {system().log_time()} - pressure is None')
         return error_output
@@ -316,26 +364,30 @@ def SLP_max(pressure, ob_time, max_pres, device, api_data, config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of temperature in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 1
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 6
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'SLP_max: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['pressure']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate daily maximum
     # pressure
-    if int(config['System']['rest_api']) and max_pres[0] is None:
+    if int(config['System']['rest_api']) and max_pres.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             data_today = api_data[device]['today'].json()['obs']
             ob_time    = [item[0]                       for item in data_today if item[index_bucket_a] is not None]
-            pressure  = [[item[index_bucket_a], 'mb']  for item in data_today if item[index_bucket_a] is not None]
-            SLP       = [derive.SLP(P, device, config) for P    in pressure]
+            pressure   = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
+            reducer    = station_reducer(device, config)
             try:
-                max_pres   = [max(SLP)[0], 'mb', ob_time[SLP.index(max(SLP))], 's', max(SLP)[0], ob_time[SLP.index(max(SLP))]]
+                SLP        = reducer(np.asarray(pressure, dtype=float))
+                max_SLP    = float(np.nanmax(SLP))
+                max_time   = ob_time[int(np.nanargmax(SLP))]
+                max_pres   = Extreme(max_SLP, 'mb', max_time, 's', max_SLP, max_time)
             except Exception as error:
                 Logger.warning(f'SLP_max: {system().log_time()} - {error}')
                 max_pres = error_output
@@ -344,21 +396,21 @@ def SLP_max(pressure, ob_time, max_pres, device, api_data, config):
 
     # If console is initialising and REST API services are disabled, set daily
     # minimum pressure to current temperature
-    elif not int(config['System']['rest_api']) and max_pres[0] is None:
-        max_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif not int(config['System']['rest_api']) and max_pres.value is None:
+        max_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else if midnight has passed, reset maximum pressure
-    elif time_now.date() > datetime.fromtimestamp(max_pres[5], Tz).date():
-        max_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif time_now.date() > datetime.fromtimestamp(max_pres.updated, Tz).date():
+        max_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else if current pressure is greater than maximum recorded pressure, update
     # maximum pressure
-    elif SLP[0] > max_pres[4]:
-        max_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif SLP[0] > max_pres.extreme:
+        max_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else maximum pressure unchanged, return existing values
     else:
-        max_pres = [max_pres[4], 'mb', max_pres[2], 's', max_pres[4], ob_time[0]]
+        max_pres = Extreme(max_pres.extreme, 'mb', max_pres.time, 's', max_pres.extreme, ob_time[0])
 
     # Return required variables
     return max_pres
@@ -381,7 +433,7 @@ def SLP_min(pressure, ob_time, min_pres, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mb', '-', None, time.time()]
+    error_output = Extreme(None, 'mb', updated=wall_clock.time())
     if pressure[0] is None:
         Logger.warning(f'SLP_min: {system().log_time()} - pressure is None')
         return error_output
@@ -394,26 +446,30 @@ def SLP_min(pressure, ob_time, min_pres, device, api_data, config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of temperature in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 1
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 6
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'SLP_min: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['pressure']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate daily minimum
     # pressure
-    if int(config['System']['rest_api']) and min_pres[0] is None:
+    if int(config['System']['rest_api']) and min_pres.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             data_today = api_data[device]['today'].json()['obs']
             ob_time    = [item[0]                       for item in data_today if item[index_bucket_a] is not None]
-            pressure   = [[item[index_bucket_a], 'mb']  for item in data_today if item[index_bucket_a] is not None]
-            SLP        = [derive.SLP(P, device, config) for P    in pressure]
+            pressure   = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
+            reducer    = station_reducer(device, config)
             try:
-                min_pres   = [min(SLP)[0], 'mb', ob_time[SLP.index(min(SLP))], 's', min(SLP)[0], ob_time[SLP.index(min(SLP))]]
+                SLP        = reducer(np.asarray(pressure, dtype=float))
+                min_SLP    = float(np.nanmin(SLP))
+                min_time   = ob_time[int(np.nanargmin(SLP))]
+                min_pres   = Extreme(min_SLP, 'mb', min_time, 's', min_SLP, min_time)
             except Exception as error:
                 Logger.warning(f'SLP_min: {system().log_time()} - {error}')
                 min_pres = error_output
@@ -422,21 +478,21 @@ def SLP_min(pressure, ob_time, min_pres, device, api_data, config):
 
     # If console is initialising and REST API services are disabled, set daily
     # minimum pressure to current temperature
-    elif not int(config['System']['rest_api']) and min_pres[0] is None:
-        min_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif not int(config['System']['rest_api']) and min_pres.value is None:
+        min_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else if midnight has passed, reset maximum and minimum pressure
-    elif time_now.date() > datetime.fromtimestamp(min_pres[5], Tz).date():
-        min_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif time_now.date() > datetime.fromtimestamp(min_pres.updated, Tz).date():
+        min_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else if current pressure is less than minimum recorded pressure, update
     # minimum pressure and time
-    elif SLP[0] < min_pres[4]:
-        min_pres = [SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0]]
+    elif SLP[0] < min_pres.extreme:
+        min_pres = Extreme(SLP[0], 'mb', ob_time[0], 's', SLP[0], ob_time[0])
 
     # Else minimum pressure unchanged, return existing values
     else:
-        min_pres = [min_pres[4], 'mb', min_pres[2], 's', min_pres[4], ob_time[0]]
+        min_pres = Extreme(min_pres.extreme, 'mb', min_pres.time, 's', min_pres.extreme, ob_time[0])
 
     # Return required variables
     return min_pres
@@ -458,7 +514,7 @@ def temp_diff(out_temp, ob_time, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'dc', '-']
+    error_output = Labelled(None, 'dc')
     if out_temp[0] is None:
         Logger.warning(f'temp_diff: {system().log_time()} - out_temp is None')
         return error_output
@@ -467,10 +523,11 @@ def temp_diff(out_temp, ob_time, device, api_data, config):
         return error_output
 
     # Define index of temperature in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 2
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 7
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'temp_diff: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['temperature']
 
     # If REST API services are enabled, extract required observations from
     # WeatherFlow API data based on device type indicated in API call
@@ -510,7 +567,7 @@ def temp_diff(out_temp, ob_time, device, api_data, config):
         diff_txt = '[color=00a4b4ff]  colder[/color]'
 
     # Return 24 hour temperature difference
-    return [d_temp, 'dc', diff_txt]
+    return Labelled(d_temp, 'dc', diff_txt)
 
 
 def temp_trend(out_temp, ob_time, device, api_data, config):
@@ -529,7 +586,7 @@ def temp_trend(out_temp, ob_time, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'c/hr', 'c8c8c8ff']
+    error_output = Labelled(None, 'c/hr', 'c8c8c8ff')
     if out_temp[0] is None:
         Logger.warning(f'temp_trend: {system().log_time()} - out_temp is None')
         return error_output
@@ -538,10 +595,11 @@ def temp_trend(out_temp, ob_time, device, api_data, config):
         return error_output
 
     # Define index of temperature in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 2
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 7
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'temp_trend: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['temperature']
 
     # If REST API services are enabled, extract required observations from
     # WeatherFlow API data based on device type indicated in API call
@@ -583,7 +641,7 @@ def temp_trend(out_temp, ob_time, device, api_data, config):
         Color = '00a4b4ff'
 
     # Return temperature trend
-    return [trend, 'c/hr', Color]
+    return Labelled(trend, 'c/hr', Color)
 
 
 def temp_max(temp, ob_time, max_temp, device, api_data, config):
@@ -603,7 +661,7 @@ def temp_max(temp, ob_time, max_temp, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'c', '-', None, time.time()]
+    error_output = Extreme(None, 'c', updated=wall_clock.time())
     if temp[0] is None:
         Logger.warning(f'temp_max: {system().log_time()} - temp is None')
         return error_output
@@ -613,26 +671,26 @@ def temp_max(temp, ob_time, max_temp, device, api_data, config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of temperature in websocket packets
-    if (str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]
-            or str(device) in [config['Station']['InAirID'], config['Station']['InAirSN']]):
-        index_bucket_a  = 2
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 7
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'temp_max: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['temperature']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate daily maximum
     # temperature
-    if int(config['System']['rest_api']) and max_temp[0] is None:
+    if int(config['System']['rest_api']) and max_temp.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             data_today = api_data[device]['today'].json()['obs']
             api_time   = [item[0]              for item in data_today if item[index_bucket_a] is not None]
             api_temp   = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
             try:
-                max_temp = [max(api_temp), 'c', api_time[api_temp.index(max(api_temp))], 's', max(api_temp), api_time[api_temp.index(max(api_temp))]]
+                max_temp = Extreme(max(api_temp), 'c', api_time[api_temp.index(max(api_temp))], 's', max(api_temp), api_time[api_temp.index(max(api_temp))])
             except Exception as error:
                 Logger.warning(f'temp_max: {system().log_time()} - {error}')
                 max_temp = error_output
@@ -641,22 +699,22 @@ def temp_max(temp, ob_time, max_temp, device, api_data, config):
 
     # If console is initialising and REST API services are disabled, set daily
     # maximum temperature to current temperature
-    elif not int(config['System']['rest_api']) and max_temp[0] is None:
-        max_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif not int(config['System']['rest_api']) and max_temp.value is None:
+        max_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else if midnight has passed, reset maximum temperature to current
     # temperature
-    elif time_now.date() > datetime.fromtimestamp(max_temp[5], Tz).date():
-        max_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif time_now.date() > datetime.fromtimestamp(max_temp.updated, Tz).date():
+        max_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else if current temperature is greater than maximum recorded temperature,
     # update maximum temperature
-    elif temp[0] > max_temp[4]:
-        max_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif temp[0] > max_temp.extreme:
+        max_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else maximum temperature unchanged, return existing values
     else:
-        max_temp = [max_temp[4], 'c', max_temp[2], 's', max_temp[4], ob_time[0]]
+        max_temp = Extreme(max_temp.extreme, 'c', max_temp.time, 's', max_temp.extreme, ob_time[0])
 
     # Return required variables
     return max_temp
@@ -679,7 +737,7 @@ def temp_min(temp, ob_time, min_temp, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'c', '-', None, time.time()]
+    error_output = Extreme(None, 'c', updated=wall_clock.time())
     if temp[0] is None:
         Logger.warning(f'temp_min: {system().log_time()} - Temp is None')
         return error_output
@@ -689,26 +747,26 @@ def temp_min(temp, ob_time, min_temp, device, api_data, config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of temperature in websocket packets
-    if (str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]
-            or str(device) in [config['Station']['InAirID'], config['Station']['InAirSN']]):
-        index_bucket_a  = 2
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 7
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'temp_min: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['temperature']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate daily minimum
     # temperature
-    if int(config['System']['rest_api']) and min_temp[0] is None:
+    if int(config['System']['rest_api']) and min_temp.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             data_today = api_data[device]['today'].json()['obs']
             api_time   = [item[0]              for item in data_today if item[index_bucket_a] is not None]
             api_temp   = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
             try:
-                min_temp = [min(api_temp), 'c', api_time[api_temp.index(min(api_temp))], 's', min(api_temp), api_time[api_temp.index(min(api_temp))]]
+                min_temp = Extreme(min(api_temp), 'c', api_time[api_temp.index(min(api_temp))], 's', min(api_temp), api_time[api_temp.index(min(api_temp))])
             except Exception as error:
                 Logger.warning(f'temp_min: {system().log_time()} - {error}')
                 min_temp = error_output
@@ -717,22 +775,22 @@ def temp_min(temp, ob_time, min_temp, device, api_data, config):
 
     # If console is initialising and REST API services are disabled, set daily
     # minimum temperature to current temperature
-    elif not int(config['System']['rest_api']) and min_temp[0] is None:
-        min_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif not int(config['System']['rest_api']) and min_temp.value is None:
+        min_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else if midnight has passed, reset minimum temperature to current
     # temperature
-    elif time_now.date() > datetime.fromtimestamp(min_temp[5], Tz).date():
-        min_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif time_now.date() > datetime.fromtimestamp(min_temp.updated, Tz).date():
+        min_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else if current temperature is less than minimum recorded temperature,
     # update minimum temperature
-    elif temp[0] < min_temp[4]:
-        min_temp = [temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0]]
+    elif temp[0] < min_temp.extreme:
+        min_temp = Extreme(temp[0], 'c', ob_time[0], 's', temp[0], ob_time[0])
 
     # Else minimum temperature unchanged, return existing values
     else:
-        min_temp = [min_temp[4], 'c', min_temp[2], 's', min_temp[4], ob_time[0]]
+        min_temp = Extreme(min_temp.extreme, 'c', min_temp.time, 's', min_temp.extreme, ob_time[0])
 
     # Return required variables
     return min_temp
@@ -750,20 +808,75 @@ def strike_delta_t(strike_time, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 's', None]
+    error_output = Reading(None, 's')
     if strike_time[0] is None:
         if config['System']['Connection'] != 'UDP':
             Logger.warning(f'strike_delta_t: {system().log_time()} - strike_time is None')
         return error_output
 
     # Calculate time since last lightning strike
-    delta_t = time.time() - strike_time[0]
-    delta_t = [delta_t, 's', delta_t]
+    delta_t = wall_clock.time() - strike_time[0]
+    delta_t = Reading(delta_t, 's', delta_t)
 
     # Return time since and distance to last lightning strike
     return delta_t
 
 
+# ==============================================================================
+# DEFINE 'strike_series' CLASS
+# ==============================================================================
+class strike_series():
+
+    """ Lightning strike counts from the last 24 hours of REST API data, held as
+    cumulative sums of the strike count and of the number of minutes with at
+    least one strike, so that the strike frequency over any window is the
+    difference of two cumulative values
+
+    INPUTS:
+        data                List of bucket_a observations
+        index               Index of strike count in bucket_a observations
+    """
+
+    def __init__(self, data, index):
+        obs    = np.array([[ob[0], ob[index]] for ob in data if ob[index] is not None], dtype=np.float64).reshape(-1, 2)
+        obs    = obs[np.argsort(obs[:, 0], kind='stable')]
+        self.time   = obs[:, 0]
+        self.count  = np.concatenate(([0.0], np.cumsum(obs[:, 1])))
+        self.active = np.concatenate(([0], np.cumsum(obs[:, 1] > 0)))
+
+    def frequency(self, start_time, tolerance, end_time=math.inf):
+
+        """ Calculate average strike frequency over the minutes with at least
+        one strike, starting from the observation nearest to start_time
+
+        INPUTS:
+            start_time          Start of window                             [s]
+            tolerance           Maximum distance of nearest observation
+                                from start of window                        [s]
+            end_time            End of window                               [s]
+
+        OUTPUT:
+            frequency           Strike frequency, or None if there is no
+                                observation near the start of the window    [/min]
+        """
+
+        if not len(self.time):
+            return None
+        start = int(np.searchsorted(self.time, start_time))
+        if start == len(self.time) or (start > 0 and start_time - self.time[start - 1] <= self.time[start] - start_time):
+            start -= 1
+        if abs(self.time[start] - start_time) >= tolerance:
+            return None
+        end = int(np.searchsorted(self.time, end_time, side='right'))
+        active = int(self.active[end] - self.active[start])
+        return float(self.count[end] - self.count[start]) / active if active > 0 else 0.0
+
+
+# Strike series of each device, with the content of the REST API response they
+# were built from
+strike_series_cache = {}
+
+
 def strike_frequency(ob_time, device, api_data, config):
 
     """ Calculate lightning strike frequency over the previous 10 minutes and
@@ -781,80 +894,47 @@ def strike_frequency(ob_time, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, '/min', None, '/min']
+    error_output = Frequency(None, '/min')
     if ob_time[0] is None:
         Logger.warning(f'strike_freq: {system().log_time()} - ob_time is None')
         return error_output
 
     # Define index of total lightning strike counts in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a  = 4
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a  = 15
-
-    # If REST API services are enabled, extract lightning strike count over the
-    # last three hours
-    if (int(config['System']['rest_api'])
-            and '24Hrs' in api_data[device]
-            and weatherflow_api.verify_response(api_data[device]['24Hrs'], 'obs')):
-        data_24hrs = api_data[device]['24Hrs'].json()['obs']
-        api_time   = [ob[0] for ob in data_24hrs if ob[index_bucket_a] is not None]
-        try:
-            d_time   = [abs(T - (ob_time[0] - 3 * 3600)) for T in api_time]
-            if min(d_time) < 5 * 60:
-                count_3h = [ob[index_bucket_a] for ob in data_24hrs[d_time.index(min(d_time)):] if ob[index_bucket_a] is not None]
-            else:
-                Logger.warning(f'strike_freq: {system().log_time()} - no data in 3 hour window')
-                count_3h = None
-        except Exception as error:
-            Logger.warning(f'strike_freq: {system().log_time()} - {error}')
-            count_3h = None
-    else:
-        count_3h = None
-
-    # Calculate average strike frequency over the last three hours
-    if count_3h is not None:
-        active_strikes = [count for count in count_3h if count > 0]
-        if len(active_strikes) > 0:
-            frequency_3h = [sum(active_strikes) / len(active_strikes), '/min']
-        else:
-            frequency_3h = [0.0, '/min']
-    else:
-        frequency_3h = [None, '/min']
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'strike_freq: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['strike_count']
 
-    # If REST API services are enabled, extract lightning strike count over the
-    # last 10 minutes
+    # If REST API services are enabled, extract lightning strike counts over
+    # the last 24 hours. The strike series is only rebuilt when the content of
+    # the downloaded response has changed
     if (int(config['System']['rest_api'])
             and '24Hrs' in api_data[device]
             and weatherflow_api.verify_response(api_data[device]['24Hrs'], 'obs')):
-        data_24hrs = api_data[device]['24Hrs'].json()['obs']
-        data_24hrs = api_data[device]['24Hrs'].json()['obs']
-        api_time   = [ob[0] for ob in data_24hrs if ob[index_bucket_a] is not None]
+        response = api_data[device]['24Hrs']
         try:
-            d_time   = [abs(T - (ob_time[0] - 600)) for T in api_time]
-            if min(d_time) < 2 * 60:
-                count_10m = [ob[index_bucket_a] for ob in data_24hrs[d_time.index(min(d_time)):] if ob[index_bucket_a] is not None]
-            else:
-                Logger.warning(f'strike_freq: {system().log_time()} - no data in 10 minute window')
-                count_10m = None
+            key = (index_bucket_a, hash(response.content))
+            if device not in strike_series_cache or strike_series_cache[device][0] != key:
+                strike_series_cache[device] = (key, strike_series(response.json()['obs'], index_bucket_a))
+            series = strike_series_cache[device][1]
         except Exception as error:
             Logger.warning(f'strike_freq: {system().log_time()} - {error}')
-            count_10m = None
+            return error_output
     else:
-        count_10m = None
+        return error_output
 
-    # Calculate average strike frequency over the last 10 minutes
-    if count_10m is not None:
-        active_strikes = [count for count in count_10m if count > 0]
-        if len(active_strikes) > 0:
-            frequency_10m = [sum(active_strikes) / len(active_strikes), '/min']
-        else:
-            frequency_10m = [0.0, '/min']
-    else:
-        frequency_10m = [None, '/min']
+    # Calculate average strike frequency over the last three hours and the last
+    # 10 minutes
+    frequency_3h  = series.frequency(ob_time[0] - 3 * 3600, 5 * 60)
+    frequency_10m = series.frequency(ob_time[0] - 600,      2 * 60)
+    if frequency_3h is None:
+        Logger.warning(f'strike_freq: {system().log_time()} - no data in 3 hour window')
+    if frequency_10m is None:
+        Logger.warning(f'strike_freq: {system().log_time()} - no data in 10 minute window')
 
     # Return frequency for last 10 minutes and last three hours
-    return frequency_10m + frequency_3h
+    return Frequency(frequency_10m, '/min', frequency_3h, '/min')
 
 
 def strike_count(count, strike_count, device, api_data, config):
@@ -880,7 +960,7 @@ def strike_count(count, strike_count, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'count', None, time.time()]
+    error_output = Accumulation(None, 'count', None, wall_clock.time())
     if count[0] is None:
         Logger.warning(f'strike_count: {system().log_time()} - count is None')
         today_strikes = month_strikes = year_strikes = error_output
@@ -888,15 +968,15 @@ def strike_count(count, strike_count, device, api_data, config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of total lightning strike counts in websocket packets
-    if str(device) in [config['Station']['OutAirID'], config['Station']['OutAirSN']]:
-        index_bucket_a = 4
-        index_bucket_e = 4
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a = 15
-        index_bucket_e = 24
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'strike_count: {system().log_time()} - unknown device {device}')
+        return {'today': error_output, 'month': error_output, 'year': error_output}
+    index_bucket_a = descriptor.bucket_a['strike_count']
+    index_bucket_e = descriptor.bucket_e['strike_count']
 
     # ==========================================================================
     # TODAY STRIKES
@@ -909,7 +989,7 @@ def strike_count(count, strike_count, device, api_data, config):
             data_today  = api_data[device]['today'].json()['obs']
             strikes = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
             try:
-                today_strikes = [sum(x for x in strikes), 'count', sum(x for x in strikes), time.time()]
+                today_strikes = Accumulation(sum(x for x in strikes), 'count', sum(x for x in strikes), wall_clock.time())
             except Exception as error:
                 Logger.warning(f'strike_count: {system().log_time()} - {error}')
                 today_strikes = error_output
@@ -919,17 +999,17 @@ def strike_count(count, strike_count, device, api_data, config):
     # Else if console is initialising and REST API services are not enabled,
     # set total daily lightning strikes equal to last minute count
     elif not int(config['System']['rest_api']) and strike_count['today'][0] is None:
-        today_strikes = [count[0], 'count', count[0], time.time()]
+        today_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else if midnight has passed, reset daily lightning strike count to zero
-    elif time_now.date() > datetime.fromtimestamp(strike_count['today'][3], Tz).date():
-        today_strikes = [count[0], 'count', count[0], time.time()]
+    elif time_now.date() > datetime.fromtimestamp(strike_count['today'].updated, Tz).date():
+        today_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else, calculate current daily lightning strike count
     else:
-        currentCount = strike_count['today'][2]
+        currentCount = strike_count['today'].total
         updatedCount = currentCount + count[0] if count[0] is not None else currentCount
-        today_strikes = [updatedCount, 'count', updatedCount, time.time()]
+        today_strikes = Accumulation(updatedCount, 'count', updatedCount, wall_clock.time())
 
     # ==========================================================================
     # MONTH COUNTS
@@ -937,7 +1017,7 @@ def strike_count(count, strike_count, device, api_data, config):
     # If console is initialising and today is the first day on the month, set
     # monthly lightning strikes to current daily lightning strikes
     if strike_count['month'][0] is None and time_now.day == 1:
-        month_strikes = [today_strikes[0], 'count', today_strikes[0], time.time()]
+        month_strikes = Accumulation(today_strikes[0], 'count', today_strikes[0], wall_clock.time())
 
     # Else if console is initialising and REST API services are enabled,
     # calculate total monthly lightning strikes using WeatherFlow API
@@ -947,10 +1027,11 @@ def strike_count(count, strike_count, device, api_data, config):
             month_data  = api_data[device]['month'].json()['obs']
             strikes     = [item[index_bucket_e] for item in month_data if item[index_bucket_e] is not None]
             try:
-                month_strikes = [sum(x for x in strikes), 'count', sum(x for x in strikes), time.time()]
+                month_total = sum(x for x in strikes)
                 if today_strikes[0] is not None:
-                    month_strikes[0] += today_strikes[0]
-                    month_strikes[2] += today_strikes[2]
+                    month_strikes = Accumulation(month_total + today_strikes[0], 'count', month_total + today_strikes.total, wall_clock.time())
+                else:
+                    month_strikes = Accumulation(month_total, 'count', month_total, wall_clock.time())
             except Exception as error:
                 Logger.warning(f'strike_count: {system().log_time()} - {error}')
                 month_strikes = error_output
@@ -960,18 +1041,18 @@ def strike_count(count, strike_count, device, api_data, config):
     # Else if console is initialising and REST API services are not enabled, set
     # total daily lightning strikes equal to last minute count
     elif not int(config['System']['rest_api']) and strike_count['month'][0] is None:
-        month_strikes = [count[0], 'count', count[0], time.time()]
+        month_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else if the end of the month has passed, reset monthly lightning strike
     # count to zero
-    elif time_now.month > datetime.fromtimestamp(strike_count['month'][3], Tz).month:
-        month_strikes = [count[0], 'count', count[0], time.time()]
+    elif time_now.month > datetime.fromtimestamp(strike_count['month'].updated, Tz).month:
+        month_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else, calculate current monthly lightning strike count
     else:
-        currentCount = strike_count['month'][2]
+        currentCount = strike_count['month'].total
         updatedCount = currentCount + count[0] if count[0] is not None else currentCount
-        month_strikes = [updatedCount, 'count', updatedCount, time.time()]
+        month_strikes = Accumulation(updatedCount, 'count', updatedCount, wall_clock.time())
 
     # ==========================================================================
     # YEAR COUNTS
@@ -979,7 +1060,7 @@ def strike_count(count, strike_count, device, api_data, config):
     # If console is initialising and today is the first day on the year, set
     # yearly lightning strikes to current daily lightning strikes
     if strike_count['year'][0] is None and time_now.timetuple().tm_yday == 1:
-        year_strikes = [today_strikes[0], 'count', today_strikes[0], time.time()]
+        year_strikes = Accumulation(today_strikes[0], 'count', today_strikes[0], wall_clock.time())
 
     # Else if console is initialising and REST API services are enabled,
     # calculate total yearly lightning strikes using WeatherFlow API
@@ -989,10 +1070,11 @@ def strike_count(count, strike_count, device, api_data, config):
             year_data = api_data[device]['year'].json()['obs']
             strikes   = [item[index_bucket_e] for item in year_data if item[index_bucket_e] is not None]
             try:
-                year_strikes = [sum(x for x in strikes), 'count', sum(x for x in strikes), time.time()]
+                year_total = sum(x for x in strikes)
                 if today_strikes[0] is not None:
-                    year_strikes[0] += today_strikes[0]
-                    year_strikes[2] += today_strikes[2]
+                    year_strikes = Accumulation(year_total + today_strikes[0], 'count', year_total + today_strikes.total, wall_clock.time())
+                else:
+                    year_strikes = Accumulation(year_total, 'count', year_total, wall_clock.time())
             except Exception as error:
                 Logger.warning(f'strike_count: {system().log_time()} - {error}')
                 year_strikes = error_output
@@ -1002,19 +1084,19 @@ def strike_count(count, strike_count, device, api_data, config):
     # Else if console is initialising and REST API services are not enabled, set
     # total yearly lightning strikes equal to last minute count
     elif not int(config['System']['rest_api']) and strike_count['month'][0] is None:
-        year_strikes = [count[0], 'count', count[0], time.time()]
+        year_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else if the end of the year has passed, reset monthly and yearly lightning
     # strike count to zero
-    elif time_now.year > datetime.fromtimestamp(strike_count['year'][3], Tz).year:
-        month_strikes = [count[0], 'count', count[0], time.time()]
-        year_strikes  = [count[0], 'count', count[0], time.time()]
+    elif time_now.year > datetime.fromtimestamp(strike_count['year'].updated, Tz).year:
+        month_strikes = Accumulation(count[0], 'count', count[0], wall_clock.time())
+        year_strikes  = Accumulation(count[0], 'count', count[0], wall_clock.time())
 
     # Else, calculate current yearly lightning strike count
     else:
-        currentCount = strike_count['year'][2]
+        currentCount = strike_count['year'].total
         updatedCount = currentCount + count[0] if count[0] is not None else currentCount
-        year_strikes = [updatedCount, 'count', updatedCount, time.time()]
+        year_strikes = Accumulation(updatedCount, 'count', updatedCount, wall_clock.time())
 
     # Return Daily, Monthly, and Yearly lightning strike counts
     return {'today': today_strikes, 'month': month_strikes, 'year': year_strikes}
@@ -1032,7 +1114,7 @@ def rain_rate(minute_rain):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mm/hr', '-', None]
+    error_output = RainRate(None, 'mm/hr')
     if minute_rain[0] is None:
         Logger.warning(f'rainRate: {system().log_time()} - minute_rain is None')
         return error_output
@@ -1057,7 +1139,7 @@ def rain_rate(minute_rain):
         rate_text = 'Extreme Rain'
 
     # Return instantaneous rain rate and text
-    return [rate, 'mm/hr', rate_text, rate]
+    return RainRate(rate, 'mm/hr', rate_text, rate)
 
 
 def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, config):
@@ -1085,7 +1167,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mm', None, time.time()]
+    error_output = Accumulation(None, 'mm', None, wall_clock.time())
     if minute_rain[0] is None and daily_rain[0] is None:
         Logger.warning(f'rain_accum: {system().log_time()} - minute_rain and daily_rain are None')
         today_rain = yesterday_rain = month_rain = year_rain = error_output
@@ -1093,15 +1175,15 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of total daily rain accumulation in websocket packets
-    if str(device) in [config['Station']['SkyID'], config['Station']['SkySN']]:
-        index_bucket_a = 3
-        index_bucket_e = 3
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a = 12
-        index_bucket_e = 28
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'rain_accum: {system().log_time()} - unknown device {device}')
+        return {'today': error_output, 'yesterday': error_output, 'month': error_output, 'year': error_output}
+    index_bucket_a = descriptor.bucket_a['rain']
+    index_bucket_e = descriptor.bucket_e['rain']
 
     # ==========================================================================
     # TODAY RAIN
@@ -1109,12 +1191,13 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # Set current daily rainfall accumulation for websocket connections
     if config['System']['Connection'] == 'Websocket':
         if daily_rain[0] is not None:
-            today_rain = [daily_rain[0], 'mm', daily_rain[0], time.time()]
+            today_rain = Accumulation(daily_rain[0], 'mm', daily_rain[0], wall_clock.time())
         else:
             today_rain = error_output
 
-    # Else, set current daily rainfall accumulation for UDP connections
-    elif config['System']['Connection'] == 'UDP':
+    # Else, set current daily rainfall accumulation for UDP and dual
+    # connections
+    elif config['System']['Connection'] in ['UDP', 'Dual']:
 
         # If console is initialising and REST API services are enabled, download
         # all data for current day using Weatherflow API and calculate todays's
@@ -1125,7 +1208,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
                 today_data = api_data[device]['today'].json()['obs']
                 rain_data = [item[index_bucket_a] for item in today_data if item[index_bucket_a] is not None]
                 try:
-                    today_rain = [sum(x for x in rain_data), 'mm', sum(x for x in rain_data), time.time()]
+                    today_rain = Accumulation(sum(x for x in rain_data), 'mm', sum(x for x in rain_data), wall_clock.time())
                 except Exception as error:
                     Logger.warning(f'rain_accum: {system().log_time()} - {error}')
                     today_rain = error_output
@@ -1135,16 +1218,16 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
         # Else if console is initialising and REST API services are not enabled,
         # set today's rainfall accumulation equal to minute_rain
         elif not int(config['System']['rest_api']) and rain_accum['today'][0] is None:
-            today_rain = [minute_rain[0], 'mm', minute_rain[0], time.time()]
+            today_rain = Accumulation(minute_rain[0], 'mm', minute_rain[0], wall_clock.time())
 
         # Else if midnight has passed, set today's rainfall accumulation equal
         # to minute_rain
-        elif time_now.date() > datetime.fromtimestamp(rain_accum['today'][3], Tz).date():
-            today_rain = [minute_rain[0], 'mm', minute_rain[0], time.time()]
+        elif time_now.date() > datetime.fromtimestamp(rain_accum['today'].updated, Tz).date():
+            today_rain = Accumulation(minute_rain[0], 'mm', minute_rain[0], wall_clock.time())
 
         # Else, update today's rainfall with latest minute_rain
         else:
-            today_rain = [rain_accum['today'][2] + minute_rain[0], 'mm', rain_accum['today'][2] + minute_rain[0], time.time()]
+            today_rain = Accumulation(rain_accum['today'].total + minute_rain[0], 'mm', rain_accum['today'].total + minute_rain[0], wall_clock.time())
 
     # ==========================================================================
     # YESTERDAY RAIN
@@ -1158,7 +1241,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
             yesterday_data = api_data[device]['yesterday'].json()['obs']
             rain_data = [item[index_bucket_a] for item in yesterday_data if item[index_bucket_a] is not None]
             try:
-                yesterday_rain = [sum(x for x in rain_data), 'mm', sum(x for x in rain_data), time.time()]
+                yesterday_rain = Accumulation(sum(x for x in rain_data), 'mm', sum(x for x in rain_data), wall_clock.time())
             except Exception as error:
                 Logger.warning(f'rain_accum: {system().log_time()} - {error}')
                 yesterday_rain = error_output
@@ -1168,8 +1251,8 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # Else if midnight has passed, set yesterday's rainfall accumulation equal
     # to rain_accum['today'] (which still contains yesterday's accumulation)
     elif (rain_accum['today'][0] is not None
-            and time_now.date() > datetime.fromtimestamp(rain_accum['today'][3], Tz).date()):
-        yesterday_rain = [rain_accum['today'][2], 'mm', rain_accum['today'][2], time.time()]
+            and time_now.date() > datetime.fromtimestamp(rain_accum['today'].updated, Tz).date()):
+        yesterday_rain = Accumulation(rain_accum['today'].total, 'mm', rain_accum['today'].total, wall_clock.time())
 
     # Else if console is initialising and REST API services are not enabled, set
     # yesterday's rainfall accumulation equal to None
@@ -1178,7 +1261,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
 
     # Else, set yesterday rainfall accumulation as unchanged
     else:
-        yesterday_rain = [rain_accum['yesterday'][2], 'mm', rain_accum['yesterday'][2], time.time()]
+        yesterday_rain = Accumulation(rain_accum['yesterday'].total, 'mm', rain_accum['yesterday'].total, wall_clock.time())
 
     # ==========================================================================
     # MONTH RAIN
@@ -1186,7 +1269,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # If console is initialising and today is the first day on the month, set
     # monthly rainfall to current daily rainfall
     if rain_accum['month'][0] is None and time_now.day == 1:
-        month_rain = [today_rain[0], 'mm', 0, time.time()]
+        month_rain = Accumulation(today_rain[0], 'mm', 0, wall_clock.time())
 
     # Else if console is initialising and REST API services are enabled,
     # download all data for the current month using Weatherflow API and
@@ -1197,9 +1280,11 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
             month_data = api_data[device]['month'].json()['obs']
             rain_data  = [item[index_bucket_e] for item in month_data if item[index_bucket_e] is not None]
             try:
-                month_rain = [sum(x for x in rain_data), 'mm', sum(x for x in rain_data), time.time()]
+                month_total = sum(x for x in rain_data)
                 if not today_rain[0] is None:
-                    month_rain[0] += today_rain[0]
+                    month_rain = Accumulation(month_total + today_rain[0], 'mm', month_total, wall_clock.time())
+                else:
+                    month_rain = Accumulation(month_total, 'mm', month_total, wall_clock.time())
             except Exception as error:
                 Logger.warning(f'rain_accum: {system().log_time()} - {error}')
                 month_rain = error_output
@@ -1209,25 +1294,25 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # Else if console is initialising and REST API services are not enabled, set
     # monthly rainfall accumulation equal to minute_rain
     elif not int(config['System']['rest_api']) and rain_accum['month'][0] is None:
-        month_rain = [minute_rain[0], 'mm', minute_rain[0], time.time()]
+        month_rain = Accumulation(minute_rain[0], 'mm', minute_rain[0], wall_clock.time())
 
     # Else if the end of the month has passed, reset monthly rain accumulation
     # to current daily rain accumulation
-    elif time_now.month > datetime.fromtimestamp(rain_accum['month'][3], Tz).month:
+    elif time_now.month > datetime.fromtimestamp(rain_accum['month'].updated, Tz).month:
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        month_rain  = [daily_accum, 'mm', 0, time.time()]
+        month_rain  = Accumulation(daily_accum, 'mm', 0, wall_clock.time())
 
     # Else if midnight has passed, permanently add rain_accum['Today'] (which
     # still contains yesterday's accumulation) and current daily rainfall to
     # monthly rain accumulation
-    elif time_now.date() > datetime.fromtimestamp(rain_accum['month'][3], Tz).date():
+    elif time_now.date() > datetime.fromtimestamp(rain_accum['month'].updated, Tz).date():
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        month_rain  = [rain_accum['month'][2] + rain_accum['today'][2] + daily_accum, 'mm', rain_accum['month'][2] + rain_accum['today'][2], time.time()]
+        month_rain  = Accumulation(rain_accum['month'].total + rain_accum['today'].total + daily_accum, 'mm', rain_accum['month'].total + rain_accum['today'].total, wall_clock.time())
 
     # Else, update current monthly rainfall accumulation
     else:
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        month_rain  = [rain_accum['month'][2] + daily_accum, 'mm', rain_accum['month'][2], time.time()]
+        month_rain  = Accumulation(rain_accum['month'].total + daily_accum, 'mm', rain_accum['month'].total, wall_clock.time())
 
     # ==========================================================================
     # YEAR RAIN
@@ -1235,7 +1320,7 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # If console is initialising and today is the first day on the year, set
     # yearly rainfall to current daily rainfall
     if rain_accum['year'][0] is None and time_now.timetuple().tm_yday == 1:
-        year_rain = [today_rain[0], 'mm', 0, time.time()]
+        year_rain = Accumulation(today_rain[0], 'mm', 0, wall_clock.time())
 
     # Else if console is initialising, and REST API services are enabled,
     # download all data for the current year using Weatherflow API and
@@ -1246,9 +1331,11 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
             year_data = api_data[device]['year'].json()['obs']
             rain_data = [item[index_bucket_e] for item in year_data if item[index_bucket_e] is not None]
             try:
-                year_rain = [sum(x for x in rain_data), 'mm', sum(x for x in rain_data), time.time()]
+                year_total = sum(x for x in rain_data)
                 if today_rain[0] is None:
-                    year_rain[0] += today_rain[0]
+                    year_rain = Accumulation(year_total + today_rain[0], 'mm', year_total, wall_clock.time())
+                else:
+                    year_rain = Accumulation(year_total, 'mm', year_total, wall_clock.time())
             except Exception as error:
                 Logger.warning(f'rain_accum: {system().log_time()} - {error}')
                 year_rain = error_output
@@ -1258,26 +1345,26 @@ def rain_accumulation(minute_rain, daily_rain, rain_accum, device, api_data, con
     # Else if console is initialising and REST API services are not enabled, set
     # yearly rainfall accumulation equal to minute_rain
     elif not int(config['System']['rest_api']) and rain_accum['year'][0] is None:
-        year_rain = [minute_rain[0], 'mm', minute_rain[0], time.time()]
+        year_rain = Accumulation(minute_rain[0], 'mm', minute_rain[0], wall_clock.time())
 
     # Else if the end of the year has passed, reset monthly and yearly rain
     # accumulation to current daily rain accumulation
-    elif time_now.year > datetime.fromtimestamp(rain_accum['year'][3], Tz).year:
+    elif time_now.year > datetime.fromtimestamp(rain_accum['year'].updated, Tz).year:
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        year_rain   = [daily_accum, 'mm', 0, time.time()]
-        month_rain  = [daily_accum, 'mm', 0, time.time()]
+        year_rain   = Accumulation(daily_accum, 'mm', 0, wall_clock.time())
+        month_rain  = Accumulation(daily_accum, 'mm', 0, wall_clock.time())
 
     # Else if midnight has passed, permanently add rain_accum['Today'] (which
     # still contains yesterday's accumulation) and current daily rainfall to
     # yearly rain accumulation
-    elif time_now.date() > datetime.fromtimestamp(rain_accum['year'][3], Tz).date():
+    elif time_now.date() > datetime.fromtimestamp(rain_accum['year'].updated, Tz).date():
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        year_rain  = [rain_accum['year'][2] + rain_accum['year'][2] + daily_accum, 'mm', rain_accum['year'][2] + rain_accum['today'][2], time.time()]
+        year_rain  = Accumulation(rain_accum['year'].total + rain_accum['year'].total + daily_accum, 'mm', rain_accum['year'].total + rain_accum['today'].total, wall_clock.time())
 
     # Else, calculate current yearly rain accumulation
     else:
         daily_accum = today_rain[0] if not today_rain[0] is None else 0
-        year_rain   = [rain_accum['year'][2] + daily_accum, 'mm', rain_accum['year'][2], time.time()]
+        year_rain   = Accumulation(rain_accum['year'].total + daily_accum, 'mm', rain_accum['year'].total, wall_clock.time())
 
     # Return Daily, Monthly, and Yearly rainfall accumulation totals
     return {'today': today_rain, 'yesterday': yesterday_rain, 'month': month_rain, 'year': year_rain}
@@ -1299,32 +1386,33 @@ def avg_wind_speed(wind_spd, avg_wind, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mps', None, None, time.time()]
+    error_output = Average(None, 'mps', updated=wall_clock.time())
     if wind_spd[0] is None:
         Logger.warning(f'avgSpeed: {system().log_time()} - wind_spd is None')
         return error_output
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of wind speed in websocket packets
-    if str(device) in [config['Station']['SkyID'], config['Station']['SkySN']]:
-        index_bucket_a = 5
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a = 2
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'avgSpeed: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['wind_avg']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate daily averaged
     # windspeed
-    if int(config['System']['rest_api']) and avg_wind[0] is None:
+    if int(config['System']['rest_api']) and avg_wind.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             today_data = api_data[device]['today'].json()['obs']
             wind_spd = [item[index_bucket_a] for item in today_data if item[index_bucket_a] is not None]
             try:
                 average = sum(x for x in wind_spd) / len(wind_spd)
-                wind_avg = [average, 'mps', average, len(wind_spd), time.time()]
+                wind_avg = Average(average, 'mps', average, len(wind_spd), wall_clock.time())
             except Exception as error:
                 Logger.warning(f'avgSpeed: {system().log_time()} - {error}')
                 wind_avg = error_output
@@ -1333,19 +1421,19 @@ def avg_wind_speed(wind_spd, avg_wind, device, api_data, config):
 
     # If console is initialising and REST API services are not enabled,
     # set daily averaged wind speed to current wind speed
-    elif not int(config['System']['rest_api']) and avg_wind[0] is None:
-        wind_avg = [wind_spd[0], 'mps', wind_spd[0], 1, time.time()]
+    elif not int(config['System']['rest_api']) and avg_wind.value is None:
+        wind_avg = Average(wind_spd[0], 'mps', wind_spd[0], 1, wall_clock.time())
 
     # Else if midnight has passed, reset daily averaged wind speed
-    elif time_now.date() > datetime.fromtimestamp(avg_wind[4], Tz).date():
-        wind_avg = [wind_spd[0], 'mps', wind_spd[0], 1, time.time()]
+    elif time_now.date() > datetime.fromtimestamp(avg_wind.updated, Tz).date():
+        wind_avg = Average(wind_spd[0], 'mps', wind_spd[0], 1, wall_clock.time())
 
     # Else, calculate current daily averaged wind speed
     else:
-        length = avg_wind[3] + 1
-        current_avg = avg_wind[2]
+        length = avg_wind.count + 1
+        current_avg = avg_wind.average
         updated_avg = (length - 1) / length * current_avg + 1 / length * wind_spd[0]
-        wind_avg    = [updated_avg, 'mps', updated_avg, length, time.time()]
+        wind_avg    = Average(updated_avg, 'mps', updated_avg, length, wall_clock.time())
 
     # Return daily averaged wind speed
     return wind_avg
@@ -1367,30 +1455,31 @@ def max_wind_gust(wind_gust, max_gust, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'mps', None, time.time()]
+    error_output = Gust(None, 'mps', updated=wall_clock.time())
     if wind_gust[0] is None:
         Logger.warning(f'max_gust: {system().log_time()} - wind_gust is None')
         return error_output
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Define index of wind speed in websocket packets
-    if str(device) in [config['Station']['SkyID'], config['Station']['SkySN']]:
-        index_bucket_a = 6
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a = 3
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'max_gust: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['wind_gust']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate maximum wind gust
-    if int(config['System']['rest_api']) and max_gust[0] is None:
+    if int(config['System']['rest_api']) and max_gust.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             today_data = api_data[device]['today'].json()['obs']
             wind_gust = [item[index_bucket_a] for item in today_data if item[index_bucket_a] is not None]
             try:
-                max_gust  = [max(x for x in wind_gust), 'mps', max(x for x in wind_gust), time.time()]
+                max_gust  = Gust(max(x for x in wind_gust), 'mps', max(x for x in wind_gust), wall_clock.time())
             except Exception as error:
                 Logger.warning(f'max_gust: {system().log_time()} - {error}')
                 max_gust = error_output
@@ -1399,21 +1488,21 @@ def max_wind_gust(wind_gust, max_gust, device, api_data, config):
 
     # If console is initialising and REST API services are not enabled,
     # set maximum wind gust to current wind gust
-    elif not int(config['System']['rest_api']) and max_gust[0] is None:
-        max_gust = [wind_gust[0], 'mps', wind_gust[0], time.time()]
+    elif not int(config['System']['rest_api']) and max_gust.value is None:
+        max_gust = Gust(wind_gust[0], 'mps', wind_gust[0], wall_clock.time())
 
     # Else if midnight has passed, reset maximum recorded wind gust
-    elif time_now.date() > datetime.fromtimestamp(max_gust[3], Tz).date():
-        max_gust = [wind_gust[0], 'mps', wind_gust[0], time.time()]
+    elif time_now.date() > datetime.fromtimestamp(max_gust.updated, Tz).date():
+        max_gust = Gust(wind_gust[0], 'mps', wind_gust[0], wall_clock.time())
 
     # Else if current gust speed is greater than maximum recorded gust speed,
     # update maximum gust speed
-    elif wind_gust[0] > max_gust[2]:
-        max_gust = [wind_gust[0], 'mps', wind_gust[0], time.time()]
+    elif wind_gust[0] > max_gust.gust:
+        max_gust = Gust(wind_gust[0], 'mps', wind_gust[0], wall_clock.time())
 
     # Else maximum gust speed is unchanged, return existing value
     else:
-        max_gust = [max_gust[2], 'mps', max_gust[2], time.time()]
+        max_gust = Gust(max_gust.gust, 'mps', max_gust.gust, wall_clock.time())
 
     # Return maximum wind gust
     return max_gust
@@ -1433,7 +1522,7 @@ def cardinal_wind_dir(wind_dir, wind_spd=[1, 'mps']):
     """
 
     # Return None if required variables are missing
-    error_output = [wind_dir[0], wind_dir[1], '-', '-']
+    error_output = Direction(wind_dir[0], wind_dir[1])
     if wind_dir[0] is None and wind_spd[0] != 0.0:
         Logger.warning(f'cardWindDir: {system().log_time()} - wind_dir is None')
         return error_output
@@ -1452,12 +1541,12 @@ def cardinal_wind_dir(wind_dir, wind_spd=[1, 'mps']):
     if wind_spd[0] == 0:
         direction = 'Calm'
         description = '[color=9aba2fff]Calm[/color]'
-        cardinal_wind = [wind_dir[0], wind_dir[1], direction, description]
+        cardinal_wind = Direction(wind_dir[0], wind_dir[1], direction, description)
     else:
         idx = int(round(wind_dir[0] / 22.5))
         direction = direction[idx]
         description = description[idx].split()[0] + ' [color=9aba2fff]' + description[idx].split()[1] + '[/color]'
-        cardinal_wind = [wind_dir[0], wind_dir[1], direction, description]
+        cardinal_wind = Direction(wind_dir[0], wind_dir[1], direction, description)
 
     # Return cardinal wind direction and description
     return cardinal_wind
@@ -1475,7 +1564,7 @@ def beaufort_scale(wind_spd):
     """
 
     # Return None if required variables are missing
-    error_output = wind_spd + ['-', '-', '-']
+    error_output = Beaufort(wind_spd[0], wind_spd[1])
     if wind_spd[0] is None:
         Logger.warning(f'beauf_Scale: {system().log_time()} - wind_spd is None')
         return error_output
@@ -1490,10 +1579,10 @@ def beaufort_scale(wind_spd):
 
     # Define Beaufort Scale wind speed, description, and icon
     Ind = bisect.bisect(cutoffs, wind_spd[0])
-    beaufort = [float(force[Ind]), str(force[Ind]), description[Ind]]
+    beaufort = Beaufort(wind_spd[0], wind_spd[1], float(force[Ind]), str(force[Ind]), description[Ind])
 
     # Return Beaufort Scale speed, description, and icon
-    return wind_spd + beaufort
+    return beaufort
 
 
 def uv_index(uv_level):
@@ -1508,7 +1597,7 @@ def uv_index(uv_level):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'index', '-', '#646464']
+    error_output = UVIndex(None, 'index')
     if uv_level[0] is None:
         Logger.warning(f'uv_index: {system().log_time()} - uv_level is None')
         return error_output
@@ -1531,7 +1620,7 @@ def uv_index(uv_level):
         Ind = bisect.bisect(cutoffs, round(uv_level[0], 1))
     else:
         Ind = 0
-    index = [round(uv_level[0], 1), 'index', level[Ind], Color[Ind]]
+    index = UVIndex(round(uv_level[0], 1), 'index', level[Ind], Color[Ind])
 
     # Return UV index and icon
     return index
@@ -1553,44 +1642,37 @@ def peak_sun_hours(radiation, peak_sun, device, api_data, config):
     """
 
     # Return None if required variables are missing
-    error_output = [None, 'hrs', '-']
+    error_output = PeakSun(None, 'hrs')
     if radiation[0] is None:
         Logger.warning(f'peak_sun: {system().log_time()} - radiation is None')
         return error_output
 
     # Define current time in station timezone
     Tz = pytz.timezone(config['Station']['Timezone'])
-    time_now = datetime.now(pytz.utc).astimezone(Tz)
-
-    # Calculate time of sunrise and sunset or use existing values
-    if peak_sun[0] is None or time_now > datetime.fromtimestamp(peak_sun[5], Tz):
-        observer          = ephem.Observer()
-        observer.pressure = 0
-        observer.lat      = str(config['Station']['Latitude'])
-        observer.lon      = str(config['Station']['Longitude'])
-        observer.horizon  = '-0:34'
-        sunrise           = observer.next_rising(ephem.Sun()).datetime().timestamp()
-        sunset            = observer.next_setting(ephem.Sun()).datetime().timestamp()
-    else:
-        sunrise           = peak_sun[4]
-        sunset            = peak_sun[5]
+    time_now = wall_clock.now(pytz.utc).astimezone(Tz)
+
+    # Extract time of sunrise and sunset for the current station-local day
+    # from the shared solar event cache
+    events  = solar.events(config, time_now.date())
+    sunrise = events.sunrise.timestamp()
+    sunset  = events.sunset.timestamp()
 
     # Define index of radiation in websocket packets
-    if str(device) in [config['Station']['SkyID'], config['Station']['SkySN']]:
-        index_bucket_a = 10
-    elif str(device) in [config['Station']['TempestID'], config['Station']['TempestSN']]:
-        index_bucket_a = 11
+    descriptor = devices.lookup(device, config)
+    if descriptor is None:
+        Logger.warning(f'peak_sun: {system().log_time()} - unknown device {device}')
+        return error_output
+    index_bucket_a = descriptor.bucket_a['radiation']
 
     # If console is initialising and REST API services are enabled, download all
     # data for current day using Weatherflow API and calculate Peak Sun Hours
-    if int(config['System']['rest_api']) and peak_sun[0] is None:
+    if int(config['System']['rest_api']) and peak_sun.value is None:
         if ('today' in api_data[device]
                 and weatherflow_api.verify_response(api_data[device]['today'], 'obs')):
             data_today = api_data[device]['today'].json()['obs']
             radiation = [item[index_bucket_a] for item in data_today if item[index_bucket_a] is not None]
             try:
                 watt_hrs = sum([item * (1 / 60) for item in radiation])
-                peak_sun = [watt_hrs / 1000, 'hrs', watt_hrs, sunrise, sunset, time.time()]
             except Exception as error:
                 Logger.warning(f'peak_sun: {system().log_time()} - {error}')
                 return error_output
@@ -1599,37 +1681,35 @@ def peak_sun_hours(radiation, peak_sun, device, api_data, config):
 
     # If console is initialising and REST API services are not enabled,
     # calculate current Peak Sun Hours
-    elif not int(config['System']['rest_api']) and peak_sun[0] is None:
+    elif not int(config['System']['rest_api']) and peak_sun.value is None:
         watt_hrs = radiation[0] * (1 / 60)
-        peak_sun = [watt_hrs / 1000, 'hrs', watt_hrs, sunrise, sunset, time.time()]
 
     # Else if midnight has passed, reset Peak Sun Hours
-    elif time_now.date() > datetime.fromtimestamp(peak_sun[6], Tz).date():
+    elif time_now.date() > datetime.fromtimestamp(peak_sun.updated, Tz).date():
         watt_hrs = radiation[0] * (1 / 60)
-        peak_sun = [watt_hrs / 1000, 'hrs', watt_hrs, sunrise, sunset, time.time()]
 
     # Else calculate current Peak Sun Hours
     else:
-        watt_hrs = peak_sun[3] + radiation[0] * (1 / 60)
-        peak_sun = [watt_hrs / 1000, 'hrs', watt_hrs, sunrise, sunset, time.time()]
+        watt_hrs = peak_sun.watt_hrs + radiation[0] * (1 / 60)
 
     # Calculate proportion of daylight hours that have passed
     if datetime.fromtimestamp(sunrise, Tz) <= time_now <= datetime.fromtimestamp(sunset, Tz):
-        daylight_factor = (time.time() - sunrise) / (sunset - sunrise)
+        daylight_factor = (wall_clock.time() - sunrise) / (sunset - sunrise)
     else:
         daylight_factor = 1
 
     # Define daily solar potential
-    if peak_sun[0] / daylight_factor == 0:
-        peak_sun.insert(2, '[color=#646464ff]None[/color]')
-    elif peak_sun[0] / daylight_factor < 2:
-        peak_sun.insert(2, '[color=#4575b4ff]Limited[/color]')
-    elif peak_sun[0] / daylight_factor < 4:
-        peak_sun.insert(2, '[color=#fee090ff]Moderate[/color]')
-    elif peak_sun[0] / daylight_factor < 6:
-        peak_sun.insert(2, '[color=#f46d43ff]Good[/color]')
+    hours = watt_hrs / 1000
+    if hours / daylight_factor == 0:
+        potential = '[color=#646464ff]None[/color]'
+    elif hours / daylight_factor < 2:
+        potential = '[color=#4575b4ff]Limited[/color]'
+    elif hours / daylight_factor < 4:
+        potential = '[color=#fee090ff]Moderate[/color]'
+    elif hours / daylight_factor < 6:
+        potential = '[color=#f46d43ff]Good[/color]'
     else:
-        peak_sun.insert(2, '[color=#d73027ff]Excellent[/color]')
+        potential = '[color=#d73027ff]Excellent[/color]'
 
     # Return Peak Sun Hours
-    return peak_sun
+    return PeakSun(hours, 'hrs', potential, watt_hrs, sunrise, sunset, wall_clock.time())
@@ -0,0 +1,220 @@
+""" Parses the hub_status and device_status UDP messages received by the
+Raspberry Pi Python console for WeatherFlow Tempest and Smart Home Weather
+stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The latest status of each hub and device is kept by serial number, together
+with the recent device status history, so that the status panel can show the
+hub firmware, device voltage, sensor faults and observation count without the
+REST API. Each status message is also appended to the health file when one
+is specified in the configuration file.
+"""
+
+# Import required library modules
+from lib.system     import system
+from lib            import wall_clock
+
+# Import required Kivy modules
+from kivy.logger    import Logger
+
+# Import required system modules
+from collections    import namedtuple, deque
+import threading
+
+# Latest hub and device status
+hub_state    = namedtuple('hub_state',    ['serial_number', 'timestamp', 'firmware', 'uptime', 'rssi', 'reset_flags'])
+device_state = namedtuple('device_state', ['serial_number', 'hub_sn', 'timestamp', 'firmware', 'uptime',
+                                           'voltage', 'rssi', 'hub_rssi', 'sensor_status'])
+
+# Define sensor status bits reporting a failed sensor. Lightning noise and
+# disturber bits are transient and not reported as faults
+SENSOR_FAULTS = {0x001: 'lightning', 0x008: 'pressure', 0x010: 'temperature', 0x020: 'humidity',
+                 0x040: 'wind',      0x080: 'precip',   0x100: 'light/UV'}
+
+# Define status history length. Devices send a status message with every
+# one minute observation
+HISTORY_LENGTH = 1440
+
+# Latest status and status history keyed by serial number
+hubs        = {}
+devices     = {}
+history     = {}
+lock        = threading.Lock()
+health_file = None
+
+
+def parse_hub_status(message, config):
+
+    """ Parse hub_status UDP message. A warning is logged with the reset flags
+    when the hub has restarted
+
+    INPUTS:
+        message             hub_status UDP message
+        config              Console configuration object
+
+    OUTPUT:
+        hub                 hub_state of hub
+    """
+
+    hub = hub_state(message.get('serial_number'), message.get('timestamp'), message.get('firmware_revision'),
+                    message.get('uptime'), message.get('rssi'), message.get('reset_flags'))
+    previous = hubs.get(hub.serial_number)
+    store(hub)
+    if previous is not None and hub.uptime is not None and previous.uptime is not None and hub.uptime < previous.uptime:
+        Logger.warning(f'device_status: {system().log_time()} - Hub {hub.serial_number} restarted; reset flags {hub.reset_flags}')
+    record(config, 'hub_status', hub.serial_number, hub.timestamp, hub.firmware, hub.uptime, '', hub.rssi, '', '')
+    return hub
+
+
+def parse_device_status(message, config):
+
+    """ Parse device_status UDP message
+
+    INPUTS:
+        message             device_status UDP message
+        config              Console configuration object
+
+    OUTPUT:
+        device              device_state of device
+    """
+
+    device = device_state(message.get('serial_number'), message.get('hub_sn'), message.get('timestamp'),
+                          message.get('firmware_revision'), message.get('uptime'), message.get('voltage'),
+                          message.get('rssi'), message.get('hub_rssi'), message.get('sensor_status', 0))
+    store(device)
+    record(config, 'device_status', device.serial_number, device.timestamp, device.firmware, device.uptime,
+           device.voltage, device.rssi, device.hub_rssi, device.sensor_status)
+    return device
+
+
+def store(state):
+
+    """ Store the latest status of a hub or device. Status received from the
+    data process is stored in the user interface process in the same way
+
+    INPUTS:
+        state               hub_state or device_state
+    """
+
+    with lock:
+        if isinstance(state, hub_state):
+            hubs[state.serial_number] = state
+        else:
+            devices[state.serial_number] = state
+            if state.serial_number not in history:
+                history[state.serial_number] = deque(maxlen=HISTORY_LENGTH)
+            history[state.serial_number].append(state)
+
+
+def restore(values):
+
+    """ Convert a hub or device status received from the relay server as a
+    list back into a hub_state or device_state
+
+    INPUTS:
+        values              hub_state, device_state or list of their fields
+
+    OUTPUT:
+        state               hub_state or device_state
+    """
+
+    if isinstance(values, (hub_state, device_state)):
+        return values
+    if len(values) == len(hub_state._fields):
+        return hub_state(*values)
+    return device_state(*values)
+
+
+def uptime_text(uptime):
+
+    """ Format hub or device uptime for display
+
+    INPUTS:
+        uptime              Uptime                                          [s]
+
+    OUTPUT:
+        text                Uptime in days and hours, or hours and minutes
+    """
+
+    if uptime is None:
+        return '-'
+    days, remainder  = divmod(int(uptime), 86400)
+    hours, remainder = divmod(remainder, 3600)
+    if days:
+        return f'{days}d {hours}h'
+    return f'{hours}h {remainder // 60}m'
+
+
+def sensor_faults(sensor_status):
+
+    """ Return the sensors reported as failed in the device sensor status
+
+    INPUTS:
+        sensor_status       Device sensor status bits
+
+    OUTPUT:
+        faults              List of failed sensors
+    """
+
+    return [sensor for bit, sensor in SENSOR_FAULTS.items() if (sensor_status or 0) & bit]
+
+
+def observation_count(serial_number, period=86400):
+
+    """ Return the number of status messages received from a device during a
+    period, which is the number of observations the device has sent
+
+    INPUTS:
+        serial_number       Device serial number
+        period              Period in seconds
+
+    OUTPUT:
+        count               Number of status messages, or None if no status
+                            messages have been received from the device
+    """
+
+    with lock:
+        if serial_number not in history:
+            return None
+        start_time = wall_clock.time() - period
+        return sum(1 for device in history[serial_number] if (device.timestamp or 0) >= start_time)
+
+
+def record(config, message_type, *fields):
+
+    """ Append a status message to the health file
+
+    INPUTS:
+        config              Console configuration object
+        message_type        Status message type
+        fields              Status message fields
+    """
+
+    global health_file
+    path = config['System'].get('HealthFile', '')
+    if not path:
+        return
+    line = ','.join(['' if field is None else str(field) for field in (message_type, ) + fields])
+    with lock:
+        try:
+            if health_file is None or health_file.name != path:
+                if health_file is not None:
+                    health_file.close()
+                health_file = open(path, 'a')
+            health_file.write(line + '\n')
+            health_file.flush()
+        except (OSError, ValueError) as error:
+            health_file = None
+            Logger.warning(f'device_status: {system().log_time()} - Unable to record status: {error}')
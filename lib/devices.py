@@ -0,0 +1,125 @@
+""" Describes the devices configured for the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+A descriptor is built for each configured device when the station
+configuration is loaded or switched, and for the devices of each secondary
+station when its observation parser is created. Each descriptor holds the
+elevation of the device above sea level and the index of every field in the
+device's bucket_a (one minute) and bucket_e (one day) REST API observations,
+so that the derived variable functions look up a device once instead of
+comparing the device ID against the station configuration.
+"""
+
+# Import required system modules
+from collections import namedtuple
+
+# Device descriptor
+descriptor = namedtuple('descriptor', ['type', 'id', 'sn', 'height', 'elevation', 'bucket_a', 'bucket_e'])
+
+# Define configuration key prefix of each device type
+DEVICE_TYPES = {'tempest': 'Tempest', 'out_air': 'OutAir', 'in_air': 'InAir', 'sky': 'Sky'}
+
+# Define index of each field in bucket_a observations of each device type
+BUCKET_A = {'tempest': {'wind_avg': 2, 'wind_gust': 3, 'pressure': 6, 'temperature': 7,
+                        'radiation': 11, 'rain': 12, 'strike_count': 15},
+            'out_air': {'pressure': 1, 'temperature': 2, 'strike_count': 4},
+            'in_air':  {'pressure': 1, 'temperature': 2},
+            'sky':     {'rain': 3, 'wind_avg': 5, 'wind_gust': 6, 'radiation': 10}}
+
+# Define index of each field in bucket_e observations of each device type
+BUCKET_E = {'tempest': {'strike_count': 24, 'rain': 28},
+            'out_air': {'strike_count': 4},
+            'in_air':  {},
+            'sky':     {'rain': 3}}
+
+# Descriptors of configured devices keyed by device ID and serial number
+registry = {}
+
+
+def build(config):
+
+    """ Build descriptors for the devices in the station configuration
+
+    INPUTS:
+        config              Console configuration object
+
+    OUTPUT:
+        devices             Dictionary of descriptors keyed by device ID and
+                            serial number
+    """
+
+    devices = {}
+    for device_type, prefix in DEVICE_TYPES.items():
+        device_id = config['Station'].get(prefix + 'ID', '')
+        device_sn = config['Station'].get(prefix + 'SN', '')
+        if not device_id and not device_sn:
+            continue
+        height = config['Station'].get(prefix + 'Height', '0') or '0'
+        try:
+            elevation = float(config['Station'].get('Elevation', '')) + float(height)
+        except ValueError:
+            elevation = None
+        device = descriptor(device_type, device_id, device_sn, height, elevation,
+                            BUCKET_A[device_type], BUCKET_E[device_type])
+        for key in (device_id, device_sn):
+            if key:
+                devices[key] = device
+    return devices
+
+
+def configure(config):
+
+    """ Rebuild the device descriptors after the station configuration has
+    been loaded or switched
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    global registry
+    registry = build(config)
+
+
+def register(config):
+
+    """ Add the descriptors of the devices in a station configuration to the
+    descriptors of previously configured devices
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    registry.update(build(config))
+
+
+def lookup(device, config):
+
+    """ Return the descriptor of a device. Descriptors are added from the
+    station configuration if the device is not yet known
+
+    INPUTS:
+        device              Device ID or serial number
+        config              Console configuration object
+
+    OUTPUT:
+        descriptor          Device descriptor, or None if the device is not
+                            part of the station configuration
+    """
+
+    key = str(device)
+    if key not in registry:
+        register(config)
+    return registry.get(key)
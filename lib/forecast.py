@@ -19,7 +19,10 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 from lib.system import system
 from lib        import observation_format as observation
 from lib        import derived_variables  as derive
+from lib.request_api import weatherflow_api
 from lib        import properties
+from lib        import metrics
+from lib        import relay
 
 # Import required Kivy modules
 from kivy.network.urlrequest import UrlRequest
@@ -32,7 +35,9 @@ from datetime   import datetime, timedelta, time
 import time     as UNIX
 import certifi
 import bisect
+import json
 import pytz
+import os
 
 
 class forecast():
@@ -41,6 +46,16 @@ class forecast():
         self.app = App.get_running_app()
         self.met_data = properties.Met()
 
+        # Define forecast download variables and restore forecast stored by
+        # previous session
+        self.forecast_file = self.app.config['System'].get('ForecastFile', 'forecast.json')
+        self.fetch_time    = 0
+        self.etag          = None
+        self.hours         = []
+        self.days          = {}
+        self.next_change   = []
+        self.load_forecast()
+
     def reset_forecast(self):
 
         """ Reset the weather forecast displayed on screen to default values and
@@ -48,7 +63,9 @@ class forecast():
         """
 
         # Reset the forecast and schedule new forecast to be generated
-        self.met_data = properties.Met()
+        self.met_data   = properties.Met()
+        self.fetch_time = 0
+        self.etag       = None
         self.update_display()
         if hasattr(self.app, 'ForecastPanel'):
             for panel in getattr(self.app, 'ForecastPanel'):
@@ -58,21 +75,58 @@ class forecast():
     def fetch_forecast(self, *largs):
 
         """ Fetch the latest daily and hourly weather forecast data using the
-        WeatherFlow BetterForecast API
+        WeatherFlow BetterForecast API. Between downloads, the forecast for the
+        current hour is taken from the latest forecast without a download
         """
 
-        # Fetch latest hourly and daily forecast
+        # Advance the latest forecast to the current hour if a new forecast is
+        # not yet due
         if self.app.config['System']['rest_api'] == '1':
-            URL = 'https://swd.weatherflow.com/swd/rest/better_forecast?token={}&station_id={}'
+            if not self.download_due():
+                self.parse_forecast()
+                return
+
+            # Show stored forecast while the latest forecast is downloaded
+            if (self.met_data['Status'] == '--' and 'Response' in self.met_data
+                    and bisect.bisect(self.hours, int(UNIX.time())) < len(self.hours)):
+                self.parse_forecast()
+
+            # Fetch latest hourly and daily forecast. Only ask for the full
+            # forecast if it has changed since the last download
+            URL = weatherflow_api.rest_url(self.app.config) + '/better_forecast?token={}&station_id={}'
             URL = URL.format(self.app.config['Keys']['WeatherFlow'],
                              self.app.config['Station']['StationID'])
+            headers = {'If-None-Match': self.etag} if self.etag and 'Response' in self.met_data else {}
             UrlRequest(URL,
+                       req_headers=headers,
                        on_success=self.success_forecast,
+                       on_redirect=self.not_modified_forecast,
                        on_failure=self.fail_forecast,
                        on_error=self.fail_forecast,
                        timeout=int(self.app.config['System']['Timeout']),
                        ca_file=certifi.where())
 
+    def download_due(self):
+
+        """ Check whether a new forecast should be downloaded. A new forecast
+        is due when there is no forecast, the latest forecast is older than
+        [System] ForecastInterval, or it covers less than the next day
+
+        OUTPUT:
+            due                 True if a new forecast should be downloaded
+        """
+
+        try:
+            interval = float(self.app.config['System'].get('ForecastInterval', '3')) * 3600
+        except ValueError:
+            interval = 3600
+        now = UNIX.time()
+        if 'Response' not in self.met_data or not self.hours:
+            return True
+        if now - self.fetch_time >= interval - 60:
+            return True
+        return self.hours[-1] - now < 24 * 3600
+
     def schedule_forecast(self, dt):
 
         """ Schedule new Forecast to be fetched from the WeatherFlow
@@ -100,10 +154,104 @@ class forecast():
 
         """
 
-        # Parse the latest daily and hourly weather forecast data
+        # Index and store the latest daily and hourly weather forecast data
+        metrics.inc('forecast_updates_total', result='success')
         self.met_data['Response'] = Response
+        self.fetch_time = UNIX.time()
+        self.etag = next((value for key, value in (Request.resp_headers or {}).items() if key.lower() == 'etag'), None)
+        self.index_forecast()
+        self.save_forecast()
+
+        # Parse the latest daily and hourly weather forecast data
         self.parse_forecast()
 
+    def not_modified_forecast(self, Request, Response):
+
+        """ Forecast from the WeatherFlow BetterForecast API is unchanged since
+        the last download. Parse the existing forecast
+
+        INPUTS:
+            Request             UrlRequest object
+            Response            UrlRequest response
+
+        """
+
+        # Any redirect other than "Not Modified" is treated as a failure
+        if Request.resp_status != 304:
+            self.fail_forecast()
+            return
+
+        # Parse the existing daily and hourly weather forecast data
+        metrics.inc('forecast_updates_total', result='not_modified')
+        self.fetch_time = UNIX.time()
+        self.save_forecast()
+        self.parse_forecast()
+
+    def index_forecast(self):
+
+        """ Index the hourly and daily forecasts of the latest forecast. For
+        each hour, the index of the next hour with different conditions is
+        found once, so the forecast can be advanced to the next hour without
+        scanning the hourly forecasts again
+        """
+
+        # Extract hourly and daily forecasts
+        try:
+            hourlyForecasts = self.met_data['Response']['forecast']['hourly']
+            dailyForecasts  = self.met_data['Response']['forecast']['daily']
+            self.hours = [forecast['time'] for forecast in hourlyForecasts]
+            self.days  = {forecast['day_num']: forecast for forecast in dailyForecasts}
+            conditions = [forecast['conditions'] for forecast in hourlyForecasts]
+        except (KeyError, TypeError):
+            self.hours, self.days, self.next_change = [], {}, []
+            return
+
+        # Find index of next change in expected conditions for each hour
+        self.next_change = [len(conditions) - 1] * len(conditions)
+        for ii in range(len(conditions) - 2, -1, -1):
+            if conditions[ii + 1] != conditions[ii]:
+                self.next_change[ii] = ii + 1
+            else:
+                self.next_change[ii] = self.next_change[ii + 1]
+
+    def save_forecast(self):
+
+        """ Save the latest forecast to the stored forecast file
+        """
+
+        if not self.forecast_file:
+            return
+        state = {'station':  self.app.config['Station']['StationID'],
+                 'time':     self.fetch_time,
+                 'etag':     self.etag,
+                 'forecast': self.met_data['Response']}
+        try:
+            with open(self.forecast_file + '.tmp', 'w') as forecast_file:
+                json.dump(state, forecast_file, separators=(',', ':'))
+            os.replace(self.forecast_file + '.tmp', self.forecast_file)
+        except (OSError, TypeError, ValueError) as error:
+            Logger.warning(f'forecast: {system().log_time()} - Unable to save forecast: {error}')
+
+    def load_forecast(self):
+
+        """ Restore the forecast saved by the previous session if it was saved
+        for the current station
+        """
+
+        if not self.forecast_file:
+            return
+        try:
+            with open(self.forecast_file) as forecast_file:
+                state = json.load(forecast_file)
+            if state['station'] != self.app.config['Station']['StationID']:
+                return
+            self.met_data['Response'] = state['forecast']
+            self.fetch_time           = state['time']
+            self.etag                 = state['etag']
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self.index_forecast()
+
     def fail_forecast(self, *largs):
 
         """ Failed to fetch forecast from the WeatherFlow BetterForecast API.
@@ -117,6 +265,7 @@ class forecast():
 
         # Set forecast variables to blank and indicate to user that forecast is
         # unavailable
+        metrics.inc('forecast_updates_total', result='failure')
         self.met_data['Valid']        = '--'
         self.met_data['Temp']         = '--'
         self.met_data['highTemp']     = '--'
@@ -177,25 +326,19 @@ class forecast():
 
         # Extract all forecast data from WeatherFlow JSON object
         try:
-            # Extract all hourly and daily forecasts
+            # Retrieve forecast for the current hour from the indexed hourly
+            # forecasts
             hourlyForecasts  = (Forecast['forecast']['hourly'])
-            dailyForecasts   = (Forecast['forecast']['daily'])
-
-            # Extract 'valid from' time of all available hourly forecasts and
-            # retrieve forecast for the current hour
-            Hours          = list(forecast['time'] for forecast in hourlyForecasts)
-            hoursInd       = bisect.bisect(Hours, int(UNIX.time()))
-            hourlyCurrent  = hourlyForecasts[hoursInd]
-            hourlyLocalDay = hourlyCurrent['local_day']
+            hoursInd         = bisect.bisect(self.hours, int(UNIX.time()))
+            hourlyCurrent    = hourlyForecasts[hoursInd]
+            hourlyLocalDay   = hourlyCurrent['local_day']
 
             # Extract 'Valid' until time of forecast for current hour
-            Valid = Hours[bisect.bisect(Hours, int(UNIX.time()))]
+            Valid = self.hours[hoursInd]
             Valid = datetime.fromtimestamp(Valid, pytz.utc).astimezone(Tz)
 
-            # Extract 'day_start_local' time of all available daily forecasts and
-            # retrieve forecast for the current day
-            dailyDayNum  = list(forecast['day_num'] for forecast in dailyForecasts)
-            dailyCurrent = dailyForecasts[dailyDayNum.index(hourlyLocalDay)]
+            # Retrieve forecast for the current day
+            dailyCurrent = self.days[hourlyLocalDay]
 
             # Extract weather variables from current hourly forecast
             Temp         = [hourlyCurrent['air_temperature'], 'c']
@@ -227,14 +370,8 @@ class forecast():
             lowTemp   = [dailyCurrent['air_temp_low'], 'c']
             precipDay = [dailyCurrent['precip_probability'], '%']
 
-            # Extract list of expected conditions and find time when expected conditions
-            # will change
-            conditionList = list(forecast['conditions'] for forecast in hourlyForecasts[hoursInd:])
-            try:
-                Ind = next(i for i, C in enumerate(conditionList) if C != hourlyCurrent['conditions'])
-            except StopIteration:
-                Ind = len(conditionList) - 1
-            Time = datetime.fromtimestamp(Hours[Ind], pytz.utc).astimezone(Tz)
+            # Find time when expected conditions will change
+            Time = datetime.fromtimestamp(self.hours[self.next_change[hoursInd]], pytz.utc).astimezone(Tz)
             if Time.date() == Now.date():
                 Conditions = hourlyCurrent['conditions'].capitalize() + ' until ' + datetime.strftime(Time, TimeFormat) + ' today'
             elif Time.date() == Now.date() + timedelta(days=1):
@@ -303,9 +440,23 @@ class forecast():
         prevent console crashing
         """
 
+        # Extract display variables. The raw forecast response is kept only by
+        # the forecast object
+        met_display = {Key: Value for Key, Value in self.met_data.items() if Key != 'Response'}
+
+        # Rebroadcast forecast variables to consoles subscribed to the relay
+        # server
+        relay.publish('Met', met_display)
+
+        # Forward forecast variables to the user interface process when running
+        # as a separate data process
+        if hasattr(self.app, 'send_display'):
+            self.app.send_display('Met', met_display)
+            return
+
         # Update display values with new derived observations
         reference_error = False
-        for Key, Value in list(self.met_data.items()):
+        for Key, Value in met_display.items():
             try:
                 self.app.CurrentConditions.Met[Key] = Value
             except ReferenceError:
@@ -0,0 +1,332 @@
+""" Decodes and routes the UDP and Websocket messages received by the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations to
+the observation parser.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Each router holds a dispatch table keyed by message type and device serial
+number (UDP) or device ID (Websocket), compiled from the station configuration
+when the connection client starts and when stations are switched. Messages of
+ignored types are discarded before they are decoded. orjson is used to decode
+messages when it is installed.
+
+When the UDP and Websocket clients run together, they share a recent_keys
+cache so that each observation is passed to the observation parser only by
+the client that receives it first.
+"""
+
+# Import required library modules
+from lib.system     import system
+from lib            import tracing
+from lib            import metrics
+
+# Import required Kivy modules
+from kivy.logger    import Logger
+
+# Import required system modules
+from collections    import namedtuple, OrderedDict, deque
+import threading
+import json
+
+# Use orjson to decode messages when available
+try:
+    import orjson
+    loads      = orjson.loads
+    loads_view = orjson.loads
+except ImportError:
+    loads = json.loads
+
+    def loads_view(view):
+        return json.loads(bytes(view))
+
+# Define route to observation parser. Threaded routes are parsed in a
+# dedicated thread for each observation type. Routes to secondary stations
+# name the station whose parser handles the message
+route = namedtuple('route', ['ob_type', 'handler', 'threaded', 'station'], defaults=[None])
+
+# Guards the queues of messages waiting for a busy parser thread
+queue_lock = threading.Lock()
+
+# Define routes of each message type, and the station configuration keys of the
+# devices that send them. Messages routed from device None are accepted from
+# any device
+ROUTES = {'obs_st':     [('Tempest', route('obs_st',      'parse_obs_st',      True))],
+          'obs_sky':    [('Sky',     route('obs_sky',     'parse_obs_sky',     True))],
+          'obs_air':    [('OutAir',  route('obs_out_air', 'parse_obs_out_air', True)),
+                         ('InAir',   route('obs_in_air',  'parse_obs_in_air',  True))],
+          'rapid_wind': [('Tempest', route('rapid_wind',  'parse_rapid_wind',  False)),
+                         ('Sky',     route('rapid_wind',  'parse_rapid_wind',  False))],
+          'evt_strike': [('Tempest', route('evt_strike',  'parse_evt_strike',  False)),
+                         ('OutAir',  route('evt_strike',  'parse_evt_strike',  False))],
+          'device_status': [(device, route('device_status', 'parse_device_status', False))
+                            for device in ('Tempest', 'Sky', 'OutAir', 'InAir')],
+          'hub_status': [(None, route('hub_status', 'parse_hub_status', False))]}
+
+
+# ==============================================================================
+# DEFINE 'message_router' CLASS
+# ==============================================================================
+class message_router():
+
+    """ Dispatch table for the messages received by a connection client
+
+    INPUTS:
+        client              Client name used in log messages
+        device_key          Message field identifying the device
+                            ('serial_number' or 'device_id')
+        config_suffix       Station configuration key suffix of the device
+                            identifier ('SN' or 'ID')
+        ignored             Message types that are discarded
+    """
+
+    def __init__(self, client, device_key, config_suffix, ignored):
+        self.client        = client
+        self.device_key    = device_key
+        self.config_suffix = config_suffix
+        self.ignored       = frozenset(ignored)
+        self.markers       = [(('"type":"' + ob_type + '"').encode(), ob_type) for ob_type in ignored]
+        self.routes        = {}
+        self.system        = system()
+
+    def compile(self, config, stations=None):
+
+        """ Compile the dispatch table from the configuration of the primary
+        station and any secondary stations. Devices of the primary station take
+        precedence
+
+        INPUTS:
+            config              Console configuration object
+            stations            Dictionary of secondary station parsers keyed
+                                by station name
+        """
+
+        routes = {}
+        station_configs = [(None, config)]
+        station_configs += [(name, parser.config) for name, parser in (stations or {}).items()]
+        for station, station_config in station_configs:
+            for message_type, devices in ROUTES.items():
+                for device, message_route in devices:
+                    if device is None:
+                        if station is None:
+                            routes[(message_type, None)] = message_route
+                        continue
+                    device_id = station_config['Station'].get(device + self.config_suffix, '')
+                    if device_id and (message_type, device_id) not in routes:
+                        routes[(message_type, device_id)] = message_route._replace(station=station)
+        self.routes = routes
+
+    def ignored_type(self, data, size=None):
+
+        """ Return the type of a raw message if it is ignored, without decoding
+        the message
+
+        INPUTS:
+            data                Raw message
+            size                Length of raw message in data buffer
+
+        OUTPUT:
+            ob_type             Ignored message type or None
+        """
+
+        if isinstance(data, str):
+            data = data.encode()
+        for marker, ob_type in self.markers:
+            if data.find(marker, 0, size) >= 0:
+                return ob_type
+        return None
+
+    def route(self, message):
+
+        """ Return the route of a decoded message
+
+        INPUTS:
+            message             Decoded message
+
+        OUTPUT:
+            route               route tuple, or None if the message is
+                                ignored or from a device that is not part of
+                                the station
+        """
+
+        if not message:
+            return None
+        message_type = message.get('type')
+        if message_type is None:
+            Logger.warning(f'{self.client}: {self.system.log_time()} - Missing message type: {json.dumps(message)}')
+            return None
+        if message_type in self.ignored:
+            return None
+        if message_type not in ROUTES:
+            Logger.warning(f'{self.client}: {self.system.log_time()} - Unknown message type: {json.dumps(message)}')
+            return None
+        if self.device_key not in message:
+            Logger.warning(f'{self.client}: {self.system.log_time()} - Missing device ID: {json.dumps(message)}')
+            return None
+        message_route = self.routes.get((message_type, str(message[self.device_key])))
+        if message_route is None:
+            message_route = self.routes.get((message_type, None))
+        return message_route
+
+
+# ==============================================================================
+# DEFINE 'recent_keys' CLASS
+# ==============================================================================
+class recent_keys():
+
+    """ Least recently used cache of the observations passed to the
+    observation parser
+
+    INPUTS:
+        size                Number of observations remembered
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.keys = OrderedDict()
+
+    def seen(self, key):
+
+        """ Return True if an observation has already been seen, otherwise
+        remember the observation
+
+        INPUTS:
+            key                 Observation key
+
+        OUTPUT:
+            seen                True if observation has already been seen
+        """
+
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            return True
+        self.keys[key] = None
+        if len(self.keys) > self.size:
+            self.keys.popitem(last=False)
+        return False
+
+
+def observation_key(message_route, message):
+
+    """ Return the key identifying an observation independently of the client
+    that received it
+
+    INPUTS:
+        message_route       route tuple
+        message             Decoded message
+
+    OUTPUT:
+        key                 Tuple of route key and observation time, or None if
+                            the message holds no observation time
+    """
+
+    try:
+        if 'obs' in message:
+            ob_time = message['obs'][0][0]
+        elif 'ob' in message:
+            ob_time = message['ob'][0]
+        elif 'evt' in message:
+            ob_time = message['evt'][0]
+        else:
+            return None
+    except (IndexError, KeyError, TypeError):
+        return None
+    return (route_key(message_route), ob_time)
+
+
+def route_key(message_route):
+
+    """ Return the key identifying the observation type and station of a
+    route
+
+    INPUTS:
+        message_route       route tuple
+
+    OUTPUT:
+        key                 Observation type, prefixed by the station name for
+                            secondary stations
+    """
+
+    if message_route.station is None:
+        return message_route.ob_type
+    return message_route.station + ':' + message_route.ob_type
+
+
+async def dispatch(client, message_route, message, trace):
+
+    """ Pass a message to the observation parser of its station. Threaded
+    routes are parsed in order by one thread for each observation type from
+    each station, and messages received while the thread is busy are queued
+    for it, so that slow parsing never holds up the messages behind it.
+    Observations already received by another client are discarded
+
+    INPUTS:
+        client              Connection client
+        message_route       route tuple
+        message             Decoded message
+        trace               message_trace object or None
+    """
+
+    key = observation_key(message_route, message) if client.dedupe is not None else None
+    if key is not None and client.dedupe.seen(key):
+        metrics.inc('messages_duplicate_total', client=client.router.client.lower(), type=message_route.ob_type)
+        return
+    if message_route.station is None:
+        parser = client.app.obsParser
+    else:
+        parser = client.stations[message_route.station]
+    if not message_route.threaded:
+        if message_route.station is None:
+            tracing.attach(message_route.ob_type, trace)
+        getattr(parser, message_route.handler)(message, parser.config)
+        return
+    thread_key = route_key(message_route)
+    pending = (parser, message_route, message, trace, client.router.client.lower())
+    with queue_lock:
+        if thread_key in client.queue_list:
+            client.queue_list[thread_key].append(pending)
+            metrics.inc('messages_pending', client=pending[4])
+            return
+        client.queue_list[thread_key] = deque()
+    client.thread_list[thread_key] = threading.Thread(target=parse_queue,
+                                                      args=(client.queue_list, thread_key, pending, ),
+                                                      name=thread_key)
+    client.thread_list[thread_key].start()
+
+
+def parse_queue(queue_list, thread_key, pending):
+
+    """ Parse a message and then each message queued behind it for the same
+    observation type and station
+
+    INPUTS:
+        queue_list          Dictionary of message queues keyed by route key
+        thread_key          Route key of parser thread
+        pending             First message to parse
+    """
+
+    while pending is not None:
+        parser, message_route, message, trace, client = pending
+        if message_route.station is None:
+            tracing.attach(message_route.ob_type, trace)
+        try:
+            getattr(parser, message_route.handler)(message, parser.config)
+        except Exception as error:
+            Logger.exception(f'message_router: {system().log_time()} - Unable to parse {thread_key}: {error}')
+        with queue_lock:
+            if queue_list[thread_key]:
+                pending = queue_list[thread_key].popleft()
+                metrics.inc('messages_pending', -1, client=pending[4])
+            else:
+                del queue_list[thread_key]
+                pending = None
@@ -0,0 +1,244 @@
+""" Exposes observation pipeline metrics of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations in Prometheus text format.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The metrics endpoint is enabled by setting [System] MetricsPort, and is bound
+to [System] MetricsHost (127.0.0.1 by default; 0.0.0.0 to expose it on the
+LAN). Metrics are served from a dedicated HTTP server thread at /metrics.
+Recording a metric only updates a dictionary under a lock and does nothing when
+the endpoint is disabled, and scraping never touches the Kivy main thread.
+"""
+
+# Import required Kivy modules
+from kivy.logger    import Logger
+
+# Import required system modules
+from http.server    import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+import os
+
+# Define metrics variables
+ENABLED = False
+PREFIX  = 'wfpiconsole_'
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS = {
+    'messages_received_total':          ('counter',   'Messages received by the connection client'),
+    'message_errors_total':             ('counter',   'Received messages that could not be decoded'),
+    'messages_duplicate_total':         ('counter',   'Observations discarded as already received by another client'),
+    'messages_pending':                 ('gauge',     'Received messages queued for a busy parser thread'),
+    'connection_up':                    ('gauge',     'Whether the connection client is connected'),
+    'connection_attempts_total':        ('counter',   'Connection attempts made by the connection client'),
+    'watchdog_triggers_total':          ('counter',   'Reconnections triggered by the message watchdog'),
+    'messages_parsed_total':            ('counter',   'Messages parsed and sent to the display'),
+    'backfill_observations_total':      ('counter',   'Missed observations replayed after a gap in messages'),
+    'parse_seconds':                    ('histogram', 'Time from parser dispatch to display update'),
+    'rest_requests_total':              ('counter',   'WeatherFlow REST API requests by endpoint and result'),
+    'rest_request_seconds':             ('histogram', 'WeatherFlow REST API request latency'),
+    'forecast_updates_total':           ('counter',   'WeatherFlow forecast downloads by result'),
+    'sager_forecasts_total':            ('counter',   'Sager Weathercaster forecasts by result'),
+    'station_requests_total':           ('counter',   'Station status requests by request and result'),
+    'relay_subscribers':                ('gauge',     'Consoles subscribed to the display relay server'),
+    'parser_threads_active':            ('gauge',     'Observation parser threads currently running'),
+    'process_threads':                  ('gauge',     'Threads running in the console process'),
+    'process_resident_memory_bytes':    ('gauge',     'Resident memory of the console process'),
+    'process_cpu_seconds_total':        ('counter',   'CPU time used by the console process'),
+    'process_start_time_seconds':       ('gauge',     'Start time of the console process since the epoch'),
+}
+values      = {}
+histograms  = {}
+lock        = threading.Lock()
+start_time  = time.time()
+server      = None
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+
+    """ Increment a counter or gauge
+
+    INPUTS:
+        name                Metric name without prefix
+        value               Increment
+        labels              Metric labels
+    """
+
+    if not ENABLED:
+        return
+    key = (name, labels_key(labels))
+    with lock:
+        values[key] = values.get(key, 0) + value
+
+
+def gauge(name, value, **labels):
+
+    """ Set the value of a gauge
+
+    INPUTS:
+        name                Metric name without prefix
+        value               Gauge value
+        labels              Metric labels
+    """
+
+    if not ENABLED:
+        return
+    with lock:
+        values[(name, labels_key(labels))] = value
+
+
+def observe(name, seconds, **labels):
+
+    """ Record a duration in a histogram
+
+    INPUTS:
+        name                Metric name without prefix
+        seconds             Duration in seconds
+        labels              Metric labels
+    """
+
+    if not ENABLED:
+        return
+    key = (name, labels_key(labels))
+    with lock:
+        if key not in histograms:
+            histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+        buckets = histograms[key]
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                buckets[0][index] += 1
+        buckets[1] += seconds
+        buckets[2] += 1
+
+
+def collect_process():
+
+    """ Collect process and thread metrics at scrape time
+    """
+
+    threads = threading.enumerate()
+    gauge('process_threads', len(threads))
+    gauge('parser_threads_active', sum(1 for thread in threads if thread.name.startswith('obs_')))
+    gauge('process_cpu_seconds_total', time.process_time())
+    gauge('process_start_time_seconds', start_time)
+    try:
+        with open('/proc/self/statm') as statm:
+            gauge('process_resident_memory_bytes', int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'))
+    except (OSError, ValueError):
+        pass
+
+
+def format_labels(labels, extra=()):
+    labels = list(labels) + list(extra)
+    if not labels:
+        return ''
+    text = ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for key, value in labels)
+    return '{' + text + '}'
+
+
+def render():
+
+    """ Render all metrics in Prometheus text exposition format
+
+    OUTPUT:
+        text                Metrics text
+    """
+
+    collect_process()
+    with lock:
+        samples = sorted(values.items())
+        buckets = sorted((key, [list(value[0]), value[1], value[2]]) for key, value in histograms.items())
+    lines = []
+    described = []
+    for (name, labels), value in samples:
+        if name not in described:
+            described.append(name)
+            lines.append(f'# HELP {PREFIX}{name} {METRICS[name][1]}')
+            lines.append(f'# TYPE {PREFIX}{name} {METRICS[name][0]}')
+        lines.append(f'{PREFIX}{name}{format_labels(labels)} {value}')
+    for (name, labels), (counts, total, count) in buckets:
+        if name not in described:
+            described.append(name)
+            lines.append(f'# HELP {PREFIX}{name} {METRICS[name][1]}')
+            lines.append(f'# TYPE {PREFIX}{name} histogram')
+        for bound, bucket in zip(BUCKETS, counts):
+            lines.append(f'{PREFIX}{name}_bucket{format_labels(labels, [("le", bound)])} {bucket}')
+        lines.append(f'{PREFIX}{name}_bucket{format_labels(labels, [("le", "+Inf")])} {count}')
+        lines.append(f'{PREFIX}{name}_sum{format_labels(labels)} {total}')
+        lines.append(f'{PREFIX}{name}_count{format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+# ==============================================================================
+# DEFINE 'metrics_handler' CLASS
+# ==============================================================================
+class metrics_handler(BaseHTTPRequestHandler):
+
+    """ Serves the metrics text at /metrics
+    """
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ['/', '/metrics']:
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(config):
+
+    """ Start the metrics endpoint if enabled in the console configuration
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    global ENABLED, server
+    port = config['System'].get('MetricsPort', '')
+    if server is not None or port in ['', '0']:
+        return
+    host = config['System'].get('MetricsHost', '127.0.0.1') or '127.0.0.1'
+    try:
+        server = ThreadingHTTPServer((host, int(port)), metrics_handler)
+    except (OSError, ValueError) as error:
+        Logger.warning(f'Metrics: Unable to start metrics endpoint on {host}:{port}: {error}')
+        return
+    server.daemon_threads = True
+    ENABLED = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    Logger.info(f'Metrics: Serving metrics at http://{host}:{port}/metrics')
+
+
+def stop():
+
+    """ Stop the metrics endpoint
+    """
+
+    global ENABLED, server
+    if server is not None:
+        ENABLED = False
+        server.shutdown()
+        server.server_close()
+        server = None
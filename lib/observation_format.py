@@ -26,15 +26,15 @@ def units(Obs, Unit):
     """ Sets the required observation units
 
     INPUTS:
-        Obs             Observations with current units
+        Obs             Observation record or list with current units
         Unit            Required output unit
 
     OUTPUT:
-        cObs            Observation converted into required unit
+        cObs            New list with observation converted into required unit
     """
 
     # Convert temperature observations
-    cObs = Obs[:]
+    cObs = list(Obs)
     if Unit in ['f', 'c']:
         for ii, T in enumerate(Obs):
             if T == 'c':
@@ -195,7 +195,8 @@ def format(Obs, obType, config=[]):
     """ Formats the observation for display on the console
 
     INPUTS:
-        Obs             Observations with units
+        Obs             Observation list with units, as returned by units().
+                        The list is formatted in place
         obType            Observation type
 
     OUTPUT:
@@ -207,7 +208,7 @@ def format(Obs, obType, config=[]):
         obType = [obType]
 
     # Format temperature observations
-    cObs = Obs[:]
+    cObs = Obs
     for Type in obType:
         if Type == 'Temp':
             for ii, T in enumerate(Obs):
@@ -16,68 +16,129 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Import required library modules
-from lib.request_api import weatherflow_api
-from lib.system      import system
-from lib             import derived_variables  as derive
-from lib             import observation_format as observation
-from lib             import properties
+from lib.request_api    import weatherflow_api
+from lib.system         import system
+from lib.derived_engine import derived_engine
+from lib                import wall_clock
+from lib                import devices
+from lib                import device_status
+from lib                import records
+from lib.records        import Ob, Extreme, Average, Gust, PeakSun, Trend, Reading, Labelled, FeelsLike
+from lib.records        import Frequency, RainRate, Direction, Beaufort, UVIndex, Accumulation
+from lib                import tracing
+from lib                import metrics
+from lib                import relay
+from lib                import properties
 
 # Import required Kivy modules
 from kivy.logger  import Logger
-from kivy.clock   import mainthread
+from kivy.clock   import Clock
 from kivy.app     import App
 
+# Import required system modules
+from datetime     import datetime
+import threading
+import json
+import time
+import pytz
+import os
+
 # Define empty deviceObs dictionary
-device_obs = {'obTime':       [None, 's'],                'pressure':     [None, 'mb'],              'outTemp':      [None, 'c'],
-              'inTemp':       [None, 'c'],                'humidity':     [None, '%'],               'windSpd':      [None, 'mps'],
-              'windGust':     [None, 'mps'],              'windDir':      [None, 'degrees'],         'rapidWindSpd': [None, 'mps'],
-              'rapidWindDir': [None, 'degrees'],          'uvIndex':      [None, 'index'],           'radiation':    [None, 'Wm2'],
-              'minuteRain':   [None, 'mm'],               'dailyRain':    [None, 'mm'],              'strikeMinute': [None, 'count'],
-              'strikeTime':   [None, 's'],                'strikeDist':   [None, 'km'],              'strike3hr':    [None, 'count'],
+device_obs = {'obTime':       Ob(None, 's'),              'pressure':     Ob(None, 'mb'),            'outTemp':      Ob(None, 'c'),
+              'inTemp':       Ob(None, 'c'),              'humidity':     Ob(None, '%'),             'windSpd':      Ob(None, 'mps'),
+              'windGust':     Ob(None, 'mps'),            'windDir':      Ob(None, 'degrees'),       'rapidWindSpd': Ob(None, 'mps'),
+              'rapidWindDir': Ob(None, 'degrees'),        'uvIndex':      Ob(None, 'index'),         'radiation':    Ob(None, 'Wm2'),
+              'minuteRain':   Ob(None, 'mm'),             'dailyRain':    Ob(None, 'mm'),            'strikeMinute': Ob(None, 'count'),
+              'strikeTime':   Ob(None, 's'),              'strikeDist':   Ob(None, 'km'),            'strike3hr':    Ob(None, 'count'),
               }
 
 # Define empty deriveObs dictionary
-derive_obs = {'dewPoint':     [None, 'c'],                  'feelsLike':    [None, 'c', '-', '-'],        'outTempMax':   [None, 'c', '-'],
-              'outTempMin':   [None, 'c', '-'],             'outTempDiff':  [None, 'dc', '-'],            'outTempTrend': [None, 'c/hr', 'c8c8c8ff'],
-              'inTempMax':    [None, 'c', '-'],             'inTempMin':    [None, 'c', '-'],             'SLP':          [None, 'mb', None],
-              'SLPTrend':     [None, 'mb/hr', '-', '-'],    'SLPMin':       [None, 'mb', '-'],            'SLPMax':       [None, 'mb', '-'],
-              'windSpd':      [None, 'mps', '-', '-', '-'], 'windAvg':      [None, 'mps'],                'gustMax':      [None, 'mps'],
-              'windDir':      [None, 'degrees', '-', '-'],  'rapidWindDir': [None, 'degrees', '-', '-'],  'rainRate':     [None, 'mm/hr', '-'],
-              'uvIndex':      [None, 'index'],              'peakSun':      [None, 'hrs', '-'],           'strikeDeltaT': [None, 's', None],
-              'strikeFreq':   [None, '/min', None, '/min'],
-              'strikeCount':  {'today': [None, 'count'],
-                               'month': [None, 'count'],
-                               'year':  [None, 'count']
+derive_obs = {'dewPoint':     Ob(None, 'c'),                'feelsLike':    FeelsLike(None, 'c'),         'outTempMax':   Extreme(None, 'c'),
+              'outTempMin':   Extreme(None, 'c'),           'outTempDiff':  Labelled(None, 'dc'),         'outTempTrend': Labelled(None, 'c/hr', 'c8c8c8ff'),
+              'inTempMax':    Extreme(None, 'c'),           'inTempMin':    Extreme(None, 'c'),           'SLP':          Reading(None, 'mb'),
+              'SLPTrend':     Trend(None, 'mb/hr'),         'SLPMin':       Extreme(None, 'mb'),          'SLPMax':       Extreme(None, 'mb'),
+              'windSpd':      Beaufort(None, 'mps'),        'windAvg':      Average(None, 'mps'),         'gustMax':      Gust(None, 'mps'),
+              'windDir':      Direction(None, 'degrees'),   'rapidWindDir': Direction(None, 'degrees'),   'rainRate':     RainRate(None, 'mm/hr'),
+              'uvIndex':      UVIndex(None, 'index'),       'peakSun':      PeakSun(None, 'hrs'),         'strikeDeltaT': Reading(None, 's'),
+              'strikeFreq':   Frequency(None, '/min'),
+              'strikeCount':  {'today': Accumulation(None, 'count'),
+                               'month': Accumulation(None, 'count'),
+                               'year':  Accumulation(None, 'count')
                                },
-              'rainAccum':    {'today':     [None, 'mm'],
-                               'yesterday': [None, 'mm'],
-                               'month':     [None, 'mm'],
-                               'year':      [None, 'mm']
+              'rainAccum':    {'today':     Accumulation(None, 'mm'),
+                               'yesterday': Accumulation(None, 'mm'),
+                               'month':     Accumulation(None, 'mm'),
+                               'year':      Accumulation(None, 'mm')
                                }
               }
 
+# Define station configuration key prefix, parser and REST API flag index of
+# each observation type that is backfilled after a gap in messages
+backfill_obs = {'obs_st':      ('Tempest', 'parse_obs_st',      0),
+                'obs_sky':     ('Sky',     'parse_obs_sky',     1),
+                'obs_out_air': ('OutAir',  'parse_obs_out_air', 2),
+                'obs_in_air':  ('InAir',   'parse_obs_in_air',  3)}
+
+# Define derived observations that carry running daily state and are retained
+# across console restarts
+checkpoint_obs = ('outTempMax', 'outTempMin', 'inTempMax', 'inTempMin', 'SLPMax', 'SLPMin',
+                  'windAvg', 'gustMax', 'peakSun', 'rainAccum', 'strikeCount')
+
 
 # =============================================================================
 # DEFINE 'obsParser' CLASS
 # =============================================================================
 class obs_parser():
 
-    def __init__(self):
+    def __init__(self, config=None):
 
         # Define instance variables
         self.display_obs = properties.Obs()
         self.api_data    = {}
         self.transmit    = 1
         self.flag_api    = [1, 1, 1, 1]
+        self.parse_start = {}
+        self.engine      = derived_engine()
 
-        # Create reference to app object
+        # Create reference to app object. The parser of the primary station
+        # uses the app configuration and is registered with the app
         self.app = App.get_running_app()
-        self.app.obsParser = self
+        if config is None:
+            config = self.app.config
+            self.app.obsParser = self
+        self.config = config
 
         # Define device and derived observations dictionary
         self.device_obs = device_obs.copy()
         self.derive_obs = derive_obs.copy()
 
+        # Add descriptors of the configured devices
+        devices.register(self.config)
+
+        # Define backfill variables. Gaps longer than backfill_limit force all
+        # REST API data to be reloaded instead
+        self.last_ob_time   = {}
+        self.backfilling    = set()
+        self.backfill_gap   = 180
+        self.backfill_limit = 21600
+
+        # Define derived observations checkpoint variables and restore derived
+        # observations saved by previous session
+        self.checkpoint_file     = self.checkpoint_path(self.config)
+        self.checkpoint_interval = 300
+        self.checkpoint_time     = time.time()
+        self.checkpoint_lock     = threading.Lock()
+        self.load_derived_state(self.config)
+
+        # Define display update variables. Display updates requested during a
+        # frame are applied together at the start of the next frame
+        self.display_types   = []
+        self.display_lock    = threading.Lock()
+        self.display_trigger = Clock.create_trigger(self.flush_display)
+
+        # Enable message latency tracing if required
+        tracing.configure(self.config)
+
     def parse_obs_st(self, message, config):
 
         """ Parse obs_st Websocket messages from TEMPEST module
@@ -87,17 +148,26 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('obs_st', 'dispatch')
+        self.parse_start['obs_st'] = time.perf_counter()
+
         # Extract latest TEMPEST Websocket JSON
         if 'obs' in message:
             latest_ob = message['obs'][0]
         else:
             return
 
-        # Extract TEMPEST device_id. Initialise API data dictionary
+        # Extract TEMPEST device_id
         if 'device_id' in message:
             device_id = message['device_id']
         elif 'serial_number' in message:
             device_id = message['serial_number']
+
+        # Backfill TEMPEST observations missed since the previous message
+        self.backfill(message, 'obs_st', latest_ob[0], config)
+
+        # Initialise API data dictionary
         if config['System']['rest_api'] == '1' and config['Station']['TempestID']:
             api_device_id = config['Station']['TempestID']
             self.api_data[device_id] = {'flagAPI': self.flag_api[0]}
@@ -108,26 +178,26 @@ class obs_parser():
                 return
 
         # Extract required observations from latest TEMPEST Websocket JSON
-        self.device_obs['obTime']       = [latest_ob[0],  's']
-        self.device_obs['windSpd']      = [latest_ob[2],  'mps']
-        self.device_obs['windGust']     = [latest_ob[3],  'mps']
-        self.device_obs['windDir']      = [latest_ob[4],  'degrees']
-        self.device_obs['pressure']     = [latest_ob[6],  'mb']
-        self.device_obs['outTemp']      = [latest_ob[7],  'c']
-        self.device_obs['humidity']     = [latest_ob[8],  '%']
-        self.device_obs['uvIndex']      = [latest_ob[10], 'index']
-        self.device_obs['radiation']    = [latest_ob[11], 'Wm2']
-        self.device_obs['minuteRain']   = [latest_ob[12], 'mm']
-        self.device_obs['strikeMinute'] = [latest_ob[15], 'count']
+        self.device_obs['obTime']       = Ob(latest_ob[0],  's')
+        self.device_obs['windSpd']      = Ob(latest_ob[2],  'mps')
+        self.device_obs['windGust']     = Ob(latest_ob[3],  'mps')
+        self.device_obs['windDir']      = Ob(latest_ob[4],  'degrees')
+        self.device_obs['pressure']     = Ob(latest_ob[6],  'mb')
+        self.device_obs['outTemp']      = Ob(latest_ob[7],  'c')
+        self.device_obs['humidity']     = Ob(latest_ob[8],  '%')
+        self.device_obs['uvIndex']      = Ob(latest_ob[10], 'index')
+        self.device_obs['radiation']    = Ob(latest_ob[11], 'Wm2')
+        self.device_obs['minuteRain']   = Ob(latest_ob[12], 'mm')
+        self.device_obs['strikeMinute'] = Ob(latest_ob[15], 'count')
         if len(latest_ob) > 18:
-            self.device_obs['dailyRain']    = [latest_ob[18], 'mm']
+            self.device_obs['dailyRain']    = Ob(latest_ob[18], 'mm')
 
         # Extract lightning strike data from the latest TEMPEST Websocket JSON
         # "summary" object
         if 'summary' in message:
-            self.device_obs['strikeTime'] = [message['summary']['strike_last_epoch'] if 'strike_last_epoch' in message['summary'] else None, 's']
-            self.device_obs['strikeDist'] = [message['summary']['strike_last_dist']  if 'strike_last_dist'  in message['summary'] else None, 'km']
-            self.device_obs['strike3hr']  = [message['summary']['strike_count_3h']   if 'strike_count_3h'   in message['summary'] else None, 'count']
+            self.device_obs['strikeTime'] = Ob(message['summary']['strike_last_epoch'] if 'strike_last_epoch' in message['summary'] else None, 's')
+            self.device_obs['strikeDist'] = Ob(message['summary']['strike_last_dist']  if 'strike_last_dist'  in message['summary'] else None, 'km')
+            self.device_obs['strike3hr']  = Ob(message['summary']['strike_count_3h']   if 'strike_count_3h'   in message['summary'] else None, 'count')
 
         # Request required TEMPEST data from the WeatherFlow API
         if config['System']['rest_api'] == '1' and config['Station']['TempestID']:
@@ -156,6 +226,9 @@ class obs_parser():
                 self.api_data[device_id]['year']  = weatherflow_api.year(api_device_id, config)
             self.flag_api[0] = 0
 
+        # Mark end of REST API span
+        tracing.span('obs_st', 'rest')
+
         # Store latest TEMPEST JSON message
         self.display_obs['obs_st'] = message
 
@@ -171,17 +244,26 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('obs_sky', 'dispatch')
+        self.parse_start['obs_sky'] = time.perf_counter()
+
         # Extract latest SKY Websocket JSON
         if 'obs' in message:
             latest_ob = message['obs'][0]
         else:
             return
 
-        # Extract SKY device_id. Initialise API data dictionary
+        # Extract SKY device_id
         if 'device_id' in message:
             device_id = message['device_id']
         elif 'serial_number' in message:
             device_id = message['serial_number']
+
+        # Backfill SKY observations missed since the previous message
+        self.backfill(message, 'obs_sky', latest_ob[0], config)
+
+        # Initialise API data dictionary
         if config['System']['rest_api'] == '1' and config['Station']['SkyID']:
             api_device_id = config['Station']['SkyID']
             self.api_data[device_id] = {'flagAPI': self.flag_api[1]}
@@ -192,14 +274,14 @@ class obs_parser():
                 return
 
         # Extract required observations from latest SKY Websocket JSON
-        self.device_obs['uvIndex']    = [latest_ob[2],  'index']
-        self.device_obs['minuteRain'] = [latest_ob[3],  'mm']
-        self.device_obs['windSpd']    = [latest_ob[5],  'mps']
-        self.device_obs['windGust']   = [latest_ob[6],  'mps']
-        self.device_obs['windDir']    = [latest_ob[7],  'degrees']
-        self.device_obs['radiation']  = [latest_ob[10], 'Wm2']
+        self.device_obs['uvIndex']    = Ob(latest_ob[2],  'index')
+        self.device_obs['minuteRain'] = Ob(latest_ob[3],  'mm')
+        self.device_obs['windSpd']    = Ob(latest_ob[5],  'mps')
+        self.device_obs['windGust']   = Ob(latest_ob[6],  'mps')
+        self.device_obs['windDir']    = Ob(latest_ob[7],  'degrees')
+        self.device_obs['radiation']  = Ob(latest_ob[10], 'Wm2')
         if latest_ob[11] is not None:
-            self.device_obs['dailyRain']  = [latest_ob[11], 'mm']
+            self.device_obs['dailyRain']  = Ob(latest_ob[11], 'mm')
 
         # Request required SKY data from the WeatherFlow API
         if config['System']['rest_api'] == '1' and config['Station']['SkyID']:
@@ -219,6 +301,9 @@ class obs_parser():
                 self.api_data[device_id]['year'] = weatherflow_api.year(api_device_id, config)
             self.flag_api[1] = 0
 
+        # Mark end of REST API span
+        tracing.span('obs_sky', 'rest')
+
         # Store latest SKY JSON message
         self.display_obs['obs_sky'] = message
 
@@ -234,17 +319,26 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('obs_out_air', 'dispatch')
+        self.parse_start['obs_out_air'] = time.perf_counter()
+
         # Extract latest outdoor AIR Websocket JSON
         if 'obs' in message:
             latest_ob = message['obs'][0]
         else:
             return
 
-        # Extract outdoor AIR device_id. Initialise API data dictionary
+        # Extract outdoor AIR device_id
         if 'device_id' in message:
             device_id = message['device_id']
         elif 'serial_number' in message:
             device_id = message['serial_number']
+
+        # Backfill outdoor AIR observations missed since the previous message
+        self.backfill(message, 'obs_out_air', latest_ob[0], config)
+
+        # Initialise API data dictionary
         if config['System']['rest_api'] == '1' and config['Station']['OutAirID']:
             api_device_id = config['Station']['OutAirID']
             self.api_data[device_id] = {'flagAPI': self.flag_api[2]}
@@ -255,18 +349,18 @@ class obs_parser():
                 return
 
         # Extract required observations from latest outdoor AIR Websocket JSON
-        self.device_obs['obTime']       = [latest_ob[0], 's']
-        self.device_obs['pressure']     = [latest_ob[1], 'mb']
-        self.device_obs['outTemp']      = [latest_ob[2], 'c']
-        self.device_obs['humidity']     = [latest_ob[3], '%']
-        self.device_obs['strikeMinute'] = [latest_ob[4], 'count']
+        self.device_obs['obTime']       = Ob(latest_ob[0], 's')
+        self.device_obs['pressure']     = Ob(latest_ob[1], 'mb')
+        self.device_obs['outTemp']      = Ob(latest_ob[2], 'c')
+        self.device_obs['humidity']     = Ob(latest_ob[3], '%')
+        self.device_obs['strikeMinute'] = Ob(latest_ob[4], 'count')
 
         # Extract lightning strike data from the latest outdoor AIR Websocket
         # JSON "Summary" object
         if 'summary' in message:
-            self.device_obs['strikeTime'] = [message['summary']['strike_last_epoch'] if 'strike_last_epoch' in message['summary'] else None, 's']
-            self.device_obs['strikeDist'] = [message['summary']['strike_last_dist']  if 'strike_last_dist'  in message['summary'] else None, 'km']
-            self.device_obs['strike3hr']  = [message['summary']['strike_count_3h']   if 'strike_count_3h'   in message['summary'] else None, 'count']
+            self.device_obs['strikeTime'] = Ob(message['summary']['strike_last_epoch'] if 'strike_last_epoch' in message['summary'] else None, 's')
+            self.device_obs['strikeDist'] = Ob(message['summary']['strike_last_dist']  if 'strike_last_dist'  in message['summary'] else None, 'km')
+            self.device_obs['strike3hr']  = Ob(message['summary']['strike_count_3h']   if 'strike_count_3h'   in message['summary'] else None, 'count')
 
         # Request required outdoor AIR data from the WeatherFlow API
         if config['System']['rest_api'] == '1' and config['Station']['OutAirID']:
@@ -286,6 +380,9 @@ class obs_parser():
                 self.api_data[device_id]['year']  = weatherflow_api.year(api_device_id, config)
             self.flag_api[2] = 0
 
+        # Mark end of REST API span
+        tracing.span('obs_out_air', 'rest')
+
         # Store latest outdoor AIR JSON message
         self.display_obs['obs_out_air'] = message
 
@@ -301,17 +398,26 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('obs_in_air', 'dispatch')
+        self.parse_start['obs_in_air'] = time.perf_counter()
+
         # Extract latest indoor AIR Websocket JSON
         if 'obs' in message:
             latest_ob = message['obs'][0]
         else:
             return
 
-        # Extract indoor AIR device_id. Initialise API data dictionary
+        # Extract indoor AIR device_id
         if 'device_id' in message:
             device_id = message['device_id']
         elif 'serial_number' in message:
             device_id = message['serial_number']
+
+        # Backfill indoor AIR observations missed since the previous message
+        self.backfill(message, 'obs_in_air', latest_ob[0], config)
+
+        # Initialise API data dictionary
         if config['System']['rest_api'] == '1' and config['Station']['InAirID']:
             api_device_id = config['Station']['InAirID']
             self.api_data[device_id] = {'flagAPI': self.flag_api[3]}
@@ -322,8 +428,8 @@ class obs_parser():
                 return
 
         # Extract required observations from latest indoor AIR Websocket JSON
-        self.device_obs['obTime'] = [latest_ob[0], 's']
-        self.device_obs['inTemp'] = [latest_ob[2], 'c']
+        self.device_obs['obTime'] = Ob(latest_ob[0], 's')
+        self.device_obs['inTemp'] = Ob(latest_ob[2], 'c')
 
         # Request required indoor AIR data from the WeatherFlow API
         if config['System']['rest_api'] == '1' and config['Station']['InAirID']:
@@ -333,6 +439,9 @@ class obs_parser():
                 self.api_data[device_id]['today'] = weatherflow_api.today(api_device_id, config)
         self.flag_api[3] = 0
 
+        # Mark end of REST API span
+        tracing.span('obs_in_air', 'rest')
+
         # Store latest indoor AIR JSON message
         self.display_obs['obs_in_air'] = message
 
@@ -349,6 +458,10 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('rapid_wind', 'dispatch')
+        self.parse_start['rapid_wind'] = time.perf_counter()
+
         # Extract latest rapid_wind Websocket JSON
         if 'ob' in message:
             latest_ob = message['ob']
@@ -367,15 +480,15 @@ class obs_parser():
                 return
 
         # Extract required observations from latest rapid_wind Websocket JSON
-        self.device_obs['rapidWindSpd'] = [latest_ob[1], 'mps']
-        self.device_obs['rapidWindDir'] = [latest_ob[2], 'degrees']
+        self.device_obs['rapidWindSpd'] = Ob(latest_ob[1], 'mps')
+        self.device_obs['rapidWindDir'] = Ob(latest_ob[2], 'degrees')
 
         # Extract wind direction from previous rapid_wind Websocket JSON
         if 'rapid_wind' in self.device_obs:
             previous_ob = self.device_obs['rapid_wind']['ob']
-            rapidWindDirOld = [previous_ob[2], 'degrees']
+            rapidWindDirOld = Ob(previous_ob[2], 'degrees')
         else:
-            rapidWindDirOld = [0, 'degrees']
+            rapidWindDirOld = Ob(0, 'degrees')
 
         # If windspeed is zero, freeze direction at last direction of non-zero
         # wind speed and edit latest rapid_wind Websocket JSON message.
@@ -400,6 +513,10 @@ class obs_parser():
             config              Console configuration object
         """
 
+        # Mark end of dispatch span and start of parse
+        tracing.span('evt_strike', 'dispatch')
+        self.parse_start['evt_strike'] = time.perf_counter()
+
         # Extract latest evt_strike Websocket JSON
         if 'evt' in message:
             latest_evt = message['evt']
@@ -418,8 +535,8 @@ class obs_parser():
                 return
 
         # Extract required observations from latest evt_strike Websocket JSON
-        self.device_obs['strikeTime'] = [latest_evt[0], 's']
-        self.device_obs['strikeDist'] = [latest_evt[1], 'km']
+        self.device_obs['strikeTime'] = Ob(latest_evt[0], 's')
+        self.device_obs['strikeDist'] = Ob(latest_evt[1], 'km')
 
         # Store latest evt_strike JSON message
         self.display_obs['evt_strike'] = message
@@ -427,6 +544,101 @@ class obs_parser():
         # Calculate derived observations
         self.calc_derived_variables(device_id, config, 'evt_strike')
 
+    def parse_hub_status(self, message, config):
+
+        """ Parse hub_status UDP messages from hub
+
+        INPUTS:
+            message             hub_status UDP message
+            config              Console configuration object
+        """
+
+        hub = device_status.parse_hub_status(message, config)
+        self.send_status(hub)
+
+    def parse_device_status(self, message, config):
+
+        """ Parse device_status UDP messages from TEMPEST, SKY and AIR modules
+
+        INPUTS:
+            message             device_status UDP message
+            config              Console configuration object
+        """
+
+        device = device_status.parse_device_status(message, config)
+        self.send_status(device)
+
+    def send_status(self, state):
+
+        """ Rebroadcast hub or device status to consoles subscribed to the
+        relay server and forward it to the user interface process when running
+        as a separate data process
+
+        INPUTS:
+            state               hub_state or device_state
+        """
+
+        relay.publish('Status', {state.serial_number: state})
+        if hasattr(self.app, 'send_display'):
+            self.app.send_display('Status', {state.serial_number: state})
+
+    def backfill(self, message, ob_type, ob_time, config):
+
+        """ Replay observations missed during a gap in messages from a device
+        through the derived variables, so that daily totals and averages
+        include the observations missed during the gap
+
+        INPUTS:
+            message             Latest device message
+            ob_type             Observation type
+            ob_time             Time of latest observation
+            config              Console configuration object
+        """
+
+        # Record time of latest observation from device. Observations are
+        # recorded by observation type, which identifies the device of the
+        # station whether the message was received by the UDP or Websocket
+        # client. Return if there is no gap since the previous observation or a
+        # gap is already being replayed
+        last_time = self.last_ob_time.get(ob_type)
+        self.last_ob_time[ob_type] = ob_time
+        if ob_type in self.backfilling or last_time is None or ob_time - last_time <= self.backfill_gap:
+            return
+        prefix, parser, flag_index = backfill_obs[ob_type]
+        if config['System']['rest_api'] != '1' or not config['Station'][prefix + 'ID']:
+            return
+
+        # Reload all REST API data if gap is too long to be replayed, or
+        # crosses station midnight. Replayed observations are derived at the
+        # current time, so observations made before midnight would be added to
+        # the daily totals of the current day
+        timezone = pytz.timezone(config['Station']['Timezone'])
+        if (ob_time - last_time > self.backfill_limit
+                or datetime.fromtimestamp(last_time, timezone).date() != datetime.fromtimestamp(ob_time, timezone).date()):
+            self.flag_api[flag_index] = 1
+            return
+
+        # Download observations missed during gap
+        response = weatherflow_api.interval(config['Station'][prefix + 'ID'], last_time + 1, ob_time - 1, config)
+        if not weatherflow_api.verify_response(response, 'obs'):
+            self.flag_api[flag_index] = 1
+            return
+
+        # Replay missed observations in order without further REST API
+        # requests
+        backfill_config = {section: config[section] for section in config}
+        backfill_config['System'] = dict(config['System'], rest_api='0')
+        missed_obs = sorted((ob for ob in response.json()['obs'] if last_time < ob[0] < ob_time), key=lambda ob: ob[0])
+        self.backfilling.add(ob_type)
+        try:
+            for ob in missed_obs:
+                getattr(self, parser)(dict(message, obs=[ob]), backfill_config)
+        finally:
+            self.backfilling.discard(ob_type)
+            self.last_ob_time[ob_type] = ob_time
+        metrics.inc('backfill_observations_total', len(missed_obs), type=ob_type)
+        Logger.info(f'obs_parser: {system().log_time()} - Backfilled {len(missed_obs)} {ob_type} observations')
+
     def calc_derived_variables(self, device, config, device_type):
 
         """ Calculate derived variables from available device observations
@@ -437,50 +649,17 @@ class obs_parser():
             device_type         Device type
         """
 
-        # Derive variables from available obs_out_air and obs_st observations
-        # Derive variables from available obs_out_air and obs_st observations
-        if device_type in ('obs_out_air', 'obs_st'):
-            self.derive_obs['feelsLike']    = derive.feels_like(self.device_obs['outTemp'], self.device_obs['humidity'], self.device_obs['windSpd'], config)
-            self.derive_obs['dewPoint']     = derive.dew_point(self.device_obs['outTemp'],  self.device_obs['humidity'])
-            self.derive_obs['outTempDiff']  = derive.temp_diff(self.device_obs['outTemp'],  self.device_obs['obTime'], device, self.api_data, config)
-            self.derive_obs['outTempTrend'] = derive.temp_trend(self.device_obs['outTemp'], self.device_obs['obTime'], device, self.api_data, config)
-            self.derive_obs['outTempMax']   = derive.temp_max(self.device_obs['outTemp'],   self.device_obs['obTime'], self.derive_obs['outTempMax'],   device, self.api_data, config)
-            self.derive_obs['outTempMin']   = derive.temp_min(self.device_obs['outTemp'],   self.device_obs['obTime'], self.derive_obs['outTempMin'],   device, self.api_data, config)
-            self.derive_obs['SLP']          = derive.SLP(self.device_obs['pressure'],      device, config)
-            self.derive_obs['SLPTrend']     = derive.SLP_trend(self.device_obs['pressure'], self.device_obs['obTime'], device, self.api_data, config)
-            self.derive_obs['SLPMax']       = derive.SLP_max(self.device_obs['pressure'],   self.device_obs['obTime'], self.derive_obs['SLPMax'], device, self.api_data, config)
-            self.derive_obs['SLPMin']       = derive.SLP_min(self.device_obs['pressure'],   self.device_obs['obTime'], self.derive_obs['SLPMin'], device, self.api_data, config)
-            self.derive_obs['strikeCount']  = derive.strike_count(self.device_obs['strikeMinute'], self.derive_obs['strikeCount'], device, self.api_data, config)
-            self.derive_obs['strikeFreq']   = derive.strike_frequency(self.device_obs['obTime'],   device, self.api_data, config)
-            self.derive_obs['strikeDeltaT'] = derive.strike_delta_t(self.device_obs['strikeTime'], config)
-
-        # Derive variables from available obs_sky and obs_st observations
-        if device_type in ('obs_sky', 'obs_st'):
-            self.derive_obs['uvIndex']   = derive.uv_index(self.device_obs['uvIndex'])
-            self.derive_obs['peakSun']   = derive.peak_sun_hours(self.device_obs['radiation'],  self.derive_obs['peakSun'], device, self.api_data, config)
-            self.derive_obs['windSpd']   = derive.beaufort_scale(self.device_obs['windSpd'])
-            self.derive_obs['windDir']   = derive.cardinal_wind_dir(self.device_obs['windDir'], self.device_obs['windSpd'])
-            self.derive_obs['windAvg']   = derive.avg_wind_speed(self.device_obs['windSpd'],    self.derive_obs['windAvg'], device, self.api_data, config)
-            self.derive_obs['gustMax']   = derive.max_wind_gust(self.device_obs['windGust'],    self.derive_obs['gustMax'], device, self.api_data, config)
-            self.derive_obs['rainRate']  = derive.rain_rate(self.device_obs['minuteRain'])
-            self.derive_obs['rainAccum'] = derive.rain_accumulation(self.device_obs['minuteRain'], self.device_obs['dailyRain'], self.derive_obs['rainAccum'], device, self.api_data, config)
-
-        # Derive variables from available obs_out_air and obs_st observations
-        if device_type == 'obs_in_air':
-            self.derive_obs['inTempMax']   = derive.temp_max(self.device_obs['inTemp'], self.device_obs['obTime'], self.derive_obs['inTempMax'], device, self.api_data, config)
-            self.derive_obs['inTempMin']   = derive.temp_min(self.device_obs['inTemp'], self.device_obs['obTime'], self.derive_obs['inTempMin'], device, self.api_data, config)
-
-        # Derive variables from available rapid_wind observations
-        if device_type == 'rapid_wind':
-            self.derive_obs['rapidWindDir'] = derive.cardinal_wind_dir(self.device_obs['rapidWindDir'], self.device_obs['rapidWindSpd'])
-
-        # Derive variables from available evt_strike observations
-        if device_type == 'evt_strike':
-            self.derive_obs['strikeDeltaT'] = derive.strike_delta_t(self.device_obs['strikeTime'], config)
+        # Recalculate derived variables whose inputs have changed
+        self.engine.derive(self, device, config, device_type)
 
         # Format derived observations
+        tracing.span(device_type, 'derive')
         self.format_derived_variables(config, device_type)
 
+        # Checkpoint derived observations if required
+        if time.time() - self.checkpoint_time > self.checkpoint_interval:
+            self.save_derived_state()
+
     def format_derived_variables(self, config, device_type):
 
         """ Format derived variables from available device observations
@@ -490,187 +669,241 @@ class obs_parser():
             device_type         Device type
         """
 
-        # Convert derived variable units from obs_out_air and obs_st observations
-        if device_type in ('obs_out_air', 'obs_st', 'obs_all'):
-            outTemp        = observation.units(self.device_obs['outTemp'],              config['Units']['Temp'])
-            feelsLike      = observation.units(self.derive_obs['feelsLike'],            config['Units']['Temp'])
-            dewPoint       = observation.units(self.derive_obs['dewPoint'],             config['Units']['Temp'])
-            outTempDiff    = observation.units(self.derive_obs['outTempDiff'],          config['Units']['Temp'])
-            outTempTrend   = observation.units(self.derive_obs['outTempTrend'],         config['Units']['Temp'])
-            outTempMax     = observation.units(self.derive_obs['outTempMax'],           config['Units']['Temp'])
-            outTempMin     = observation.units(self.derive_obs['outTempMin'],           config['Units']['Temp'])
-            humidity       = observation.units(self.device_obs['humidity'],             config['Units']['Other'])
-            SLP            = observation.units(self.derive_obs['SLP'],                  config['Units']['Pressure'])
-            SLPTrend       = observation.units(self.derive_obs['SLPTrend'],             config['Units']['Pressure'])
-            SLPMax         = observation.units(self.derive_obs['SLPMax'],               config['Units']['Pressure'])
-            SLPMin         = observation.units(self.derive_obs['SLPMin'],               config['Units']['Pressure'])
-            strikeDist     = observation.units(self.device_obs['strikeDist'],           config['Units']['Distance'])
-            strikeDeltaT   = observation.units(self.derive_obs['strikeDeltaT'],         config['Units']['Other'])
-            strikeFreq     = observation.units(self.derive_obs['strikeFreq'],           config['Units']['Other'])
-            strike3hr      = observation.units(self.device_obs['strike3hr'],            config['Units']['Other'])
-            strikeToday    = observation.units(self.derive_obs['strikeCount']['today'], config['Units']['Other'])
-            strikeMonth    = observation.units(self.derive_obs['strikeCount']['month'], config['Units']['Other'])
-            strikeYear     = observation.units(self.derive_obs['strikeCount']['year'],  config['Units']['Other'])
-
-        # Convert derived variable units from obs_sky and obs_st observations
-        if device_type in ('obs_sky', 'obs_st', 'obs_all'):
-            rainRate       = observation.units(self.derive_obs['rainRate'],               config['Units']['Precip'])
-            todayRain      = observation.units(self.derive_obs['rainAccum']['today'],     config['Units']['Precip'])
-            yesterdayRain  = observation.units(self.derive_obs['rainAccum']['yesterday'], config['Units']['Precip'])
-            monthRain      = observation.units(self.derive_obs['rainAccum']['month'],     config['Units']['Precip'])
-            yearRain       = observation.units(self.derive_obs['rainAccum']['year'],      config['Units']['Precip'])
-            radiation      = observation.units(self.device_obs['radiation'],              config['Units']['Other'])
-            uvIndex        = observation.units(self.derive_obs['uvIndex'],                config['Units']['Other'])
-            peakSun        = observation.units(self.derive_obs['peakSun'],                config['Units']['Other'])
-            windSpd        = observation.units(self.derive_obs['windSpd'],                config['Units']['Wind'])
-            windDir        = observation.units(self.derive_obs['windDir'],                config['Units']['Direction'])
-            windGust       = observation.units(self.device_obs['windGust'],               config['Units']['Wind'])
-            windAvg        = observation.units(self.derive_obs['windAvg'],                config['Units']['Wind'])
-            windMax        = observation.units(self.derive_obs['gustMax'],                config['Units']['Wind'])
-
-        # Convert derived variable units from obs_in_air observations
-        if device_type in ('obs_in_air',  'obs_all'):
-            inTemp         = observation.units(self.device_obs['inTemp'],    config['Units']['Temp'])
-            inTempMax      = observation.units(self.derive_obs['inTempMax'], config['Units']['Temp'])
-            inTempMin      = observation.units(self.derive_obs['inTempMin'], config['Units']['Temp'])
-
-        # Convert derived variable units from rapid_wind observations
-        if device_type in ('rapid_wind', 'obs_all'):
-            rapidWindSpd   = observation.units(self.device_obs['rapidWindSpd'], config['Units']['Wind'])
-            rapidWindDir   = observation.units(self.derive_obs['rapidWindDir'], 'degrees')
-
-        # Convert derived variable units from available evt_strike observations
-        if device_type in ('evt_strike', 'obs_all'):
-            strikeDist     = observation.units(self.device_obs['strikeDist'],   config['Units']['Distance'])
-            strikeDeltaT   = observation.units(self.derive_obs['strikeDeltaT'], config['Units']['Other'])
-
-        # Format derived variables from obs_air and obs_st observations
-        if device_type in ('obs_out_air', 'obs_st', 'obs_all'):
-            self.display_obs['outTemp']       = observation.format(outTemp,      'Temp')
-            self.display_obs['FeelsLike']     = observation.format(feelsLike,    'Temp')
-            self.display_obs['DewPoint']      = observation.format(dewPoint,     'Temp')
-            self.display_obs['outTempDiff']   = observation.format(outTempDiff,  'Temp')
-            self.display_obs['outTempTrend']  = observation.format(outTempTrend, 'Temp')
-            self.display_obs['outTempMax']    = observation.format(outTempMax,   ['Temp', 'Time'], config)
-            self.display_obs['outTempMin']    = observation.format(outTempMin,   ['Temp', 'Time'], config)
-            self.display_obs['Humidity']      = observation.format(humidity,     'Humidity')
-            self.display_obs['SLP']           = observation.format(SLP,          'Pressure')
-            self.display_obs['SLPTrend']      = observation.format(SLPTrend,     'Pressure')
-            self.display_obs['SLPMax']        = observation.format(SLPMax,       ['Pressure', 'Time'], config)
-            self.display_obs['SLPMin']        = observation.format(SLPMin,       ['Pressure', 'Time'], config)
-            self.display_obs['StrikeDist']    = observation.format(strikeDist,   'StrikeDistance')
-            self.display_obs['StrikeDeltaT']  = observation.format(strikeDeltaT, 'TimeDelta')
-            self.display_obs['StrikeFreq']    = observation.format(strikeFreq,   'StrikeFrequency')
-            self.display_obs['Strikes3hr']    = observation.format(strike3hr,    'StrikeCount')
-            self.display_obs['StrikesToday']  = observation.format(strikeToday,  'StrikeCount')
-            self.display_obs['StrikesMonth']  = observation.format(strikeMonth,  'StrikeCount')
-            self.display_obs['StrikesYear']   = observation.format(strikeYear,   'StrikeCount')
-
-        # Format derived variables from obs_sky and obs_st observations
-        if device_type in ('obs_sky', 'obs_st', 'obs_all'):
-            self.display_obs['Radiation']     = observation.format(radiation,     'Radiation')
-            self.display_obs['UVIndex']       = observation.format(uvIndex,       'UV')
-            self.display_obs['peakSun']       = observation.format(peakSun,       'peakSun')
-            self.display_obs['RainRate']      = observation.format(rainRate,      'Precip')
-            self.display_obs['TodayRain']     = observation.format(todayRain,     'Precip')
-            self.display_obs['YesterdayRain'] = observation.format(yesterdayRain, 'Precip')
-            self.display_obs['MonthRain']     = observation.format(monthRain,     'Precip')
-            self.display_obs['YearRain']      = observation.format(yearRain,      'Precip')
-            self.display_obs['WindSpd']       = observation.format(windSpd,       'Wind')
-            self.display_obs['WindGust']      = observation.format(windGust,      'Wind')
-            self.display_obs['AvgWind']       = observation.format(windAvg,       'Wind')
-            self.display_obs['MaxGust']       = observation.format(windMax,       'Wind')
-            self.display_obs['WindDir']       = observation.format(windDir,       'Direction')
-
-        # Format derived variables from obs_in_air observations
-        if device_type in ('obs_in_air', 'obs_all'):
-            self.display_obs['inTemp']        = observation.format(inTemp,    'Temp')
-            self.display_obs['inTempMax']     = observation.format(inTempMax, ['Temp', 'Time'], config)
-            self.display_obs['inTempMin']     = observation.format(inTempMin, ['Temp', 'Time'], config)
-
-        # Format derived variables from rapid_wind observations
-        if device_type in ('rapid_wind', 'obs_all'):
-            self.display_obs['rapidSpd']      = observation.format(rapidWindSpd, 'Wind')
-            self.display_obs['rapidDir']      = observation.format(rapidWindDir, 'Direction')
-
-        # Format derived variables from evt_strike observations
-        if device_type in ('evt_strike', 'obs_all'):
-            self.display_obs['StrikeDist']    = observation.format(strikeDist,   'StrikeDistance')
-            self.display_obs['StrikeDeltaT']  = observation.format(strikeDeltaT, 'TimeDelta')
-
-        # Update display with new variables
+        # Reformat display variables whose source variables have changed
+        self.engine.format(self, config, device_type)
+
+        # Record parse metrics and update display with new variables
+        tracing.span(device_type, 'format')
+        if device_type in self.parse_start:
+            metrics.observe('parse_seconds', time.perf_counter() - self.parse_start.pop(device_type), type=device_type)
+            metrics.inc('messages_parsed_total', type=device_type)
         self.update_display(device_type)
 
     def reformat_display(self):
         while self.app.connection_client.activeThreads():
             pass
-        self.format_derived_variables(self.app.config, 'obs_all')
+        self.engine.invalidate()
+        self.format_derived_variables(self.config, 'obs_all')
 
     def resetDisplay(self):
         while self.app.connection_client.activeThreads():
             pass
-        self.display_obs = properties.Obs()
-        self.device_obs  = device_obs.copy()
-        self.derive_obs  = derive_obs.copy()
-        self.api_data    = {}
+        self.display_obs  = properties.Obs()
+        self.device_obs   = device_obs.copy()
+        self.derive_obs   = derive_obs.copy()
+        self.api_data     = {}
+        self.engine       = derived_engine()
+        self.last_ob_time = {}
+        devices.configure(self.config)
         self.update_display('obs_reset')
 
-    @mainthread
+    def station_key(self, config):
+
+        """ Return the station and device identifiers used to check that saved
+        derived observations belong to the current station
+
+        INPUTS:
+            config              Console configuration object
+
+        OUTPUT:
+            station_key         List of station and device identifiers
+        """
+
+        return [config['Station'][key] for key in ('StationID', 'TempestSN', 'SkySN', 'OutAirSN', 'InAirSN')]
+
+    def checkpoint_path(self, config):
+
+        """ Return the file derived observations are checkpointed to
+
+        INPUTS:
+            config              Console configuration object
+
+        OUTPUT:
+            checkpoint_file     Checkpoint file name
+        """
+
+        return config['System'].get('StateFile', 'wfpiconsole.state')
+
+    def save_derived_state(self):
+
+        """ Save derived observations that carry running daily state to the
+        checkpoint file
+        """
+
+        # Define derived observations checkpoint
+        if not self.checkpoint_file:
+            return
+        with self.checkpoint_lock:
+            self.checkpoint_time = time.time()
+            state = {'station':    self.station_key(self.config),
+                     'time':       wall_clock.time(),
+                     'last_ob':    dict(self.last_ob_time),
+                     'derive_obs': {key: self.derive_obs[key] for key in checkpoint_obs}}
+
+            # Write checkpoint to temporary file and replace existing checkpoint
+            try:
+                with open(self.checkpoint_file + '.tmp', 'w') as checkpoint_file:
+                    json.dump(state, checkpoint_file, separators=(',', ':'))
+                os.replace(self.checkpoint_file + '.tmp', self.checkpoint_file)
+            except (OSError, TypeError, ValueError) as error:
+                Logger.warning(f'obs_parser: {system().log_time()} - Unable to save derived state: {error}')
+
+    def load_derived_state(self, config):
+
+        """ Restore derived observations that carry running daily state from the
+        checkpoint file if the checkpoint was saved for the current station
+        during the current station-local day
+
+        INPUTS:
+            config              Console configuration object
+        """
+
+        # Load derived observations checkpoint
+        if not self.checkpoint_file:
+            return
+        try:
+            with open(self.checkpoint_file) as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return
+
+        # Discard checkpoint if saved for a different station or on a previous
+        # station-local day
+        try:
+            Tz = pytz.timezone(config['Station']['Timezone'])
+            if state['station'] != self.station_key(config):
+                return
+            if datetime.fromtimestamp(state['time'], Tz).date() != wall_clock.now(pytz.utc).astimezone(Tz).date():
+                return
+        except (KeyError, TypeError, ValueError, pytz.UnknownTimeZoneError):
+            return
+
+        # Restore derived observations. Only fetch REST API data that is still
+        # missing after the restore: observations made since the checkpoint are
+        # backfilled from the time of the last observation of each device when
+        # the next observation is received
+        for key in checkpoint_obs:
+            if key in state['derive_obs']:
+                self.derive_obs[key] = records.restore(key, state['derive_obs'][key])
+        for ob_type, ob_time in state.get('last_ob', {}).items():
+            if ob_type in backfill_obs:
+                self.last_ob_time[ob_type] = ob_time
+                self.flag_api[backfill_obs[ob_type][2]] = 0
+        Logger.info(f'obs_parser: {system().log_time()} - Derived state restored from checkpoint')
+
     def update_display(self, ob_type):
 
-        """ Update display with new variables derived from latest websocket
-        message
+        """ Request a display update with new variables derived from latest
+        websocket message. Requests made during the same frame are coalesced,
+        so that a burst of messages updates the display only once
 
         INPUTS:
             ob_type             Latest Websocket message type
         """
 
-        # Update display values with new derived observations
-        reference_error = False
-        for key, value in list(self.display_obs.items()):
-            if not (ob_type == 'obs_all' and 'rapid' in key):
-                try:                                                            # Don't update rapidWind display when type is 'all'
-                    self.app.CurrentConditions.Obs[key] = value                 # as the RapidWind rose is not animated in this case
-                except ReferenceError:
-                    if not reference_error:
-                        Logger.warning(f'obs_parser: {system().log_time()} - Reference error {ob_type}')
-                        reference_error = True
-
-        # Update display graphics with new derived observations
-        if ob_type == 'rapid_wind':
-            if hasattr(self.app, 'WindSpeedPanel'):
-                for panel in getattr(self.app, 'WindSpeedPanel'):
-                    panel.animateWindRose()
-        elif ob_type == 'evt_strike':
-            if self.app.config['Display']['LightningPanel'] == '1':
-                for ii, button in enumerate(self.app.CurrentConditions.button_list):
-                    if "Lightning" in button[2]:
-                        self.app.CurrentConditions.switchPanel([], button)
-            if hasattr(self.app, 'LightningPanel'):
-                for panel in getattr(self.app, 'LightningPanel'):
+        with self.display_lock:
+            if ob_type not in self.display_types:
+                self.display_types.append(ob_type)
+        self.display_trigger()
+
+    def flush_display(self, dt):
+
+        """ Update display with new variables derived from all messages
+        received since the previous frame. Display values are set once, and
+        display graphics are updated once for each message type
+
+        INPUTS:
+            dt                  Time since flush_display was scheduled
+        """
+
+        # Extract message types received since previous frame
+        with self.display_lock:
+            ob_types, self.display_types = self.display_types, []
+        if not ob_types:
+            return
+
+        # Record message latency
+        for ob_type in ob_types:
+            tracing.finish(ob_type)
+
+        # Rebroadcast new variables to consoles subscribed to the relay server
+        for ob_type in ob_types:
+            relay.publish('Obs', self.display_obs, ob_type)
+
+        # Forward new variables to the user interface process when running as
+        # a separate data process
+        if hasattr(self.app, 'send_display'):
+            for ob_type in ob_types:
+                self.app.send_display('Obs', self.display_obs, ob_type)
+            return
+
+        # Update display with new variables. Values are set with the first
+        # message type other than 'obs_all', which does not update rapidWind
+        # values
+        ob_types.sort(key=lambda ob_type: ob_type == 'obs_all')
+        display_obs = self.display_obs
+        for ob_type in ob_types:
+            set_display(self.app, display_obs, ob_type)
+            display_obs = {}
+
+
+def set_display(app, display_obs, ob_type):
+
+    """ Set display values and graphics with new variables derived from latest
+    websocket message
+
+    INPUTS:
+        app                 Running wfpiconsole app
+        display_obs         Dictionary of display variables
+        ob_type             Latest Websocket message type
+    """
+
+    # Update display values with new derived observations
+    reference_error = False
+    for key, value in list(display_obs.items()):
+        if not (ob_type == 'obs_all' and 'rapid' in key):
+            try:                                                                # Don't update rapidWind display when type is 'all'
+                app.CurrentConditions.Obs[key] = value                          # as the RapidWind rose is not animated in this case
+            except ReferenceError:
+                if not reference_error:
+                    Logger.warning(f'obs_parser: {system().log_time()} - Reference error {ob_type}')
+                    reference_error = True
+
+    # Update display graphics with new derived observations
+    if ob_type == 'rapid_wind':
+        if hasattr(app, 'WindSpeedPanel'):
+            for panel in getattr(app, 'WindSpeedPanel'):
+                panel.animateWindRose()
+    elif ob_type == 'evt_strike':
+        if app.config['Display']['LightningPanel'] == '1':
+            for ii, button in enumerate(app.CurrentConditions.button_list):
+                if "Lightning" in button[2]:
+                    app.CurrentConditions.switchPanel([], button)
+        if hasattr(app, 'LightningPanel'):
+            for panel in getattr(app, 'LightningPanel'):
+                panel.setLightningBoltIcon()
+                panel.animateLightningBoltIcon()
+    else:
+        if ob_type in ['obs_st', 'obs_air', 'obs_all', 'obs_reset']:
+            if hasattr(app, 'TemperaturePanel'):
+                for panel in getattr(app, 'TemperaturePanel'):
+                    panel.set_feels_like_icon()
+            if hasattr(app, 'LightningPanel'):
+                for panel in getattr(app, 'LightningPanel'):
                     panel.setLightningBoltIcon()
-                    panel.animateLightningBoltIcon()
-        else:
-            if ob_type in ['obs_st', 'obs_air', 'obs_all', 'obs_reset']:
-                if hasattr(self.app, 'TemperaturePanel'):
-                    for panel in getattr(self.app, 'TemperaturePanel'):
-                        panel.set_feels_like_icon()
-                if hasattr(self.app, 'LightningPanel'):
-                    for panel in getattr(self.app, 'LightningPanel'):
-                        panel.setLightningBoltIcon()
-                if hasattr(self.app, 'BarometerPanel'):
-                    for panel in getattr(self.app, 'BarometerPanel'):
-                        panel.setBarometerArrow()
-            if ob_type in ['obs_st', 'obs_sky', 'obs_all', 'obs_reset']:
-                if hasattr(self.app, 'WindSpeedPanel'):
-                    for panel in getattr(self.app, 'WindSpeedPanel'):
-                        panel.setWindIcons()
-                if hasattr(self.app, 'SunriseSunsetPanel'):
-                    for panel in getattr(self.app, 'SunriseSunsetPanel'):
-                        panel.setUVBackground()
-                if hasattr(self.app, 'RainfallPanel'):
-                    for panel in getattr(self.app, 'RainfallPanel'):
-                        panel.animate_rain_rate()
-                if hasattr(self.app, 'TemperaturePanel'):
-                    for panel in getattr(self.app, 'TemperaturePanel'):
-                        panel.set_feels_like_icon()
+            if hasattr(app, 'BarometerPanel'):
+                for panel in getattr(app, 'BarometerPanel'):
+                    panel.setBarometerArrow()
+        if ob_type in ['obs_st', 'obs_sky', 'obs_all', 'obs_reset']:
+            if hasattr(app, 'WindSpeedPanel'):
+                for panel in getattr(app, 'WindSpeedPanel'):
+                    panel.setWindIcons()
+            if hasattr(app, 'SunriseSunsetPanel'):
+                for panel in getattr(app, 'SunriseSunsetPanel'):
+                    panel.setUVBackground()
+            if hasattr(app, 'RainfallPanel'):
+                for panel in getattr(app, 'RainfallPanel'):
+                    panel.animate_rain_rate()
+            if hasattr(app, 'TemperaturePanel'):
+                for panel in getattr(app, 'TemperaturePanel'):
+                    panel.set_feels_like_icon()
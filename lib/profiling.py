@@ -0,0 +1,299 @@
+""" Profiles the Raspberry Pi Python console for WeatherFlow Tempest and Smart
+Home Weather stations without code changes.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Profiling is enabled with [System] Profiling, or the WFPICONSOLE_PROFILE
+environment variable, which takes precedence:
+
+    sample      Sample the stack of every thread 100 times per second and
+                write collapsed stacks (<thread>.collapsed) suitable for flame
+                graph tools
+    cprofile    Run every thread under cProfile and write pstats files
+                (<thread>.prof). Requires Python 3.11 or earlier; later
+                versions fall back to sample
+
+Profiles are grouped by thread name (MainThread, UDP, Websocket, obs_st,
+obs_sky, ...), written to [System] ProfileDir every DUMP_INTERVAL seconds and
+when the console exits. Call counts and cumulative time of every
+derived_variables function are written to derived_variables.csv.
+"""
+
+# Import required library modules
+from lib            import derived_variables
+
+# Import required Kivy modules
+from kivy.logger    import Logger
+
+# Import required system modules
+from collections    import Counter
+import threading
+import functools
+import cProfile
+import inspect
+import marshal
+import pstats
+import atexit
+import time
+import sys
+import os
+
+# Define profiling variables
+DUMP_INTERVAL   = 600
+SAMPLE_INTERVAL = 0.01
+session         = None
+
+
+def profile_mode(config):
+
+    """ Return the profiling mode requested by the environment or the console
+    configuration
+
+    INPUTS:
+        config              Console configuration object
+
+    OUTPUT:
+        mode                'sample', 'cprofile' or None when disabled
+    """
+
+    mode = os.environ.get('WFPICONSOLE_PROFILE', config['System'].get('Profiling', '0')).strip().lower()
+    if mode in ['', '0', 'off']:
+        return None
+    if mode == 'cprofile':
+        if sys.version_info >= (3, 12):
+            Logger.warning('Profiling: cProfile cannot profile multiple threads on this Python version; using sample')
+            return 'sample'
+        return 'cprofile'
+    return 'sample'
+
+
+# ==============================================================================
+# DEFINE 'call_counter' CLASS
+# ==============================================================================
+class call_counter():
+
+    """ Counts calls to, and cumulative time spent in, the functions of a
+    module by replacing each function with a counting wrapper
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.lock   = threading.Lock()
+        self.calls  = Counter()
+        self.time   = Counter()
+        self.original = {}
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__:
+                self.original[name] = function
+                setattr(module, name, self.wrap(name, function))
+
+    def wrap(self, name, function):
+        @functools.wraps(function)
+        def counted(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.calls[name] += 1
+                    self.time[name]  += elapsed
+        return counted
+
+    def restore(self):
+        for name, function in self.original.items():
+            setattr(self.module, name, function)
+
+    def write_csv(self, path):
+
+        """ Write call counts and cumulative time to a CSV file
+
+        INPUTS:
+            path                Path to CSV file
+        """
+
+        with self.lock:
+            rows = [(name, self.calls[name], self.time[name]) for name in sorted(self.original)]
+        with open(path, 'w') as csv_file:
+            csv_file.write('function,calls,total_seconds,mean_microseconds\n')
+            for name, calls, total in rows:
+                mean = total / calls * 1e6 if calls else 0
+                csv_file.write(f'{name},{calls},{total:.6f},{mean:.1f}\n')
+
+
+# ==============================================================================
+# DEFINE 'profile_session' CLASS
+# ==============================================================================
+class profile_session():
+
+    """ Profiles all threads of the console in the requested mode until
+    stopped
+    """
+
+    def __init__(self, mode, directory):
+        self.mode       = mode
+        self.directory  = directory
+        self.lock       = threading.Lock()
+        self.running    = True
+        self.stacks     = {}
+        self.profiles   = {}
+        self.finished   = {}
+        self.counter    = call_counter(derived_variables)
+        os.makedirs(directory, exist_ok=True)
+
+        # Start profiling all current and future threads
+        if mode == 'cprofile':
+            threading.setprofile(self.bootstrap)
+            self.profile_thread()
+        else:
+            threading.Thread(target=self.sample, name='profile_sampler', daemon=True).start()
+
+        # Dump profiles on a timer and when the console exits
+        threading.Thread(target=self.dump_timer, name='profile_dump', daemon=True).start()
+        atexit.register(self.stop)
+
+    def profile_thread(self):
+
+        """ Start a cProfile profiler for the current thread
+        """
+
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.setdefault(threading.current_thread().name, []).append((threading.current_thread(), profile))
+        profile.enable()
+
+    def bootstrap(self, frame, event, arg):
+
+        """ Profile function installed in every new thread, which replaces
+        itself with a cProfile profiler on the first profiling event
+        """
+
+        sys.setprofile(None)
+        if self.running:
+            self.profile_thread()
+
+    def sample(self):
+
+        """ Sample the stack of every thread until profiling stops
+        """
+
+        own_ident = threading.get_ident()
+        while self.running:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                name = names.get(ident, str(ident))
+                with self.lock:
+                    self.stacks.setdefault(name, Counter())[';'.join(reversed(stack))] += 1
+            time.sleep(SAMPLE_INTERVAL)
+
+    def dump_timer(self):
+        while self.running:
+            time.sleep(DUMP_INTERVAL)
+            if self.running:
+                self.dump()
+
+    def dump(self):
+
+        """ Write per-thread profiles and derived_variables call counts
+        """
+
+        try:
+            if self.mode == 'cprofile':
+                self.dump_cprofile()
+            else:
+                with self.lock:
+                    stacks = {name: dict(counts) for name, counts in self.stacks.items()}
+                for name, counts in stacks.items():
+                    with open(os.path.join(self.directory, name + '.collapsed'), 'w') as stack_file:
+                        for stack, count in counts.items():
+                            stack_file.write(f'{stack} {count}\n')
+            self.counter.write_csv(os.path.join(self.directory, 'derived_variables.csv'))
+            Logger.info(f'Profiling: Profiles written to {self.directory}')
+        except OSError as error:
+            Logger.warning(f'Profiling: Unable to write profiles: {error}')
+
+    def dump_cprofile(self):
+
+        """ Merge the cProfile profilers of all threads with the same name and
+        write one pstats file per thread name. Profilers of finished threads
+        are folded into the merged statistics and released
+        """
+
+        with self.lock:
+            profiles = {name: list(entries) for name, entries in self.profiles.items()}
+            for name, entries in self.profiles.items():
+                self.profiles[name] = [entry for entry in entries if entry[0].is_alive()]
+        for name, entries in profiles.items():
+            snapshot_path = os.path.join(self.directory, name + '.snapshot')
+            stats = pstats.Stats()
+            for thread, profile in entries:
+                profile.snapshot_stats()
+                with open(snapshot_path, 'wb') as snapshot_file:
+                    marshal.dump(profile.stats, snapshot_file)
+                if thread.is_alive():
+                    stats.add(snapshot_path)
+                else:
+                    self.finished.setdefault(name, pstats.Stats()).add(snapshot_path)
+            if name in self.finished:
+                stats.add(self.finished[name])
+            stats.dump_stats(os.path.join(self.directory, name + '.prof'))
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+
+    def stop(self):
+
+        """ Stop profiling and write final profiles
+        """
+
+        if not self.running:
+            return
+        self.running = False
+        if self.mode == 'cprofile':
+            threading.setprofile(None)
+        self.dump()
+        self.counter.restore()
+
+
+def start(config):
+
+    """ Start profiling if enabled in the environment or the console
+    configuration
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    global session
+    mode = profile_mode(config)
+    if mode is None or session is not None:
+        return
+    directory = config['System'].get('ProfileDir', 'profiles') or 'profiles'
+    session = profile_session(mode, directory)
+    Logger.info(f'Profiling: Started in {mode} mode; writing profiles to {directory}')
+
+
+def stop():
+
+    """ Stop profiling and write final profiles
+    """
+
+    if session is not None:
+        session.stop()
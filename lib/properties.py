@@ -71,15 +71,19 @@ def Status():
     """ Define the Status property values """
 
     return {'tempest_sample_time': '-', 'tempest_last_sample': ' ',  'tempest_voltage': '-',
-            'tempest_status': '-',      'tempest_ob_count': '-',
+            'tempest_status': '-',      'tempest_ob_count': '-',     'tempest_rssi': '-',
+            'tempest_uptime': '-',
             'sky_sample_time': '-',     'sky_last_sample': ' ',      'sky_voltage': '-',
-            'sky_status': '-',          'sky_ob_count': '-',
+            'sky_status': '-',          'sky_ob_count': '-',         'sky_rssi': '-',
+            'sky_uptime': '-',
             'out_air_sample_time': '-', 'out_air_last_sample': ' ',  'out_air_voltage': '-',
-            'out_air_status': '-',      'out_air_ob_count': '-',
+            'out_air_status': '-',      'out_air_ob_count': '-',     'out_air_rssi': '-',
+            'out_air_uptime': '-',
             'in_air_sample_time': '-',  'in_air_last_sample': ' ',   'in_air_voltage': '-',
-            'in_air_status': '-',       'in_air_ob_count': '-',
+            'in_air_status': '-',       'in_air_ob_count': '-',      'in_air_rssi': '-',
+            'in_air_uptime': '-',
             'station_status': '-',
-            'hub_firmware': '-'
+            'hub_firmware': '-',        'hub_rssi': '-',             'hub_uptime': '-'
             }
 
 
@@ -0,0 +1,116 @@
+""" Defines the observation and derived variable records used by the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Records are immutable named tuples. Their fields are laid out in the same
+order as the [value, unit, ...] lists they replace, so observation.units(),
+observation.format() and the checkpoint file read them positionally without
+change, while the derived variable functions use the field names.
+"""
+
+# Import required system modules
+from collections import namedtuple
+
+# Device observation: [value, unit]
+Ob = namedtuple('Ob', ['value', 'unit'])
+
+# Daily maximum or minimum: [value, unit, time, 's', extreme, updated]. value
+# and time are displayed, extreme is the running value in the base unit and
+# updated is the time of the latest observation
+Extreme = namedtuple('Extreme', ['value', 'unit', 'time', 'time_unit', 'extreme', 'updated'],
+                     defaults=['-', None, None, None])
+
+# Daily average: [value, unit, average, count, updated]
+Average = namedtuple('Average', ['value', 'unit', 'average', 'count', 'updated'],
+                     defaults=[None, None, None])
+
+# Daily maximum gust: [value, unit, gust, updated]
+Gust = namedtuple('Gust', ['value', 'unit', 'gust', 'updated'],
+                  defaults=[None, None])
+
+# Peak sun hours: [value, unit, potential, watt_hrs, sunrise, sunset, updated]
+PeakSun = namedtuple('PeakSun', ['value', 'unit', 'potential', 'watt_hrs', 'sunrise', 'sunset', 'updated'],
+                     defaults=['-', None, None, None, None])
+
+# Pressure trend: [value, unit, text, tendency]
+Trend = namedtuple('Trend', ['value', 'unit', 'text', 'tendency'],
+                   defaults=['-', '-'])
+
+# Value with a copy in the base unit: [value, unit, base]. base is not
+# converted by observation.units()
+Reading = namedtuple('Reading', ['value', 'unit', 'base'],
+                     defaults=[None])
+
+# Value with display text or colour: [value, unit, label]
+Labelled = namedtuple('Labelled', ['value', 'unit', 'label'],
+                      defaults=['-'])
+
+# Feels like temperature: [value, unit, description, icon]
+FeelsLike = namedtuple('FeelsLike', ['value', 'unit', 'description', 'icon'],
+                       defaults=['-', '-'])
+
+# Strike frequency: [value, unit, value_3h, unit_3h]. value is the frequency
+# over the last 10 minutes
+Frequency = namedtuple('Frequency', ['value', 'unit', 'value_3h', 'unit_3h'],
+                       defaults=[None, '/min'])
+
+# Rain rate: [value, unit, text, rate]
+RainRate = namedtuple('RainRate', ['value', 'unit', 'text', 'rate'],
+                      defaults=['-', None])
+
+# Wind direction: [value, unit, cardinal, description]
+Direction = namedtuple('Direction', ['value', 'unit', 'cardinal', 'description'],
+                       defaults=['-', '-'])
+
+# Beaufort scale: [value, unit, force, number, description]
+Beaufort = namedtuple('Beaufort', ['value', 'unit', 'force', 'number', 'description'],
+                      defaults=['-', '-', '-'])
+
+# UV index: [value, unit, level, color]
+UVIndex = namedtuple('UVIndex', ['value', 'unit', 'level', 'color'],
+                     defaults=['-', '#646464'])
+
+# Rain or strike accumulation over one period: [value, unit, total, updated].
+# value is displayed, total is the running total in the base unit and updated
+# is the time of the latest observation
+Accumulation = namedtuple('Accumulation', ['value', 'unit', 'total', 'updated'],
+                          defaults=[None, None])
+
+# Record type of each derived observation carrying running daily state. The
+# rainAccum and strikeCount observations hold one record per period
+derive_records = {'outTempMax': Extreme, 'outTempMin': Extreme, 'inTempMax': Extreme, 'inTempMin': Extreme,
+                  'SLPMax':     Extreme, 'SLPMin':     Extreme, 'windAvg':   Average, 'gustMax':   Gust,
+                  'peakSun':    PeakSun, 'rainAccum':  Accumulation,         'strikeCount':   Accumulation}
+
+
+def restore(key, values):
+
+    """ Convert a derived observation read back from the checkpoint file into
+    its record type
+
+    INPUTS:
+        key                 Derived observation name
+        values              Derived observation as a list or dictionary
+
+    OUTPUT:
+        record              Derived observation record
+    """
+
+    if key in derive_records and isinstance(values, list):
+        return derive_records[key](*values)
+    if key in derive_records and isinstance(values, dict):
+        return {period: derive_records[key](*value) if isinstance(value, list) else value
+                for period, value in values.items()}
+    return values
@@ -0,0 +1,318 @@
+""" Rebroadcasts the display values of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations to other consoles, so that
+several consoles can share a single connection service and observation parser.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The relay server is enabled on the console that receives the observations by
+setting [System] RelayPort, and is bound to [System] RelayHost (127.0.0.1 by
+default; 0.0.0.0 to serve consoles on the LAN). Other consoles subscribe by
+selecting the Relay connection type with RelayHost set to the address of the
+relay server. The relay server refuses to start on an address other than the
+loopback address unless [System] RelayKey is set.
+
+Display values are sent over TCP as one JSON object per line. When a RelayKey
+is set, each subscriber must first answer a challenge with the HMAC-SHA256 of
+the challenge keyed with the RelayKey. A new subscriber then receives a full
+snapshot of each display category, followed by only the values that have
+changed. Each subscriber is handled by its own thread, and a subscriber that
+falls too far behind is disconnected and receives a new full snapshot when it
+reconnects.
+"""
+
+# Import required library modules
+from lib.system             import system
+from lib                    import metrics
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+
+# Import required system modules
+import ipaddress
+import threading
+import socket
+import queue
+import hmac
+import json
+import os
+
+# Define relay variables
+CATEGORIES    = ['Obs', 'Met', 'Sager', 'Status']
+QUEUE_LENGTH  = 256
+TIMEOUT       = 10
+LINE_LENGTH   = 1024
+last_display  = {category: {} for category in CATEGORIES}
+subscribers   = []
+lock          = threading.Lock()
+listener      = None
+
+
+def encode(message):
+
+    """ Encode a relay message as a line of JSON
+
+    INPUTS:
+        message             Relay message dictionary
+
+    OUTPUT:
+        line                Encoded message
+    """
+
+    return (json.dumps(message, separators=(',', ':'), default=str) + '\n').encode()
+
+
+def digest(key, challenge):
+
+    """ Return the response to an authentication challenge
+
+    INPUTS:
+        key                 Relay authentication key
+        challenge           Challenge sent by the relay server
+
+    OUTPUT:
+        digest              HMAC-SHA256 of the challenge keyed with the key
+    """
+
+    return hmac.new(key.encode(), challenge.encode(), 'sha256').hexdigest()
+
+
+def is_loopback(host):
+
+    """ Return True if a relay server address only accepts connections from
+    the console itself
+
+    INPUTS:
+        host                Relay server bind address
+    """
+
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# ==============================================================================
+# DEFINE 'subscriber' CLASS
+# ==============================================================================
+class subscriber():
+
+    """ Authenticates one subscribed console and sends it display messages from
+    a dedicated thread, so that a slow or stalled subscriber never blocks the
+    observation pipeline or other subscribers
+
+    INPUTS:
+        connection          Subscriber socket
+        key                 Relay authentication key
+    """
+
+    def __init__(self, connection, key):
+        self.connection = connection
+        self.key        = key
+        self.messages   = queue.Queue(maxsize=QUEUE_LENGTH)
+        self.thread     = threading.Thread(target=self.run, name='RelaySubscriber', daemon=True)
+
+    def send(self, message):
+
+        """ Queue encoded display message to be sent to the subscriber
+
+        INPUTS:
+            message             Encoded display message
+
+        OUTPUT:
+            queued              True if the message was queued, False if the
+                                subscriber has fallen too far behind
+        """
+
+        try:
+            self.messages.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def authenticate(self):
+
+        """ Challenge the subscriber to prove it has the relay authentication
+        key
+
+        OUTPUT:
+            authenticated       True if the subscriber is authenticated
+        """
+
+        if not self.key:
+            self.connection.sendall(encode({'challenge': None}))
+            return True
+        challenge = os.urandom(16).hex()
+        self.connection.sendall(encode({'challenge': challenge}))
+        response = self.connection.makefile('rb').readline(LINE_LENGTH)
+        try:
+            answer = json.loads(response)['digest']
+        except (ValueError, KeyError, TypeError):
+            return False
+        return isinstance(answer, str) and hmac.compare_digest(answer, digest(self.key, challenge))
+
+    def run(self):
+
+        """ Authenticate the subscriber, queue a full snapshot of the current
+        display values and send display messages until disconnected
+        """
+
+        try:
+            self.connection.settimeout(TIMEOUT)
+            if not self.authenticate():
+                Logger.warning(f'Relay: {system().log_time()} - Subscriber rejected')
+                self.connection.close()
+                return
+            self.connection.settimeout(None)
+        except OSError as error:
+            Logger.warning(f'Relay: {system().log_time()} - Subscriber rejected: {error}')
+            self.connection.close()
+            return
+        with lock:
+            for category in CATEGORIES:
+                ob_type = 'obs_reset' if category == 'Obs' else None
+                self.send(encode({'category': category, 'values': last_display[category], 'ob_type': ob_type}))
+            subscribers.append(self)
+            metrics.gauge('relay_subscribers', len(subscribers))
+        Logger.info(f'Relay: {system().log_time()} - Subscriber connected')
+        while True:
+            message = self.messages.get()
+            if message is None:
+                break
+            try:
+                self.connection.sendall(message)
+            except OSError:
+                remove(self)
+                break
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self.messages.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self.messages.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+def start(config):
+
+    """ Start the relay server if [System] RelayPort is set
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    global listener
+    port = config['System'].get('RelayPort', '')
+    if not port or listener is not None or config['System']['Connection'] == 'Relay':
+        return
+    host = config['System'].get('RelayHost', '127.0.0.1')
+    key  = config['System'].get('RelayKey', '')
+    if not key and not is_loopback(host):
+        Logger.error(f'Relay: {system().log_time()} - RelayKey required to serve display values on {host}')
+        return
+    try:
+        listener = socket.create_server((host, int(port)))
+    except (OSError, ValueError) as error:
+        Logger.warning(f'Relay: {system().log_time()} - Unable to start relay server: {error}')
+        return
+    threading.Thread(target=accept, args=[listener, key], name='Relay', daemon=True).start()
+    Logger.info(f'Relay: {system().log_time()} - Serving display values on {host}:{port}')
+
+
+def stop():
+
+    """ Stop the relay server and disconnect all subscribers
+    """
+
+    global listener
+    if listener is None:
+        return
+    listener.close()
+    listener = None
+    with lock:
+        for client in subscribers:
+            client.close()
+        subscribers.clear()
+    metrics.gauge('relay_subscribers', 0)
+
+
+def accept(server, key):
+
+    """ Accept subscriber connections and start a thread for each subscriber
+
+    INPUTS:
+        server              Relay server socket
+        key                 Relay authentication key
+    """
+
+    while True:
+        try:
+            connection, address = server.accept()
+        except OSError:
+            break
+        subscriber(connection, key).thread.start()
+
+
+def remove(client):
+
+    """ Remove a subscriber from the relay server
+
+    INPUTS:
+        client              Subscriber to remove
+    """
+
+    with lock:
+        if client in subscribers:
+            subscribers.remove(client)
+            client.close()
+            metrics.gauge('relay_subscribers', len(subscribers))
+            Logger.info(f'Relay: {system().log_time()} - Subscriber disconnected')
+
+
+def publish(category, values, ob_type=None):
+
+    """ Send the display values that have changed since the previous message
+    to all subscribers
+
+    INPUTS:
+        category            Display category (Obs, Met, Sager or Status)
+        values              Dictionary of current display values
+        ob_type             Latest observation message type
+    """
+
+    if listener is None:
+        return
+    with lock:
+        last = last_display[category]
+        snapshot = {}
+        for key, value in list(values.items()):
+            if key not in last or last[key] != value:
+                snapshot[key] = value
+                last[key] = value
+        if not snapshot and ob_type is None:
+            return
+        message = encode({'category': category, 'values': snapshot, 'ob_type': ob_type})
+        lagging = [client for client in subscribers if not client.send(message)]
+    for client in lagging:
+        Logger.warning(f'Relay: {system().log_time()} - Subscriber too slow; disconnecting')
+        remove(client)
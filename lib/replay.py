@@ -0,0 +1,125 @@
+""" Records and replays the observation messages received by the Raspberry Pi
+Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Captures are stored as JSON lines. Each line holds the time the message was
+received, the connection it was received on ('udp' or 'websocket') and the
+decoded message:
+
+    {"time": 1700000000.123, "source": "udp", "message": {"type": "obs_st", ...}}
+"""
+
+# Import required Kivy modules
+from kivy.logger import Logger
+
+# Import required system modules
+import threading
+import json
+import time
+
+
+# ==============================================================================
+# DEFINE 'capture_writer' CLASS
+# ==============================================================================
+class capture_writer():
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a')
+
+    def record(self, source, message):
+
+        """ Append received message to the capture file
+
+        INPUTS:
+            source              Connection message was received on
+            message             Decoded message
+        """
+
+        line = json.dumps({'time': time.time(), 'source': source, 'message': message}, separators=(',', ':'))
+        with self.lock:
+            try:
+                self.file.write(line + '\n')
+                self.file.flush()
+            except (OSError, ValueError) as error:
+                Logger.warning(f'Capture: Unable to record message: {error}')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def open_capture(config):
+
+    """ Open the capture file specified in the configuration file
+
+    INPUTS:
+        config              Console configuration object
+
+    OUTPUT:
+        capture             capture_writer object, or None when message
+                            capture is disabled
+    """
+
+    path = config['System'].get('CaptureFile', '')
+    if not path:
+        return None
+    try:
+        return capture_writer(path)
+    except OSError as error:
+        Logger.warning(f'Capture: Unable to open capture file {path}: {error}')
+        return None
+
+
+def read_capture(path):
+
+    """ Read messages from a capture file in the order they were received
+
+    INPUTS:
+        path                Path to capture file
+
+    OUTPUT:
+        record              Generator of (time, source, message) tuples
+    """
+
+    with open(path) as capture_file:
+        for line_number, line in enumerate(capture_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield record['time'], record['source'], record['message']
+            except (ValueError, KeyError):
+                Logger.warning(f'Capture: Skipping malformed record on line {line_number}')
+
+
+# ==============================================================================
+# DEFINE 'virtual_clock' CLASS
+# ==============================================================================
+class virtual_clock():
+
+    """ Clock source that returns the receive time of the message currently
+    being replayed. Install with wall_clock.set_source(virtual_clock)
+    """
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        self.now = now
@@ -17,6 +17,8 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required libray modules
 from lib.system  import system
+from lib         import wall_clock
+from lib         import metrics
 
 # Import required Kivy modules
 from kivy.logger import Logger
@@ -25,6 +27,86 @@ from kivy.logger import Logger
 from datetime    import datetime, timedelta
 import requests
 import pytz
+import time
+
+
+# Define default WeatherFlow API base URLs
+REST_URL      = 'https://swd.weatherflow.com/swd/rest'
+WEBSOCKET_URL = 'wss://swd.weatherflow.com/swd/data'
+
+
+def rest_url(Config):
+
+    """ Returns the WeatherFlow REST API base URL specified in the configuration
+    file. Point RestURL at a local stand-in server to run without the live
+    WeatherFlow service
+
+    INPUTS:
+        Config              Station configuration
+
+    OUTPUT:
+        URL                 REST API base URL without trailing slash
+    """
+
+    return (Config['System'].get('RestURL', '') or REST_URL).rstrip('/')
+
+
+def websocket_url(Config):
+
+    """ Returns the WeatherFlow Websocket base URL specified in the
+    configuration file
+
+    INPUTS:
+        Config              Station configuration
+
+    OUTPUT:
+        URL                 Websocket base URL without trailing slash
+    """
+
+    return (Config['System'].get('WebsocketURL', '') or WEBSOCKET_URL).rstrip('/')
+
+
+def get(URL, Config, endpoint):
+
+    """ Send a GET request to the WeatherFlow REST API, recording the request
+    latency and result in the console metrics
+
+    INPUTS:
+        URL                 Request URL
+        Config              Station configuration
+        endpoint            Name of API request for metrics
+
+    OUTPUT:
+        Response            API response, or None if the request failed
+    """
+
+    start = time.perf_counter()
+    try:
+        Response = requests.get(URL, timeout=int(Config['System']['Timeout']))
+        result = str(Response.status_code)
+    except Exception:
+        Response = None
+        result = 'error'
+    metrics.observe('rest_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+    metrics.inc('rest_requests_total', endpoint=endpoint, result=result)
+    return Response
+
+
+def decode(Response):
+
+    """ Decodes the JSON content of the API response once. Later calls to
+    Response.json() return the same decoded content without decoding it again
+
+    INPUTS:
+        Response        Response from API request
+
+    OUTPUT:
+        Content         Decoded JSON content of response
+    """
+
+    Content = Response.json()
+    Response.json = lambda **kwargs: Content
+    return Content
 
 
 def verify_response(Response, Field):
@@ -44,11 +126,10 @@ def verify_response(Response, Field):
     if not Response.ok:
         return False
     try:
-        Response.json()
+        Response = decode(Response)
     except ValueError:
         return False
     else:
-        Response = Response.json()
         if isinstance(Response, dict):
             if 'SUCCESS' in Response['status']['status_message'] and Field in Response and Response[Field] is not None:
                 return True
@@ -76,12 +157,9 @@ def last_6h(Device, endTime, Config):
     startTime = endTime - int(3600 * 6)
 
     # Download WeatherFlow data for last three hours
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        api_data = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        api_data = None
+    api_data = get(URL, Config, 'last_6h')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -110,12 +188,9 @@ def last_24h(Device, endTime, Config):
     startTime = endTime - int(3600 * 24)
 
     # Download WeatherFlow data for last three hours
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'last_24h')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -126,6 +201,35 @@ def last_24h(Device, endTime, Config):
     return apiData
 
 
+def interval(Device, startTime, endTime, Config):
+
+    """ API Request for data between two times from a WeatherFlow Smart Home
+    Weather Station device
+
+    INPUTS:
+        Device              Device ID
+        startTime           Start time of window as a UNIX timestamp
+        endTime             End time of window as a UNIX timestamp
+        Config              Station configuration
+
+    OUTPUT:
+        Response            API response containing observations in window
+    """
+
+    # Download WeatherFlow data between start and end times
+    Template = rest_url(Config) + '/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
+    URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
+    apiData = get(URL, Config, 'interval')
+
+    # Verify response
+    if Config['Keys']['WeatherFlow']:
+        if apiData is None or not verify_response(apiData, 'obs'):
+            Logger.warning(f'request_api: {system().log_time()} - interval call failed')
+
+    # Return observations between start and end times
+    return apiData
+
+
 def today(Device, Config):
 
     """ API Request for data from the current calendar day in the station
@@ -141,7 +245,7 @@ def today(Device, Config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
+    Now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Convert midnight today in Station timezone to midnight today in UTC.
     # Convert UTC time into UNIX timestamp.
@@ -152,12 +256,9 @@ def today(Device, Config):
     endTime = int(Now.timestamp())
 
     # Download WeatherFlow data
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'today')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -183,7 +284,7 @@ def yesterday(Device, Config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
+    Now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Convert midnight yesterday in Station timezone to midnight yesterday in
     # UTC. Convert UTC time into UNIX timestamp
@@ -196,12 +297,9 @@ def yesterday(Device, Config):
     endTime = int(Today.timestamp()) - 1
 
     # Download WeatherFlow data
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=a&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'yesterday')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -227,7 +325,7 @@ def month(Device, Config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
+    Now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Convert start of current month in Station timezone to start of
     # current month in UTC. Convert UTC time into UNIX timestamp
@@ -247,12 +345,9 @@ def month(Device, Config):
         endTime = startTime + 1
 
     # Download WeatherFlow data
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=e&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=e&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'month')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -278,7 +373,7 @@ def year(Device, Config):
 
     # Define current time in station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
+    Now = wall_clock.now(pytz.utc).astimezone(Tz)
 
     # Convert start of current year in Station timezone to start of current year
     # in UTC. Convert UTC time into time timestamp
@@ -298,12 +393,9 @@ def year(Device, Config):
         endTime = startTime + 1
 
     # Download WeatherFlow data
-    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?bucket=e&time_start={}&time_end={}&token={}'
+    Template = rest_url(Config) + '/observations/device/{}?bucket=e&time_start={}&time_end={}&token={}'
     URL = Template.format(Device, startTime, endTime, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'year')
 
     # Verify response
     if Config['Keys']['WeatherFlow']:
@@ -328,12 +420,9 @@ def station_meta_data(Station, Config):
     """
 
     # Download station meta data
-    Template = 'https://swd.weatherflow.com/swd/rest/stations/{}?token={}'
+    Template = rest_url(Config) + '/stations/{}?token={}'
     URL = Template.format(Station, Config['Keys']['WeatherFlow'])
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'station_meta_data')
 
     # Verify response
     if apiData is None or not verify_response(apiData, 'obs'):
@@ -355,13 +444,9 @@ def forecast(Config):
     """
 
     # Download WeatherFlow forecast
-    Template = 'https://swd.weatherflow.com/swd/rest/better_forecast?token={}&station_id={}&lat={}&lon={}'
+    Template = rest_url(Config) + '/better_forecast?token={}&station_id={}&lat={}&lon={}'
     URL = Template.format(Config['Keys']['WeatherFlow'], Config['Station']['StationID'], Config['Station']['Latitude'], Config['Station']['Longitude'])
-    print(URL)
-    try:
-        apiData = requests.get(URL, timeout=int(Config['System']['Timeout']))
-    except Exception:
-        apiData = None
+    apiData = get(URL, Config, 'forecast')
 
     # Verify response
     if apiData is None or not verify_response(apiData, 'forecast'):
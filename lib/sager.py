@@ -25,6 +25,8 @@ from lib.request_api import weatherflow_api, checkwx_api
 from lib.system      import system
 from lib             import derived_variables as derive
 from lib             import properties
+from lib             import metrics
+from lib             import relay
 
 # Import required Kivy modules
 from kivy.logger import Logger
@@ -83,7 +85,8 @@ class sager_forecast():
         6 hours. Reschedule fetch_forecast in 60 minutes
         """
 
-        # Update display
+        # Record failure and update display
+        metrics.inc('sager_forecasts_total', result='failure')
         self.update_display()
 
         # Schedule new Sager forecast to be generated in 60 minutes.
@@ -244,16 +247,18 @@ class sager_forecast():
 
         # Define required pressure variables for the Sager Weathercaster
         # Forecast
-        Pres6 = self.device_obs['Pres'][:15]
-        Pres  = self.device_obs['Pres'][-15:]
-        if np.all(np.isnan(Pres6)) or np.all(np.isnan(Pres)):
+        Pres6   = self.device_obs['Pres'][:15]
+        Pres    = self.device_obs['Pres'][-15:]
+        reducer = derive.station_reducer(pres_device, self.app.config)
+        if np.all(np.isnan(Pres6)) or np.all(np.isnan(Pres)) or reducer is None:
             self.sager_data['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing pressure data. Forecast will be regenerated in 60 minutes'
             self.sager_data['Issued']   = sched_time.strftime(time_format)
             Clock.schedule_once(self.fail_forecast)
             return
         else:
-            self.sager_data['Pres6'] = derive.SLP([np.nanmean(Pres6).tolist(), 'mb'], pres_device, self.app.config)[0]
-            self.sager_data['Pres']  = derive.SLP([np.nanmean(Pres).tolist(), 'mb'],  pres_device, self.app.config)[0]
+            SLP = reducer(np.array([np.nanmean(Pres6), np.nanmean(Pres)])).tolist()
+            self.sager_data['Pres6'] = SLP[0]
+            self.sager_data['Pres']  = SLP[1]
 
         # Define required temperature variables for the Sager Weathercaster
         # Forecast
@@ -281,6 +286,7 @@ class sager_forecast():
         if self.sager_data['Dial'] is not None:
             self.get_forecast_text()
             self.sager_data['Issued']   = sched_time.strftime(time_format)
+            metrics.inc('sager_forecasts_total', result='success')
             Clock.schedule_once(self.schedule_forecast)
         else:
             self.sager_data['Forecast'] = '[color=f05e40ff]ERROR:[/color] Forecast will be regenerated in 60 minutes'
@@ -293,6 +299,16 @@ class sager_forecast():
         ReferenceErrors to prevent console crashing
         """
 
+        # Rebroadcast Sager Forecast variables to consoles subscribed to the
+        # relay server
+        relay.publish('Sager', self.sager_data)
+
+        # Forward Sager Forecast variables to the user interface process when
+        # running as a separate data process
+        if hasattr(self.app, 'send_display'):
+            self.app.send_display('Sager', self.sager_data)
+            return
+
         # Update display values with new derived observations
         reference_error = False
         for Key, Value in list(self.sager_data.items()):
@@ -310,7 +310,7 @@ def JSON(Section):
                   'desc': 'Set the maximum temperature for "Feeling very hot"', 'section': 'FeelsLike', 'key': 'VeryHot'}
                  ]
     elif 'System' in Section:
-        Data =  [{'type': 'FixedOptions', 'options': ['Websocket', 'UDP'], 'title': 'Connection',
+        Data =  [{'type': 'FixedOptions', 'options': ['Websocket', 'UDP', 'Dual', 'Relay'], 'title': 'Connection',
                   'desc': 'Set the console connection type', 'section': 'System', 'key': 'Connection'},
                  {'type': 'bool', 'desc': 'Use the WeatherFlow REST API to fetch historical data & forecast',
                   'title': 'REST API', 'section': 'System', 'key': 'rest_api'},
@@ -0,0 +1,95 @@
+""" Calculates and caches the daily solar events at the station location for the
+Raspberry Pi Python console for WeatherFlow Tempest and Smart Home Weather
+stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Dawn, sunrise, sunset and dusk are calculated once per station-local day and
+shared by the sunrise/sunset panel and the peak sun hours calculation.
+"""
+
+# Import required modules
+from lib         import wall_clock
+from collections import namedtuple
+from datetime    import datetime, timedelta
+import threading
+import ephem
+import pytz
+
+# Solar events of a station-local day as timezone aware UTC datetimes
+day_events = namedtuple('day_events', ['date', 'dawn', 'sunrise', 'sunset', 'dusk'])
+
+# Define solar event cache keyed by station location and local date
+CACHE_DAYS = 3
+cache      = {}
+lock       = threading.Lock()
+
+
+def calculate(latitude, longitude, date, Tz):
+
+    """ Calculate dawn, sunrise, sunset and dusk for a station-local day
+
+    INPUTS:
+        latitude            Station latitude
+        longitude           Station longitude
+        date                Station-local date
+        Tz                  Station timezone
+
+    OUTPUT:
+        events              day_events tuple
+    """
+
+    # Set Observer time to local midnight in UTC. Set pressure to 0 to match
+    # the United States Naval Observatory Astronomical Almanac
+    observer          = ephem.Observer()
+    observer.lat      = str(latitude)
+    observer.lon      = str(longitude)
+    observer.pressure = 0
+    midnight          = Tz.localize(datetime(date.year, date.month, date.day)).astimezone(pytz.utc)
+    observer.date     = midnight.strftime('%Y/%m/%d %H:%M:%S')
+    sun               = ephem.Sun()
+
+    # Calculate Dawn, Sunrise, Sunset and Dusk times in UTC
+    observer.horizon = '-6'
+    dawn    = observer.next_rising(sun, use_center=True)
+    dusk    = observer.next_setting(sun, use_center=True)
+    observer.horizon = '-0:34'
+    sunrise = observer.next_rising(sun)
+    sunset  = observer.next_setting(sun)
+    return day_events(date, *[pytz.utc.localize(event.datetime()) for event in (dawn, sunrise, sunset, dusk)])
+
+
+def events(config, date=None):
+
+    """ Return the solar events of a station-local day, calculating them only
+    the first time each day is requested
+
+    INPUTS:
+        config              Station configuration
+        date                Station-local date. Defaults to today
+
+    OUTPUT:
+        events              day_events tuple
+    """
+
+    Tz = pytz.timezone(config['Station']['Timezone'])
+    if date is None:
+        date = wall_clock.now(pytz.utc).astimezone(Tz).date()
+    key = (config['Station']['Latitude'], config['Station']['Longitude'], config['Station']['Timezone'], date)
+    with lock:
+        if key not in cache:
+            cache[key] = calculate(key[0], key[1], date, Tz)
+            for old_key in [old_key for old_key in cache if old_key[3] < date - timedelta(days=CACHE_DAYS)]:
+                del cache[old_key]
+        return cache[key]
@@ -0,0 +1,140 @@
+""" Handles the secondary stations monitored by the Raspberry Pi Python console
+for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The [Station] section of the configuration file holds the primary station,
+which is shown on the display and is selected with the station switcher.
+Further stations are described by [Station:<name>] sections using the same
+keys. Each secondary station has its own observation parser, so derived
+observations are calculated and checkpointed for every station, but only the
+primary station is displayed. Latitude, Longitude, Elevation and Timezone
+default to those of the primary station when they are not specified.
+"""
+
+# Import required library modules
+from lib.observation_parser import obs_parser
+from lib.system             import system
+from lib                    import wall_clock
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+
+# Import required system modules
+import os
+
+# Define configuration section prefix of secondary stations
+SECTION_PREFIX = 'Station:'
+
+# Define station keys of each secondary station and the keys that default to
+# those of the primary station
+STATION_KEYS  = ['StationID', 'TempestID', 'TempestSN', 'SkyID', 'SkySN', 'OutAirID', 'OutAirSN',
+                 'InAirID', 'InAirSN', 'TempestHeight', 'SkyHeight', 'OutAirHeight', 'Name']
+LOCATION_KEYS = ['Latitude', 'Longitude', 'Elevation', 'Timezone']
+
+
+def names(config):
+
+    """ Return the names of the secondary stations in the configuration
+
+    INPUTS:
+        config              Console configuration object
+
+    OUTPUT:
+        names               List of secondary station names
+    """
+
+    return [section[len(SECTION_PREFIX):] for section in config if section.startswith(SECTION_PREFIX)]
+
+
+# ==============================================================================
+# DEFINE 'station_config' CLASS
+# ==============================================================================
+class station_config():
+
+    """ View of the console configuration in which the Station section is
+    replaced by the section of a secondary station
+
+    INPUTS:
+        config              Console configuration object
+        name                Secondary station name
+    """
+
+    def __init__(self, config, name):
+        self.config  = config
+        self.name    = name
+        self.station = {key: '' for key in STATION_KEYS}
+        self.station.update({key: config['Station'][key] for key in LOCATION_KEYS if key in config['Station']})
+        self.station.update(config[SECTION_PREFIX + name])
+
+    def __getitem__(self, section):
+        if section == 'Station':
+            return self.station
+        return self.config[section]
+
+    def __contains__(self, section):
+        return section in self.config
+
+    def __iter__(self):
+        return iter(self.config)
+
+
+# ==============================================================================
+# DEFINE 'station_parser' CLASS
+# ==============================================================================
+class station_parser(obs_parser):
+
+    """ Observation parser for a secondary station. Derived observations are
+    calculated and checkpointed as for the primary station, but are not
+    displayed
+
+    INPUTS:
+        name                Secondary station name
+        config              Console configuration object
+    """
+
+    def __init__(self, name, config):
+        self.name    = name
+        self.updated = {}
+        super().__init__(station_config(config, name))
+        Logger.info(f'obs_parser: {system().log_time()} - Monitoring station {name}')
+
+    def checkpoint_path(self, config):
+
+        """ Return the checkpoint file of the secondary station, which is
+        stored alongside the checkpoint file of the primary station
+
+        INPUTS:
+            config              Console configuration object
+
+        OUTPUT:
+            checkpoint_file     Checkpoint file name
+        """
+
+        checkpoint_file = super().checkpoint_path(config)
+        if not checkpoint_file:
+            return checkpoint_file
+        root, extension = os.path.splitext(checkpoint_file)
+        return f'{root}.{self.name}{extension}'
+
+    def update_display(self, ob_type):
+
+        """ Record the time the derived observations of the secondary station
+        were last updated
+
+        INPUTS:
+            ob_type             Latest message type
+        """
+
+        self.updated[ob_type] = wall_clock.time()
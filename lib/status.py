@@ -17,7 +17,10 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required library modules
 from lib.system              import system
+from lib.request_api         import weatherflow_api
+from lib                     import device_status
 from lib                     import properties
+from lib                     import metrics
 
 # Import required Kivy modules
 from kivy.network.urlrequest import UrlRequest
@@ -64,7 +67,7 @@ class station(Widget):
             Station ID
         """
 
-        URL = 'https://swd.weatherflow.com/swd/rest/stations?token=' + self.app.config['Keys']['WeatherFlow']
+        URL = weatherflow_api.rest_url(self.app.config) + '/stations?token=' + self.app.config['Keys']['WeatherFlow']
         UrlRequest(URL,
                    on_success=self.parse_hub_firmware,
                    on_failure=self.fail_hub_firmware,
@@ -76,6 +79,8 @@ class station(Widget):
 
         """ Parse hub firmware_revision from response returned by request.url
         """
+
+        metrics.inc('station_requests_total', request='hub_firmware', result='success')
         try:
             for station in response['stations']:
                 if station['station_id'] == int(self.app.config['Station']['StationID']):
@@ -93,6 +98,7 @@ class station(Widget):
             request.url
         """
 
+        metrics.inc('station_requests_total', request='hub_firmware', result='failure')
         self.status_data['hub_firmware'] = '[color=d73027ff]Error[/color]'
 
     def get_observation_count(self):
@@ -107,7 +113,7 @@ class station(Widget):
 
         # Get device observation counts
         url_list  = []
-        template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&token={}'
+        template = weatherflow_api.rest_url(self.app.config) + '/observations/device/{}?time_start={}&time_end={}&token={}'
         if self.app.config['Station']['TempestID']:
             url_list.append(template.format(self.app.config['Station']['TempestID'], start_time, end_time, self.app.config['Keys']['WeatherFlow']))
         if self.app.config['Station']['SkyID']:
@@ -128,6 +134,7 @@ class station(Widget):
 
         """ Parse observation count from response returned by request.url """
 
+        metrics.inc('station_requests_total', request='observation_count', result='success')
         if 'Station' in self.app.config:
             if 'obs' in response and response['obs'] is not None:
                 if str(response['device_id']) == self.app.config['Station']['TempestID']:
@@ -146,6 +153,7 @@ class station(Widget):
             request.url
         """
 
+        metrics.inc('station_requests_total', request='observation_count', result='failure')
         device_id = re.search(r'device\/(.*)\?', request.url).group(1)
         if device_id == self.app.config['Station']['TempestID']:
             self.status_data['tempest_ob_count'] = '[color=d73027ff]Error[/color]'
@@ -278,6 +286,9 @@ class station(Widget):
             self.status_data['in_air_voltage']     = '{:.2f}'.format(device_voltage)
             self.status_data['in_air_status']      = device_status
 
+        # Apply hub and device status received over UDP
+        self.set_local_status()
+
         # Set hub status (i.e. station_status) based on device status
         device_status_list = []
         if self.app.config['Station']['TempestID'] and 'obs_st' in self.app.CurrentConditions.Obs:
@@ -296,12 +307,48 @@ class station(Widget):
             self.status_data['station_status'] = '[color=9aba2fff]Online[/color]'
         elif any('Unknown' in status for status in device_status_list):
             self.status_data['station_status'] = '[color=ef6c00ff]Unknown[/color]'
+        elif all('Online' in status or 'Mode' in status or 'Fault' in status for status in device_status_list):
+            self.status_data['station_status'] = '[color=ef6c00ff]Sensor fault[/color]'
         else:
             self.status_data['station_status'] = '[color=ef6c00ff]Partly Offline[/color]'
 
         # Update display with new status
         self.update_display()
 
+    def set_local_status(self):
+
+        """ Set device sensor faults, signal strength, uptime, battery voltage,
+            observation counts and hub firmware from the hub_status and
+            device_status UDP messages, so that the status panel is complete
+            when the REST API is disabled
+        """
+
+        hub_sn   = None
+        rest_api = self.app.config['System']['rest_api'] == '1'
+        for prefix, device in [('tempest', 'Tempest'), ('sky', 'Sky'), ('out_air', 'OutAir'), ('in_air', 'InAir')]:
+            serial_number = self.app.config['Station'][device + 'SN']
+            if not serial_number or serial_number not in device_status.devices:
+                continue
+            state  = device_status.devices[serial_number]
+            hub_sn = state.hub_sn
+            faults = device_status.sensor_faults(state.sensor_status)
+            if faults and any(status in self.status_data[prefix + '_status'] for status in ['Online', 'Mode']):
+                self.status_data[prefix + '_status'] = '[color=ef6c00ff]Fault[/color]'
+            if state.rssi is not None:
+                self.status_data[prefix + '_rssi'] = f'{state.rssi} dBm'
+            self.status_data[prefix + '_uptime'] = device_status.uptime_text(state.uptime)
+            if state.voltage is not None and (not rest_api or self.status_data[prefix + '_voltage'] == '-'):
+                self.status_data[prefix + '_voltage'] = '{:.2f}'.format(state.voltage)
+            if not rest_api:
+                self.status_data[prefix + '_ob_count'] = str(device_status.observation_count(serial_number))
+        if hub_sn in device_status.hubs:
+            hub = device_status.hubs[hub_sn]
+            if hub.rssi is not None:
+                self.status_data['hub_rssi'] = f'{hub.rssi} dBm'
+            self.status_data['hub_uptime'] = device_status.uptime_text(hub.uptime)
+            if hub.firmware is not None and (not rest_api or self.status_data['hub_firmware'] in ['-', '[color=d73027ff]Error[/color]']):
+                self.status_data['hub_firmware'] = str(hub.firmware)
+
     def update_display(self):
 
         """ Update display with new Status variables. Catch ReferenceErrors to
@@ -0,0 +1,365 @@
+""" Generates synthetic WeatherFlow observations and forecasts for the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Every value is a deterministic function of the observation time, so the same
+time window always produces the same observations. Field layouts follow the
+WeatherFlow REST API and Websocket/UDP message formats for each device type:
+
+    tempest     obs_st  (22 fields, bucket e 34 fields)
+    sky         obs_sky (17 fields)
+    out_air     obs_air (8 fields)
+    in_air      obs_air (8 fields)
+"""
+
+# Import required system modules
+from datetime import datetime, timedelta, time
+import math
+import pytz
+
+# Define observation message type for each device type
+OB_TYPE = {'tempest': 'obs_st', 'sky': 'obs_sky', 'out_air': 'obs_air', 'in_air': 'obs_air'}
+
+# Define rain and lightning pattern. Rain falls for one hour in every
+# RAIN_PERIOD hours and lightning strikes for one hour in every STRIKE_PERIOD
+# hours
+RAIN_PERIOD   = 17
+RAIN_RATE     = 0.05
+STRIKE_PERIOD = 23
+STRIKE_RATE   = 2
+
+# Define forecast conditions cycle
+CONDITIONS = [('Clear', 'clear-day', 'clear-night'),
+              ('Partly Cloudy', 'partly-cloudy-day', 'partly-cloudy-night'),
+              ('Cloudy', 'cloudy', 'cloudy'),
+              ('Rain Possible', 'possibly-rainy-day', 'possibly-rainy-night'),
+              ('Rain Likely', 'rainy', 'rainy'),
+              ('Windy', 'windy', 'windy')]
+
+
+def cycle(ob_time, period, phase=0):
+
+    """ Returns a sinusoidal cycle between -1 and 1 with the specified period
+
+    INPUTS:
+        ob_time             Observation time as a UNIX timestamp
+        period              Period of cycle in seconds
+        phase               Phase offset of cycle in seconds
+    """
+
+    return math.sin(2 * math.pi * (ob_time - phase) / period)
+
+
+def weather(ob_time):
+
+    """ Returns the synthetic weather at the specified time
+
+    INPUTS:
+        ob_time             Observation time as a UNIX timestamp
+
+    OUTPUT:
+        weather             Dictionary of weather variables in WeatherFlow
+                            API units
+    """
+
+    daylight = max(cycle(ob_time, 86400, 6 * 3600), 0)
+    hour     = int(ob_time // 3600)
+    wind     = 3 + 2 * cycle(ob_time, 5 * 3600)
+    return {'temperature': round(12 + 8 * cycle(ob_time, 86400, 9 * 3600) + 3 * cycle(ob_time, 6 * 86400), 1),
+            'in_temp':     round(20 + 1.5 * cycle(ob_time, 86400, 12 * 3600), 1),
+            'pressure':    round(1008 + 6 * cycle(ob_time, 4 * 86400) + 0.5 * cycle(ob_time, 43200), 1),
+            'humidity':    round(65 - 20 * cycle(ob_time, 86400, 9 * 3600)),
+            'wind_lull':   round(wind * 0.5, 2),
+            'wind_avg':    round(wind, 2),
+            'wind_gust':   round(wind * 1.6, 2),
+            'wind_dir':    int(ob_time / 120) % 360,
+            'lux':         round(100000 * daylight),
+            'uv':          round(8 * daylight, 2),
+            'solar':       round(900 * daylight),
+            'rain':        RAIN_RATE if hour % RAIN_PERIOD == 0 else 0,
+            'strikes':     STRIKE_RATE if hour % STRIKE_PERIOD == 0 else 0,
+            'strike_dist': 12 if hour % STRIKE_PERIOD == 0 else 0}
+
+
+def accumulation(start_time, end_time, hour_period, rate):
+
+    """ Returns the accumulated rain or lightning strike count between two
+    times
+
+    INPUTS:
+        start_time          Start of accumulation window as a UNIX timestamp
+        end_time            End of accumulation window as a UNIX timestamp
+        hour_period         Period in hours between active hours
+        rate                Accumulation per minute during active hours
+
+    OUTPUT:
+        total               Accumulation between start_time and end_time
+    """
+
+    total = 0
+    for hour in range(int(start_time // 3600), int(end_time // 3600) + 1):
+        if hour % hour_period == 0:
+            active_start = max(hour * 3600, start_time)
+            active_end   = min(hour * 3600 + 3600, end_time)
+            if active_end > active_start:
+                total += rate * int((active_end - active_start) // 60)
+    return round(total, 2)
+
+
+def device_ob(device_type, ob_time):
+
+    """ Returns a single synthetic observation in the field layout used by the
+    specified device type
+
+    INPUTS:
+        device_type         Device type (tempest, sky, out_air or in_air)
+        ob_time             Observation time as a UNIX timestamp
+
+    OUTPUT:
+        ob                  Observation list
+    """
+
+    ob_time    = int(ob_time)
+    now        = weather(ob_time)
+    day_start  = ob_time - ob_time % 86400
+    daily_rain = accumulation(day_start, ob_time, RAIN_PERIOD, RAIN_RATE)
+    if device_type == 'tempest':
+        return [ob_time, now['wind_lull'], now['wind_avg'], now['wind_gust'], now['wind_dir'], 3,
+                now['pressure'], now['temperature'], now['humidity'], now['lux'], now['uv'], now['solar'],
+                now['rain'], 1 if now['rain'] else 0, now['strike_dist'], now['strikes'], 2.65, 1,
+                daily_rain, now['rain'], daily_rain, 0]
+    elif device_type == 'sky':
+        return [ob_time, now['lux'], now['uv'], now['rain'], now['wind_lull'], now['wind_avg'],
+                now['wind_gust'], now['wind_dir'], 3.4, 1, now['solar'], daily_rain, 1 if now['rain'] else 0,
+                3, now['rain'], daily_rain, 0]
+    elif device_type == 'out_air':
+        return [ob_time, now['pressure'], now['temperature'], now['humidity'], now['strikes'],
+                now['strike_dist'], 3.4, 1]
+    elif device_type == 'in_air':
+        return [ob_time, now['pressure'], now['in_temp'], 45, 0, 0, 3.4, 1]
+    raise ValueError(f'Unknown device type: {device_type}')
+
+
+def rapid_wind(ob_time):
+
+    """ Returns a single synthetic rapid wind observation
+
+    INPUTS:
+        ob_time             Observation time as a UNIX timestamp
+    """
+
+    now = weather(ob_time)
+    return [int(ob_time), round(now['wind_avg'] * (1 + 0.2 * cycle(ob_time, 30)), 2), now['wind_dir']]
+
+
+def bucket_a(device_type, start_time, end_time, scale=1):
+
+    """ Returns the one minute (bucket a) observations for the specified device
+    type between two times
+
+    INPUTS:
+        device_type         Device type (tempest, sky, out_air or in_air)
+        start_time          Start of window as a UNIX timestamp
+        end_time            End of window as a UNIX timestamp
+        scale               Observations per minute
+
+    OUTPUT:
+        obs                 List of observations
+    """
+
+    step  = max(60 // max(int(scale), 1), 1)
+    first = int(start_time) - int(start_time) % step + step
+    return [device_ob(device_type, ob_time) for ob_time in range(first, int(end_time) + 1, step)]
+
+
+def bucket_e(device_type, start_time, end_time):
+
+    """ Returns the daily (bucket e) observations for the specified device type
+    between two times. Rain and lightning fields hold daily totals
+
+    INPUTS:
+        device_type         Device type (tempest, sky, out_air or in_air)
+        start_time          Start of window as a UNIX timestamp
+        end_time            End of window as a UNIX timestamp
+
+    OUTPUT:
+        obs                 List of observations
+    """
+
+    obs = []
+    first = int(start_time) - int(start_time) % 86400
+    for day_start in range(first, int(end_time) + 1, 86400):
+        ob      = device_ob(device_type, day_start + 43200)
+        ob[0]   = day_start
+        rain    = accumulation(day_start, day_start + 86400, RAIN_PERIOD, RAIN_RATE)
+        strikes = accumulation(day_start, day_start + 86400, STRIKE_PERIOD, STRIKE_RATE)
+        if device_type == 'tempest':
+            ob = ob + [None] * (34 - len(ob))
+            ob[12], ob[24], ob[28] = rain, strikes, rain
+        elif device_type == 'sky':
+            ob[3], ob[11] = rain, rain
+        elif device_type == 'out_air':
+            ob[4] = strikes
+        obs.append(ob)
+    return obs
+
+
+def observations(device_id, device_type, start_time, end_time, bucket='a', scale=1):
+
+    """ Returns a WeatherFlow REST API observations response
+
+    INPUTS:
+        device_id           Device ID
+        device_type         Device type (tempest, sky, out_air or in_air)
+        start_time          Start of window as a UNIX timestamp
+        end_time            End of window as a UNIX timestamp
+        bucket              Observation bucket (a or e)
+        scale               Observations per minute for bucket a
+
+    OUTPUT:
+        response            Dictionary in WeatherFlow REST API format
+    """
+
+    if bucket == 'e':
+        obs, step = bucket_e(device_type, start_time, end_time), 1440
+    else:
+        obs, step = bucket_a(device_type, start_time, end_time, scale), 1
+    return {'status': {'status_code': 0, 'status_message': 'SUCCESS'},
+            'device_id': int(device_id),
+            'type': OB_TYPE[device_type],
+            'source': 'db',
+            'bucket_step_minutes': step,
+            'obs': obs or None}
+
+
+def message(device_id, device_type, ob_time):
+
+    """ Returns a WeatherFlow Websocket observation message
+
+    INPUTS:
+        device_id           Device ID
+        device_type         Device type (tempest, sky, out_air, in_air or
+                            rapid_wind)
+        ob_time             Observation time as a UNIX timestamp
+    """
+
+    if device_type == 'rapid_wind':
+        return {'type': 'rapid_wind', 'device_id': int(device_id), 'ob': rapid_wind(ob_time)}
+    return {'type': OB_TYPE[device_type], 'device_id': int(device_id), 'source': 'cache',
+            'obs': [device_ob(device_type, ob_time)]}
+
+
+def forecast(now, timezone, scale=1):
+
+    """ Returns a WeatherFlow BetterForecast API response
+
+    INPUTS:
+        now                 Current time as a UNIX timestamp
+        timezone            Station timezone
+        scale               Multiplier for the number of forecast days
+
+    OUTPUT:
+        response            Dictionary in WeatherFlow REST API format
+    """
+
+    Tz     = pytz.timezone(timezone)
+    days   = 10 * max(int(scale), 1)
+    start  = int(now) - int(now) % 3600
+    hourly = []
+    for hour_time in range(start, start + days * 24 * 3600, 3600):
+        local    = datetime.fromtimestamp(hour_time, pytz.utc).astimezone(Tz)
+        current  = weather(hour_time)
+        day      = 6 <= local.hour < 18
+        name, day_icon, night_icon = CONDITIONS[(hour_time // (6 * 3600)) % len(CONDITIONS)]
+        hourly.append({'time': hour_time,
+                       'conditions': name,
+                       'icon': day_icon if day else night_icon,
+                       'air_temperature': current['temperature'],
+                       'sea_level_pressure': current['pressure'],
+                       'relative_humidity': current['humidity'],
+                       'precip': current['rain'] * 60,
+                       'precip_probability': 60 if 'Rain' in name else 0,
+                       'precip_type': 'rain',
+                       'wind_avg': current['wind_avg'],
+                       'wind_direction': current['wind_dir'],
+                       'wind_gust': current['wind_gust'],
+                       'uv': current['uv'],
+                       'feels_like': current['temperature'],
+                       'local_hour': local.hour,
+                       'local_day': local.day})
+    daily = []
+    today = datetime.fromtimestamp(start, Tz).date()
+    for day_index in range(days):
+        day_start = Tz.localize(datetime.combine(today + timedelta(days=day_index), time()))
+        day_time  = int(day_start.timestamp())
+        temps     = [weather(day_time + hour * 3600)['temperature'] for hour in range(24)]
+        name, day_icon, _ = CONDITIONS[day_index % len(CONDITIONS)]
+        daily.append({'day_start_local': day_time,
+                      'day_num': day_start.day,
+                      'month_num': day_start.month,
+                      'conditions': name,
+                      'icon': day_icon,
+                      'sunrise': day_time + 6 * 3600,
+                      'sunset': day_time + 18 * 3600,
+                      'air_temp_high': max(temps),
+                      'air_temp_low': min(temps),
+                      'precip_probability': 60 if 'Rain' in name else 0,
+                      'precip_icon': 'chance-rain',
+                      'precip_type': 'rain'})
+    return {'status': {'status_code': 0, 'status_message': 'SUCCESS'},
+            'timezone': timezone,
+            'units': {'units_temp': 'c', 'units_wind': 'mps', 'units_precip': 'mm',
+                      'units_pressure': 'mb', 'units_distance': 'km'},
+            'current_conditions': dict(hourly[0], time=int(now)),
+            'forecast': {'daily': daily, 'hourly': hourly}}
+
+
+def station(station_id, devices, latitude, longitude, timezone, elevation):
+
+    """ Returns the WeatherFlow REST API station meta data for a synthetic
+    station
+
+    INPUTS:
+        station_id          Station ID
+        devices             Dictionary of device IDs keyed by device type
+        latitude            Station latitude
+        longitude           Station longitude
+        timezone            Station timezone
+        elevation           Station elevation in metres
+
+    OUTPUT:
+        station             Dictionary in WeatherFlow REST API format
+    """
+
+    device_codes = {'tempest': 'ST', 'sky': 'SK', 'out_air': 'AR', 'in_air': 'AR'}
+    device_list  = [{'device_id': int(station_id) + 1, 'device_type': 'HB', 'serial_number': 'HB-00000001',
+                     'firmware_revision': '177', 'device_meta': {'name': 'HB-00000001'}}]
+    for device_type, device_id in devices.items():
+        serial = f'{device_codes[device_type]}-{int(device_id):08d}'
+        device_list.append({'device_id': int(device_id),
+                            'device_type': device_codes[device_type],
+                            'serial_number': serial,
+                            'firmware_revision': '165',
+                            'device_meta': {'name': serial,
+                                            'agl': 2 if device_type != 'in_air' else 0,
+                                            'environment': 'indoor' if device_type == 'in_air' else 'outdoor'}})
+    return {'station_id': int(station_id),
+            'name': f'Stand-in {station_id}',
+            'public_name': f'Stand-in {station_id}',
+            'latitude': latitude,
+            'longitude': longitude,
+            'timezone': timezone,
+            'station_meta': {'elevation': elevation},
+            'devices': device_list}
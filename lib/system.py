@@ -17,6 +17,7 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required library modules
 from lib.request_api import github_api
+from lib             import wall_clock
 from lib             import properties
 
 # Import required panels
@@ -125,7 +126,7 @@ class system():
         """
 
         Tz = pytz.timezone(self.app.config['Station']['Timezone'])
-        return datetime.fromtimestamp(time.time(), Tz).strftime('%Y-%m-%d %H:%M:%S')
+        return datetime.fromtimestamp(wall_clock.time(), Tz).strftime('%Y-%m-%d %H:%M:%S')
 
     def update_display(self):
 
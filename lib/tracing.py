@@ -0,0 +1,266 @@
+""" Traces the latency of each observation message received by the Raspberry Pi
+Python console for WeatherFlow Tempest and Smart Home Weather stations, from
+receipt by the connection client until the display is updated.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+Tracing is enabled with [System] Tracing = 1. Each message is split into the
+following spans, each measured from the end of the previous span:
+
+    decode      JSON decode of the received datagram or Websocket frame
+    receive     Hand-over from the receive callback to the message decoder
+    dispatch    Hand-over from the message decoder to the parser thread
+    rest        WeatherFlow REST API requests made by the parser
+    derive      Derived variable calculation
+    format      Unit conversion and formatting
+    display     Hop from the parser thread to the Kivy main thread
+
+Span durations are recorded in log-spaced histograms per observation type,
+which are summarised in the log every REPORT_INTERVAL seconds and shown in the
+tracing overlay.
+"""
+
+# Import required Kivy modules
+from kivy.uix.label import Label
+from kivy.logger    import Logger
+from kivy.clock     import Clock
+
+# Import required system modules
+import threading
+import math
+import time
+
+# Define tracing variables
+ENABLED         = False
+SPANS           = ['decode', 'receive', 'dispatch', 'rest', 'derive', 'format', 'display', 'total']
+REPORT_INTERVAL = 300
+active          = {}
+histograms      = {}
+lock            = threading.Lock()
+last_report     = time.time()
+
+
+# ==============================================================================
+# DEFINE 'histogram' CLASS
+# ==============================================================================
+class histogram():
+
+    """ Fixed size histogram of durations with log-spaced buckets. Each bucket
+    is 20% wider than the previous one, starting at 10 microseconds
+    """
+
+    MINIMUM = 1e-5
+    GROWTH  = math.log(1.2)
+    BUCKETS = 100
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count  = 0
+        self.total  = 0.0
+        self.max    = 0.0
+
+    def add(self, seconds):
+        if seconds <= self.MINIMUM:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / self.MINIMUM) / self.GROWTH) + 1, self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max    = max(self.max, seconds)
+
+    def percentile(self, fraction):
+
+        """ Return the upper edge of the bucket holding the specified
+        percentile
+
+        INPUTS:
+            fraction            Percentile as a fraction between 0 and 1
+
+        OUTPUT:
+            seconds             Duration in seconds
+        """
+
+        if not self.count:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.MINIMUM * math.exp(self.GROWTH * index), self.max)
+        return self.max
+
+
+# ==============================================================================
+# DEFINE 'message_trace' CLASS
+# ==============================================================================
+class message_trace():
+
+    """ Timestamps of the spans completed by a single message
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last  = self.start
+        self.spans = {}
+
+    def mark(self, span):
+        now = time.perf_counter()
+        self.spans[span] = self.spans.get(span, 0) + now - self.last
+        self.last = now
+
+
+def configure(config):
+
+    """ Enable or disable tracing based on the console configuration
+
+    INPUTS:
+        config              Console configuration object
+    """
+
+    global ENABLED
+    ENABLED = config['System'].get('Tracing', '0') == '1'
+
+
+def begin():
+
+    """ Start tracing a newly received message
+
+    OUTPUT:
+        trace               message_trace object, or None when tracing is
+                            disabled
+    """
+
+    return message_trace() if ENABLED else None
+
+
+def mark(trace, span):
+
+    """ Mark the end of a span for a message that has not yet been attached to
+    an observation type
+
+    INPUTS:
+        trace               message_trace object or None
+        span                Name of completed span
+    """
+
+    if trace is not None:
+        trace.mark(span)
+
+
+def attach(ob_type, trace):
+
+    """ Attach a message trace to the observation type that will handle it.
+    Each observation type is handled by one parser thread at a time
+
+    INPUTS:
+        ob_type             Observation type
+        trace               message_trace object or None
+    """
+
+    if trace is not None:
+        active[ob_type] = trace
+
+
+def span(ob_type, name):
+
+    """ Mark the end of a span for the message being handled for the specified
+    observation type
+
+    INPUTS:
+        ob_type             Observation type
+        name                Name of completed span
+    """
+
+    trace = active.get(ob_type)
+    if trace is not None:
+        trace.mark(name)
+
+
+def finish(ob_type):
+
+    """ Mark the end of the display span and record all span durations for the
+    message being handled for the specified observation type
+
+    INPUTS:
+        ob_type             Observation type
+    """
+
+    trace = active.pop(ob_type, None)
+    if trace is None:
+        return
+    trace.mark('display')
+    trace.spans['total'] = trace.last - trace.start
+    with lock:
+        for name, seconds in trace.spans.items():
+            histograms.setdefault((ob_type, name), histogram()).add(seconds)
+    if time.time() - last_report > REPORT_INTERVAL:
+        report()
+
+
+def summary():
+
+    """ Return p50 and p99 latency of each span for each observation type
+
+    OUTPUT:
+        summary             Dictionary of {span: (count, p50, p99, max)}
+                            dictionaries keyed by observation type
+    """
+
+    summary = {}
+    with lock:
+        for (ob_type, name), values in histograms.items():
+            summary.setdefault(ob_type, {})[name] = (values.count, values.percentile(0.5),
+                                                     values.percentile(0.99), values.max)
+    return summary
+
+
+def report():
+
+    """ Log p50 and p99 latency of each span for each observation type
+    """
+
+    global last_report
+    last_report = time.time()
+    for ob_type, spans in sorted(summary().items()):
+        text = ', '.join(f'{name} {spans[name][1] * 1000:.2f}/{spans[name][2] * 1000:.2f}'
+                         for name in SPANS if name in spans)
+        Logger.info(f'Tracing: {ob_type} n={spans["total"][0]} p50/p99 ms: {text}')
+
+
+# ==============================================================================
+# DEFINE 'tracing_overlay' CLASS
+# ==============================================================================
+class tracing_overlay(Label):
+
+    """ Debug overlay showing p50/p99 total latency for each observation type
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.halign    = 'left'
+        self.valign    = 'top'
+        self.font_size = '12sp'
+        self.color     = (1, 1, 0, 1)
+        self.bind(size=self.setter('text_size'))
+        self.event = Clock.schedule_interval(self.refresh, 1)
+
+    def refresh(self, dt):
+        lines = []
+        for ob_type, spans in sorted(summary().items()):
+            if 'total' in spans:
+                count, p50, p99, _ = spans['total']
+                lines.append(f'{ob_type:12} n={count:<6} p50 {p50 * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms')
+        self.text = '\n'.join(lines)
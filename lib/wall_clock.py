@@ -0,0 +1,71 @@
+""" Provides the wall clock used by the observation pipeline of the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations. The
+clock source can be replaced so that recorded observations can be replayed in
+virtual time.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+from datetime import datetime
+import time   as system_time
+
+# Define current clock source
+SOURCE = system_time.time
+
+
+def time():
+
+    """ Return the current time from the current clock source
+
+    OUTPUT:
+        time                Current time as a UNIX timestamp        [s]
+    """
+
+    return SOURCE()
+
+
+def now(tz=None):
+
+    """ Return the current date and time from the current clock source
+
+    INPUTS:
+        tz                  Timezone of returned datetime object
+
+    OUTPUT:
+        now                 Current date and time
+    """
+
+    return datetime.fromtimestamp(SOURCE(), tz)
+
+
+def set_source(source):
+
+    """ Replace the current clock source
+
+    INPUTS:
+        source              Callable returning current time as a UNIX
+                            timestamp
+    """
+
+    global SOURCE
+    SOURCE = source
+
+
+def reset_source():
+
+    """ Restore the system clock as the current clock source
+    """
+
+    set_source(system_time.time)
@@ -125,8 +125,14 @@ from lib.astronomical import astro
 from lib.forecast     import forecast
 from lib.sager        import sager_forecast
 from lib.status       import station
+from lib.data_client  import data_client, relay_client
 from lib              import settings     as userSettings
 from lib              import properties
+from lib              import profiling
+from lib              import metrics
+from lib              import relay
+from lib              import devices
+from lib              import tracing
 from lib              import config
 
 # ==============================================================================
@@ -196,9 +202,29 @@ class wfpiconsole(App):
         self.screenManager = screenManager(transition=NoTransition())
         self.screenManager.add_widget(CurrentConditions())
 
+        # Start profiling if required, before any connection or parser
+        # threads are started
+        profiling.start(self.config)
+
+        # Start metrics endpoint if required. When the observation pipeline
+        # runs in a separate process, the data process serves the metrics
+        if self.config['System'].get('Multiprocess', '0') != '1':
+            metrics.start(self.config)
+
+        # Start relay server if required. When the observation pipeline runs in
+        # a separate process, the data process serves the relay
+        if self.config['System'].get('Multiprocess', '0') != '1':
+            relay.start(self.config)
+
         # Start Websocket or UDP service
         self.start_connection_service()
 
+        # Show message latency tracing overlay if required
+        if self.config['System'].get('Tracing', '0') == '1':
+            self.tracing_overlay = tracing.tracing_overlay(size_hint=(None, None), pos=(5, 5),
+                                                           size=(self.window.width - 10, 100))
+            self.window.add_widget(self.tracing_overlay)
+
         # Check for latest version
         self.system = system()
         Clock.schedule_once(self.system.check_version)
@@ -212,10 +238,15 @@ class wfpiconsole(App):
         # Return ScreenManager
         return self.screenManager
 
-    # DISCONNECT connection_client WHEN CLOSING APP
+    # CHECKPOINT DERIVED STATE AND DISCONNECT connection_client WHEN CLOSING APP
     # --------------------------------------------------------------------------
     def on_stop(self):
+        if hasattr(self, 'obsParser'):
+            self.obsParser.save_derived_state()
         self.stop_connection_service()
+        profiling.stop()
+        metrics.stop()
+        relay.stop()
 
     # SET DISPLAY SCALE FACTOR BASED ON SCREEN DIMENSIONS
     # --------------------------------------------------------------------------
@@ -277,16 +308,28 @@ class wfpiconsole(App):
     # --------------------------------------------------------------------------
     def on_config_change(self, config, section, key, value):
 
+        # Send configuration changes to the data process
+        if hasattr(self, 'data_client'):
+            self.data_client.send_config()
+
+        # Rebuild device descriptors when the elevation or height of a device
+        # is changed
+        if section == 'Station' and (key == 'Elevation' or key.endswith('Height')):
+            devices.configure(self.config)
+
         # Update current weather forecast when temperature or wind speed units
         # are changed
         if section == 'Units' and key in ['Temp', 'Wind']:
-            self.forecast.parse_forecast()
-            self.sager.get_forecast_text()
+            if hasattr(self, 'forecast'):
+                self.forecast.parse_forecast()
+            if hasattr(self, 'sager'):
+                self.sager.get_forecast_text()
 
         # Update current weather forecast, sunrise/sunset and moonrise/moonset
         # times when time format changed
         if section == 'Display' and key == 'TimeFormat':
-            self.forecast.parse_forecast()
+            if hasattr(self, 'forecast'):
+                self.forecast.parse_forecast()
             self.astro.format_labels('Sun')
             self.astro.format_labels('Moon')
 
@@ -379,7 +422,7 @@ class wfpiconsole(App):
                                     break
 
         # Update Sager Forecast schedule
-        if section == 'System' and key == 'SagerInterval':
+        if section == 'System' and key == 'SagerInterval' and hasattr(self, 'sager'):
             Clock.schedule_once(self.sager.schedule_forecast)
 
         # Force rest_api services if Websocket connection is selected
@@ -402,6 +445,10 @@ class wfpiconsole(App):
         if section == 'System' and key == 'Connection':
             self.stop_connection_service()
             self.start_connection_service()
+            if value == 'Relay':
+                self.stop_forecast_service()
+            else:
+                self.start_forecast_service()
 
         # Update derived variables to reflect configuration changes
         if hasattr(self, 'obsParser'):
@@ -411,6 +458,17 @@ class wfpiconsole(App):
     # --------------------------------------------------------------------------
     def start_connection_service(self, *largs):
         self.connection_thread = None
+        if self.config['System']['Connection'] == 'Relay':
+            if hasattr(self, 'obsParser'):
+                self.obsParser.save_derived_state()
+                del self.obsParser
+            self.relay_client = relay_client()
+            self.relay_client.start()
+            return
+        if self.config['System'].get('Multiprocess', '0') == '1':
+            self.data_client = data_client()
+            self.data_client.start()
+            return
         if self.config['System']['Connection'] == 'Websocket':
             self.connection_thread = threading.Thread(target=run_path,
                                                       args=['service/websocket.py'],
@@ -421,13 +479,48 @@ class wfpiconsole(App):
                                                       args=['service/udp.py'],
                                                       kwargs={'run_name': '__main__'},
                                                       name='UDP')
+        elif self.config['System']['Connection'] == 'Dual':
+            self.connection_thread = threading.Thread(target=run_path,
+                                                      args=['service/dual.py'],
+                                                      kwargs={'run_name': '__main__'},
+                                                      name='Dual')
         if self.connection_thread is not None:
             self.connection_thread.start()
 
+    # START WEATHERFLOW FORECAST AND SAGER WEATHERCASTER FORECAST SERVICES,
+    # UNLESS BOTH ARE OWNED BY THE DATA PROCESS OR RECEIVED FROM THE RELAY
+    # SERVER
+    # --------------------------------------------------------------------------
+    def start_forecast_service(self):
+        if (self.config['System'].get('Multiprocess', '0') == '1'
+                or self.config['System']['Connection'] == 'Relay'):
+            return
+        if not hasattr(self, 'forecast'):
+            self.forecast = forecast()
+            self.Sched.metDownload = Clock.schedule_once(self.forecast.fetch_forecast)
+        if not hasattr(self, 'sager'):
+            self.sager = sager_forecast()
+            self.Sched.sager = Clock.schedule_once(self.sager.fetch_forecast)
+
+    # STOP WEATHERFLOW FORECAST AND SAGER WEATHERCASTER FORECAST SERVICES
+    # --------------------------------------------------------------------------
+    def stop_forecast_service(self):
+        for service, schedule in [('forecast', 'metDownload'), ('sager', 'sager')]:
+            if schedule in self.Sched:
+                self.Sched[schedule].cancel()
+            if hasattr(self, service):
+                delattr(self, service)
+
     # STOP WEBSOCKET SERVICE
     # --------------------------------------------------------------------------
     def stop_connection_service(self):
-        if hasattr(self, 'connection_client'):
+        if hasattr(self, 'relay_client'):
+            self.relay_client.stop()
+            del self.relay_client
+        elif hasattr(self, 'data_client'):
+            self.data_client.stop()
+            del self.data_client
+        elif hasattr(self, 'connection_client'):
             self.connection_client._keep_running = False
 
     # EXIT CONSOLE AND SHUTDOWN SYSTEM
@@ -491,13 +584,9 @@ class CurrentConditions(Screen):
         self.app.Sched.sun_transit = Clock.schedule_interval(self.app.astro.sun_transit, 1)
         self.app.Sched.moon_phase  = Clock.schedule_interval(self.app.astro.moon_phase, 1)
 
-        # Schedule WeatherFlow weather forecast download
-        self.app.forecast = forecast()
-        self.app.Sched.metDownload = Clock.schedule_once(self.app.forecast.fetch_forecast)
-
-        # Generate Sager Weathercaster forecast
-        self.app.sager = sager_forecast()
-        self.app.Sched.sager = Clock.schedule_once(self.app.sager.fetch_forecast)
+        # Schedule WeatherFlow weather forecast download and generate Sager
+        # Weathercaster forecast
+        self.app.start_forecast_service()
 
     # ADD USER SELECTED PANELS TO CURRENT CONDITIONS SCREEN
     # --------------------------------------------------------------------------
@@ -16,6 +16,7 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Load required library modules
+from lib.request_api          import weatherflow_api
 from lib                      import config
 
 # Load required Kivy modules
@@ -98,7 +99,7 @@ class mainMenu(ModalView):
         """ Get list of all stations associated with WeatherFlow key
         """
 
-        URL = 'https://swd.weatherflow.com/swd/rest/stations?token={}'
+        URL = weatherflow_api.rest_url(self.app.config) + '/stations?token={}'
         URL = URL.format(self.app.config['Keys']['WeatherFlow'])
         UrlRequest(URL,
                    on_success=self.parse_station_list,
@@ -446,13 +447,18 @@ class mainMenu(ModalView):
         self.dismiss(animation=False)
         current_station  = self.app.config['Station']['StationID']
         config.switch(self.station_meta_data, self.device_list, self.app.config)
-        self.app.obsParser.resetDisplay()
-        if hasattr(self.app.connection_client, '_switch_device'):
+        if hasattr(self.app, 'data_client'):
+            self.app.data_client.send_config()
+        if hasattr(self.app, 'obsParser'):
+            self.app.obsParser.resetDisplay()
+        if hasattr(self.app, 'connection_client') and hasattr(self.app.connection_client, '_switch_device'):
             self.app.connection_client._switch_device = True
         if current_station != str(self.station_meta_data['station_id']):
-            self.app.forecast.reset_forecast()
+            if hasattr(self.app, 'forecast'):
+                self.app.forecast.reset_forecast()
             self.app.astro.reset_astro()
-            self.app.sager.reset_forecast()
+            if hasattr(self.app, 'sager'):
+                self.app.sager.reset_forecast()
 
 
 # ==============================================================================
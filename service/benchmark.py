@@ -0,0 +1,339 @@
+# WeatherFlow PiConsole: Raspberry Pi Python console for WeatherFlow Tempest and
+# Smart Home Weather stations.
+# Copyright (C) 2018-2023 Peter Davis
+
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmarks the derived variable and observation format functions that run on
+# every observation, and the cost of each Websocket message passed through the
+# headless observation pipeline. Fixtures are generated from the deterministic
+# synthetic station used by the stand-in server, at a fixed virtual time, so
+# results are repeatable between runs.
+#
+#   python -m service.benchmark                         Run all benchmarks
+#   python -m service.benchmark --save                  Store results as baseline
+#   python -m service.benchmark --filter SLP            Run matching benchmarks
+#   python -m service.benchmark --tolerance 0.1         Flag slowdowns above 10%
+
+# Prevent Kivy from parsing the benchmark command line arguments and from
+# limiting the Kivy clock to the display frame rate
+import os
+os.environ['KIVY_NO_ARGS'] = '1'
+os.environ['KCFG_GRAPHICS_MAXFPS'] = '0'
+
+# Import required library modules
+from service.data_process   import data_app
+from lib.observation_parser import obs_parser, derive_obs
+from lib.replay             import virtual_clock
+from lib                    import observation_format as observation
+from lib                    import derived_variables as derive
+from lib                    import config as console_config
+from lib                    import synthetic_data
+from lib                    import wall_clock
+from lib.records            import Ob
+
+# Import required Kivy modules
+from kivy.logger            import Logger, LOG_LEVELS
+from kivy.clock             import Clock
+
+# Import required Python modules
+from datetime               import datetime, timedelta
+import argparse
+import platform
+import requests
+import timeit
+import copy
+import json
+import pytz
+import sys
+
+# Define fixed virtual time (2023-11-15 12:00 UTC) and synthetic station used
+# by all benchmarks
+BENCHMARK_TIME = 1700049600
+STATION_ID     = '1000'
+TEMPEST_ID     = '1001'
+
+
+def benchmark_config(rest_url=None):
+
+    """ Returns the console configuration used by the benchmarks, built from the
+    default configuration with the synthetic station details
+
+    INPUTS:
+        rest_url            Stand-in server REST URL used by the message
+                            stream benchmarks, or None to disable REST API
+                            requests
+
+    OUTPUT:
+        config              Dictionary of configuration sections
+    """
+
+    config = {}
+    for section, keys in console_config.default_config_file().items():
+        config[section] = {key: details['Value'] for key, details in keys.items()
+                           if isinstance(details, dict) and 'Value' in details}
+    config['Keys'].update({'WeatherFlow': 'benchmark', 'CheckWX': ''})
+    config['Station'].update({'StationID': STATION_ID, 'TempestID': TEMPEST_ID, 'TempestSN': 'ST-00001001',
+                              'SkyID': '', 'SkySN': '', 'OutAirID': '', 'OutAirSN': '', 'InAirID': '',
+                              'InAirSN': '', 'TempestHeight': '2', 'SkyHeight': '', 'OutAirHeight': '',
+                              'Latitude': '51.5', 'Longitude': '-0.12', 'Elevation': '20',
+                              'Timezone': 'Europe/London', 'Name': 'Benchmark'})
+    config['System'].update({'Connection': 'UDP', 'rest_api': '1' if rest_url else '0',
+                             'RestURL': rest_url or '', 'StateFile': '', 'CaptureFile': '',
+                             'Multiprocess': '0'})
+    config['Units']['Temp'] = 'f'
+    return config
+
+
+def api_response(payload):
+
+    """ Returns a WeatherFlow REST API response object holding the specified
+    payload
+
+    INPUTS:
+        payload             Response dictionary
+    """
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+def api_fixtures(config):
+
+    """ Returns the 24 hour, today, yesterday, month and year REST API
+    responses for the synthetic Tempest at the benchmark time
+
+    INPUTS:
+        config              Benchmark configuration
+    """
+
+    Tz        = pytz.timezone(config['Station']['Timezone'])
+    now       = datetime.fromtimestamp(BENCHMARK_TIME, Tz)
+    midnight  = int(Tz.localize(datetime(now.year, now.month, now.day)).timestamp())
+    yesterday = int(Tz.localize(datetime(now.year, now.month, now.day) - timedelta(days=1)).timestamp())
+    month     = int(Tz.localize(datetime(now.year, now.month, 1)).timestamp())
+    year      = int(Tz.localize(datetime(now.year, 1, 1)).timestamp())
+    return {int(TEMPEST_ID): {
+        '24Hrs':     api_response(synthetic_data.observations(TEMPEST_ID, 'tempest', BENCHMARK_TIME - 86400, BENCHMARK_TIME)),
+        'today':     api_response(synthetic_data.observations(TEMPEST_ID, 'tempest', midnight,  BENCHMARK_TIME)),
+        'yesterday': api_response(synthetic_data.observations(TEMPEST_ID, 'tempest', yesterday, midnight - 1)),
+        'month':     api_response(synthetic_data.observations(TEMPEST_ID, 'tempest', month,     yesterday - 1, 'e')),
+        'year':      api_response(synthetic_data.observations(TEMPEST_ID, 'tempest', year,      yesterday - 1, 'e'))}}
+
+
+# ==============================================================================
+# DEFINE 'benchmark_suite' CLASS
+# ==============================================================================
+class benchmark_suite():
+
+    def __init__(self, app, rest_url=None, messages=1440):
+        self.app      = app
+        self.rest_url = rest_url
+        self.messages = messages
+        self.config   = app.config
+        self.device   = int(TEMPEST_ID)
+        self.results  = {}
+
+        # Define configuration and REST API fixtures used by the function
+        # benchmarks, which always read REST API data when initialising
+        self.function_config = benchmark_config()
+        self.function_config['System']['rest_api'] = '1'
+        self.api_data = api_fixtures(self.function_config)
+
+    def functions(self):
+
+        """ Returns the derived variable and observation format benchmarks as
+        (name, callable) pairs. Stateful functions are benchmarked both when
+        the console is initialising from REST API data and in steady state
+        """
+
+        config, device, api_data = self.function_config, self.device, self.api_data
+        ob  = synthetic_data.device_ob('tempest', BENCHMARK_TIME)
+        obs = {'obTime':    Ob(ob[0], 's'),     'windSpd':    Ob(ob[2], 'mps'), 'windGust':   Ob(ob[3], 'mps'),
+               'pressure':  Ob(ob[6], 'mb'),    'outTemp':    Ob(ob[7], 'c'),   'humidity':   Ob(ob[8], '%'),
+               'radiation': Ob(ob[11], 'Wm2'),  'minuteRain': Ob(ob[12], 'mm'), 'dailyRain':  Ob(ob[18], 'mm'),
+               'strike':    Ob(ob[15], 'count')}
+        initial = copy.deepcopy(derive_obs)
+
+        # Generate steady state derived variables from REST API data
+        steady = {'outTempMax':  derive.temp_max(obs['outTemp'], obs['obTime'], initial['outTempMax'], device, api_data, config),
+                  'outTempMin':  derive.temp_min(obs['outTemp'], obs['obTime'], initial['outTempMin'], device, api_data, config),
+                  'rainAccum':   derive.rain_accumulation(obs['minuteRain'], obs['dailyRain'], initial['rainAccum'], device, api_data, config),
+                  'strikeCount': derive.strike_count(obs['strike'], initial['strikeCount'], device, api_data, config),
+                  'peakSun':     derive.peak_sun_hours(obs['radiation'], initial['peakSun'], device, api_data, config)}
+        # observation.format() formats its input in place, so each call is
+        # given a fresh copy of the converted observation
+        temp_max = observation.units(steady['outTempMax'], config['Units']['Temp'])
+
+        return [
+            ('dew_point',              lambda: derive.dew_point(obs['outTemp'], obs['humidity'])),
+            ('feels_like',             lambda: derive.feels_like(obs['outTemp'], obs['humidity'], obs['windSpd'], config)),
+            ('SLP',                    lambda: derive.SLP(obs['pressure'], device, config)),
+            ('SLP_trend',              lambda: derive.SLP_trend(obs['pressure'], obs['obTime'], device, api_data, config)),
+            ('temp_max.init',          lambda: derive.temp_max(obs['outTemp'], obs['obTime'], initial['outTempMax'], device, api_data, config)),
+            ('temp_max.steady',        lambda: derive.temp_max(obs['outTemp'], obs['obTime'], steady['outTempMax'], device, api_data, config)),
+            ('temp_min.init',          lambda: derive.temp_min(obs['outTemp'], obs['obTime'], initial['outTempMin'], device, api_data, config)),
+            ('temp_min.steady',        lambda: derive.temp_min(obs['outTemp'], obs['obTime'], steady['outTempMin'], device, api_data, config)),
+            ('rain_accumulation.init', lambda: derive.rain_accumulation(obs['minuteRain'], obs['dailyRain'], initial['rainAccum'], device, api_data, config)),
+            ('rain_accumulation.steady', lambda: derive.rain_accumulation(obs['minuteRain'], obs['dailyRain'], steady['rainAccum'], device, api_data, config)),
+            ('strike_count.init',      lambda: derive.strike_count(obs['strike'], initial['strikeCount'], device, api_data, config)),
+            ('strike_count.steady',    lambda: derive.strike_count(obs['strike'], steady['strikeCount'], device, api_data, config)),
+            ('strike_frequency',       lambda: derive.strike_frequency(obs['obTime'], device, api_data, config)),
+            ('peak_sun_hours.init',    lambda: derive.peak_sun_hours(obs['radiation'], initial['peakSun'], device, api_data, config)),
+            ('peak_sun_hours.steady',  lambda: derive.peak_sun_hours(obs['radiation'], steady['peakSun'], device, api_data, config)),
+            ('observation.units',      lambda: observation.units(steady['outTempMax'], config['Units']['Temp'])),
+            ('observation.format',     lambda: observation.format(list(temp_max), ['Temp', 'Time'], config)),
+        ]
+
+    def run_function(self, name, function, repeat):
+
+        """ Time a single benchmark function
+
+        INPUTS:
+            name                Benchmark name
+            function            Function to time
+            repeat              Number of timing repeats
+
+        OUTPUT:
+            seconds             Best time per call in seconds
+        """
+
+        timer     = timeit.Timer(function)
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat, number)) / number
+
+    def run_stream(self, name, message_type):
+
+        """ Time a steady-state stream of Websocket messages passed through a
+        new observation parser. The virtual clock follows the observation times
+        so midnight rollovers happen during the stream
+
+        INPUTS:
+            name                Benchmark name
+            message_type        Device type of streamed messages
+
+        OUTPUT:
+            seconds             Mean time per message in seconds
+        """
+
+        parser  = obs_parser()
+        ob_step = 3 if message_type == 'rapid_wind' else 60
+        stream  = [synthetic_data.message(TEMPEST_ID, message_type, BENCHMARK_TIME + ob_step * index)
+                   for index in range(self.messages)]
+        parse   = parser.parse_rapid_wind if message_type == 'rapid_wind' else parser.parse_obs_st
+        clock   = wall_clock.SOURCE
+        start   = timeit.default_timer()
+        for message in stream:
+            clock.set(message['ob'][0] if message_type == 'rapid_wind' else message['obs'][0][0])
+            parse(message, self.config)
+            Clock.tick()
+        return (timeit.default_timer() - start) / len(stream)
+
+    def run(self, pattern=None, repeat=5):
+
+        """ Run all benchmarks matching the specified pattern
+
+        INPUTS:
+            pattern             Substring of benchmark names to run
+            repeat              Number of timing repeats
+        """
+
+        wall_clock.set_source(virtual_clock(BENCHMARK_TIME))
+        try:
+            for name, function in self.functions():
+                if pattern is None or pattern in name:
+                    self.results[name] = self.run_function(name, function, repeat)
+            for name, message_type in [('message.obs_st', 'tempest'), ('message.rapid_wind', 'rapid_wind')]:
+                if pattern is None or pattern in name:
+                    wall_clock.SOURCE.set(BENCHMARK_TIME)
+                    self.results[name] = self.run_stream(name, message_type)
+        finally:
+            wall_clock.reset_source()
+        return self.results
+
+
+def compare(results, baseline, tolerance):
+
+    """ Print benchmark results and flag regressions against the baseline
+
+    INPUTS:
+        results             Dictionary of seconds per call keyed by benchmark
+        baseline            Dictionary of baseline seconds per call
+        tolerance           Allowed fractional slowdown before a benchmark is
+                            flagged as a regression
+
+    OUTPUT:
+        regressions         List of regressed benchmark names
+    """
+
+    regressions = []
+    print(f'{"Benchmark":28} {"Per call":>12} {"Baseline":>12} {"Change":>9}')
+    for name, seconds in results.items():
+        line = f'{name:28} {seconds * 1e6:10.2f}us'
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line  += f' {baseline[name] * 1e6:10.2f}us {change:+8.1%}'
+            if change > tolerance:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the derived variable and observation format hot paths')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='baseline results file')
+    parser.add_argument('--save', action='store_true', help='store results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='fractional slowdown flagged as a regression')
+    parser.add_argument('--filter', help='run only benchmarks containing this text')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repeats for function benchmarks')
+    parser.add_argument('--messages', type=int, default=1440, help='messages per stream benchmark')
+    parser.add_argument('--rest-url', help='stand-in server REST URL used by the message stream benchmarks')
+    args = parser.parse_args()
+
+    # Initialise headless app with benchmark configuration. Silence warnings
+    # logged by derived variables with incomplete inputs
+    app = data_app()
+    app.config.read_dict(benchmark_config(args.rest_url))
+    Logger.setLevel(LOG_LEVELS['error'])
+
+    # Run benchmarks
+    results = benchmark_suite(app, args.rest_url, args.messages).run(args.filter, args.repeat)
+
+    # Compare results against stored baseline
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance)
+
+    # Store results as new baseline
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': baseline}, baseline_file, indent=2)
+
+    # Exit with error status when regressions are detected
+    if regressions and not args.save:
+        print(f'{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
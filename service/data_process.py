@@ -0,0 +1,257 @@
+# WeatherFlow PiConsole: Raspberry Pi Python console for WeatherFlow Tempest and
+# Smart Home Weather stations.
+# Copyright (C) 2018-2023 Peter Davis
+
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Prevent Kivy from parsing the data process command line arguments
+import os
+os.environ['KIVY_NO_ARGS'] = '1'
+
+# Import required library modules
+from lib.forecast           import forecast
+from lib.sager              import sager_forecast
+from lib.system             import system
+from lib                    import profiling
+from lib                    import metrics
+from lib                    import relay
+from lib                    import devices
+from lib.data_client        import REMOTE_QUERIES, REMOTE_ATTRIBUTES
+
+# Import required Kivy modules
+from kivy.properties        import DictProperty
+from kivy.config            import ConfigParser
+from kivy.logger            import Logger
+from kivy.clock             import Clock
+from kivy.app               import App
+
+# Import required Python modules
+from multiprocessing.connection import Client
+from runpy                  import run_path
+import threading
+
+
+# ==============================================================================
+# DEFINE 'headless_conditions' CLASS
+# ==============================================================================
+class headless_conditions():
+
+    """ Stand-in for the CurrentConditions screen used when the observation
+    pipeline runs without a user interface
+    """
+
+    def __init__(self):
+        self.Obs         = {}
+        self.Met         = {}
+        self.Sager       = {}
+        self.button_list = []
+
+
+# ==============================================================================
+# DEFINE 'data_app' CLASS
+# ==============================================================================
+class data_app(App):
+
+    """ Headless application that owns the connection service, observation
+    parser, WeatherFlow forecast and Sager Weathercaster forecast. Display
+    values are forwarded to the user interface process as compact snapshots
+    containing only the values that have changed since the previous snapshot.
+    Run without a user interface process, the data process is a headless
+    console serving the relay server
+    """
+
+    # Define App class dictionary properties
+    Sched = DictProperty([])
+
+    def __init__(self, connection=None, **kwargs):
+        super().__init__(**kwargs)
+
+        # Load configuration file
+        self.config = ConfigParser()
+        self.config.optionxform = str
+        self.config.read('wfpiconsole.ini')
+
+        # Initialise data_app class variables
+        self.CurrentConditions = headless_conditions()
+        self.connection        = connection
+        self.connection_lock   = threading.Lock()
+        self.connection_thread = None
+        self.last_display      = {'Obs': {}, 'Met': {}, 'Sager': {}, 'Status': {}}
+        self.last_state        = {}
+        self._keep_running     = True
+
+        # Load system class
+        self.system = system()
+
+    def start_connection_service(self):
+
+        """ Start the Websocket or UDP connection service specified in the
+        configuration file
+        """
+
+        if self.config['System']['Connection'] == 'Websocket':
+            self.connection_thread = threading.Thread(target=run_path,
+                                                      args=['service/websocket.py'],
+                                                      kwargs={'run_name': '__main__'},
+                                                      name='Websocket')
+        elif self.config['System']['Connection'] == 'UDP':
+            self.connection_thread = threading.Thread(target=run_path,
+                                                      args=['service/udp.py'],
+                                                      kwargs={'run_name': '__main__'},
+                                                      name='UDP')
+        elif self.config['System']['Connection'] == 'Dual':
+            self.connection_thread = threading.Thread(target=run_path,
+                                                      args=['service/dual.py'],
+                                                      kwargs={'run_name': '__main__'},
+                                                      name='Dual')
+        if self.connection_thread is not None:
+            self.connection_thread.start()
+
+    def stop_connection_service(self):
+
+        """ Stop the Websocket or UDP connection service
+        """
+
+        if hasattr(self, 'connection_client'):
+            self.connection_client._keep_running = False
+        if self.connection_thread is not None:
+            self.connection_thread.join(timeout=5)
+
+    def send_display(self, category, values, ob_type=None):
+
+        """ Send the display values that have changed since the previous
+        snapshot to the user interface process
+
+        INPUTS:
+            category            Display category (Obs, Met, Sager or Status)
+            values              Dictionary of current display values
+            ob_type             Latest observation message type
+        """
+
+        # Extract display values that have changed since previous snapshot
+        last_display = self.last_display[category]
+        snapshot = {}
+        for key, value in list(values.items()):
+            if key not in last_display or last_display[key] != value:
+                snapshot[key] = value
+                last_display[key] = value
+
+        # Send snapshot to user interface process
+        if self.connection is None:
+            return
+        if snapshot or ob_type is not None:
+            with self.connection_lock:
+                try:
+                    self.connection.send(('display', category, snapshot, ob_type))
+                except (OSError, EOFError):
+                    self._keep_running = False
+
+    def send_state(self):
+
+        """ Send the state of the objects queried by the user interface process
+        when it has changed since the state was last sent
+        """
+
+        state = {}
+        for target in set(REMOTE_QUERIES) | set(REMOTE_ATTRIBUTES):
+            if hasattr(self, target):
+                instance = getattr(self, target)
+                state[target] = {attribute: getattr(instance, attribute)() for attribute in REMOTE_QUERIES.get(target, [])}
+                state[target].update({attribute: getattr(instance, attribute, None)
+                                      for attribute in REMOTE_ATTRIBUTES.get(target, [])})
+        if self.connection is None or state == self.last_state:
+            return
+        self.last_state = state
+        with self.connection_lock:
+            try:
+                self.connection.send(('state', state))
+            except (OSError, EOFError):
+                self._keep_running = False
+
+    def handle_command(self, command):
+
+        """ Handle command received from the user interface process
+
+        INPUTS:
+            command             Command tuple received from user interface
+        """
+
+        if command[0] == 'config':
+            self.config.read_dict(command[1])
+            devices.configure(self.config)
+        elif command[0] == 'call':
+            target, method, args = command[1:]
+            if hasattr(self, target):
+                getattr(getattr(self, target), method)(*args)
+        elif command[0] == 'set':
+            target, attribute, value = command[1:]
+            if hasattr(self, target):
+                setattr(getattr(self, target), attribute, value)
+        elif command[0] == 'stop':
+            self._keep_running = False
+
+    def run_data_process(self):
+
+        """ Run the observation pipeline until the user interface process
+        requests the data process to stop
+        """
+
+        # Start profiling if required
+        profiling.start(self.config)
+
+        # Start metrics endpoint if required
+        metrics.start(self.config)
+
+        # Start relay server if required
+        relay.start(self.config)
+
+        # Start Websocket or UDP service
+        self.start_connection_service()
+
+        # Schedule WeatherFlow weather forecast download
+        self.forecast = forecast()
+        self.Sched.metDownload = Clock.schedule_once(self.forecast.fetch_forecast)
+
+        # Generate Sager Weathercaster forecast
+        self.sager = sager_forecast()
+        self.Sched.sager = Clock.schedule_once(self.sager.fetch_forecast)
+
+        # Run Kivy clock and handle commands received from user interface
+        # process. A headless data process runs until interrupted
+        Logger.info(f'DataProcess: {self.system.log_time()} - Started')
+        while self._keep_running:
+            try:
+                Clock.tick()
+                while self.connection is not None and self.connection.poll():
+                    self.handle_command(self.connection.recv())
+                self.send_state()
+            except (OSError, EOFError, KeyboardInterrupt):
+                self._keep_running = False
+
+        # Checkpoint derived observations and stop Websocket or UDP service
+        if hasattr(self, 'obsParser'):
+            self.obsParser.save_derived_state()
+        self.stop_connection_service()
+        profiling.stop()
+        metrics.stop()
+        relay.stop()
+        Logger.info(f'DataProcess: {self.system.log_time()} - Stopped')
+
+
+if __name__ == '__main__':
+    connection = None
+    if 'WFPICONSOLE_DATA_ADDRESS' in os.environ:
+        connection = Client(os.environ['WFPICONSOLE_DATA_ADDRESS'],
+                            authkey=bytes.fromhex(os.environ['WFPICONSOLE_DATA_KEY']))
+    data_app(connection).run_data_process()
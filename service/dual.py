@@ -0,0 +1,97 @@
+# WeatherFlow PiConsole: Raspberry Pi Python console for WeatherFlow Tempest and
+# Smart Home Weather stations.
+# Copyright (C) 2018-2023 Peter Davis
+
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Import required library modules
+from service.websocket      import websocketClient
+from service.websocket      import run as run_websocket
+from service.udp            import udp_client
+from service.udp            import run as run_udp
+from lib.system             import system
+from lib                    import message_router
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+from kivy.app               import App
+
+# Import required Python modules
+import asyncio
+
+
+# ==============================================================================
+# DEFINE 'dualClient' CLASS
+# ==============================================================================
+class dualClient():
+
+    """ Runs the UDP and Websocket clients together. Both clients pass their
+    messages to the same observation parsers, and each observation is parsed
+    only once, from the client that receives it first. The console keeps
+    receiving observations when either the local network or the internet
+    connection fails
+    """
+
+    @classmethod
+    async def create(cls):
+
+        # Initialise UDP and Websocket clients sharing the observation parsers,
+        # parser threads and queues, message capture and recent observations
+        udp       = await udp_client.create(connect=False)
+        websocket = await websocketClient.create(connect=False, station_parsers=udp.stations)
+        if websocket.capture is not None:
+            websocket.capture.close()
+        websocket.capture     = udp.capture
+        websocket.thread_list = udp.thread_list
+        websocket.queue_list  = udp.queue_list
+        udp.dedupe = websocket.dedupe = message_router.recent_keys()
+
+        # Initialise dualClient and return dualClient
+        self = App.get_running_app().connection_client = dualClient()
+        self.udp       = udp
+        self.websocket = websocket
+        self.system    = system()
+        return self
+
+    @property
+    def _keep_running(self):
+        return self.udp._keep_running and self.websocket._keep_running
+
+    @_keep_running.setter
+    def _keep_running(self, value):
+        self.udp._keep_running       = value
+        self.websocket._keep_running = value
+
+    @property
+    def _switch_device(self):
+        return self.udp._switch_device or self.websocket._switch_device
+
+    @_switch_device.setter
+    def _switch_device(self, value):
+        self.udp._switch_device       = value
+        self.websocket._switch_device = value
+
+    def activeThreads(self):
+        return self.udp.activeThreads() or self.websocket.activeThreads()
+
+
+async def main():
+    dual = await dualClient.create()
+    Logger.info(f'Dual: {dual.system.log_time()} - Starting UDP and Websocket connections')
+    await asyncio.gather(run_udp(dual.udp), run_websocket(dual.websocket))
+
+if __name__ == '__main__':
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(main())
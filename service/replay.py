@@ -0,0 +1,172 @@
+# WeatherFlow PiConsole: Raspberry Pi Python console for WeatherFlow Tempest and
+# Smart Home Weather stations.
+# Copyright (C) 2018-2023 Peter Davis
+
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Replays a capture file recorded with [System] CaptureFile through the UDP and
+# Websocket clients without a user interface. The pipeline clock follows the
+# recorded receive times, so midnight rollovers happen in virtual time.
+#
+#   python -m service.replay capture.jsonl                    As fast as possible
+#   python -m service.replay capture.jsonl --speed 60         One hour per minute
+#   python -m service.replay capture.jsonl --week-per-minute  One week per minute
+
+# Prevent Kivy from parsing the replay command line arguments and from limiting
+# the Kivy clock to the display frame rate
+import os
+os.environ['KIVY_NO_ARGS'] = '1'
+os.environ['KCFG_GRAPHICS_MAXFPS'] = '0'
+
+# Import required library modules
+from service.data_process   import data_app
+from service.websocket      import websocketClient
+from service.udp            import udp_client
+from lib.replay             import read_capture, virtual_clock
+from lib                    import wall_clock
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+from kivy.clock             import Clock
+
+# Import required Python modules
+import argparse
+import asyncio
+import time
+
+
+# ==============================================================================
+# DEFINE 'replay_driver' CLASS
+# ==============================================================================
+class replay_driver():
+
+    def __init__(self, app, path, speed=0):
+        self.app     = app
+        self.path    = path
+        self.speed   = speed
+        self.clients = {}
+        self.clock   = virtual_clock()
+        self.count   = 0
+        self.skipped = 0
+
+    async def get_client(self, source):
+
+        """ Return the connection client for the specified message source,
+        creating it without opening a connection if required. All clients
+        share a single observation parser
+
+        INPUTS:
+            source              Connection message was received on
+        """
+
+        if source not in self.clients:
+            parser = getattr(self.app, 'obsParser', None)
+            if source == 'udp':
+                self.clients[source] = await udp_client.create(connect=False)
+            elif source == 'websocket':
+                self.clients[source] = await websocketClient.create(connect=False)
+            else:
+                return None
+            if parser is not None:
+                self.app.obsParser = parser
+        return self.clients[source]
+
+    async def decode(self, client, message):
+
+        """ Decode message with connection client and wait for the observation
+        parser to finish
+
+        INPUTS:
+            client              Connection client
+            message             Recorded message
+        """
+
+        client.message = message
+        if isinstance(client, udp_client):
+            await client._udp_client__async__decode_message()
+        else:
+            await client._websocketClient__async__decodeMessage()
+        while client.activeThreads():
+            await asyncio.sleep(0.001)
+
+    async def run(self):
+
+        """ Replay all messages in the capture file
+        """
+
+        # Install virtual clock source
+        wall_clock.set_source(self.clock)
+        start_time = time.time()
+        first_time = last_time = None
+
+        # Replay messages in the order they were recorded. Sleep between
+        # messages when a time-warp speed is specified
+        try:
+            for record_time, source, message in read_capture(self.path):
+                client = await self.get_client(source)
+                if client is None:
+                    self.skipped += 1
+                    continue
+                if self.speed and last_time is not None:
+                    await asyncio.sleep(max(record_time - last_time, 0) / self.speed)
+                if first_time is None:
+                    first_time = record_time
+                last_time = record_time
+                self.clock.set(record_time)
+                await self.decode(client, message)
+                self.count += 1
+                if self.count % 100 == 0:
+                    Clock.tick()
+            Clock.tick()
+        finally:
+            wall_clock.reset_source()
+
+        # Report replay throughput
+        elapsed = time.time() - start_time
+        virtual = (last_time - first_time) if first_time is not None else 0
+        Logger.info(f'Replay: {self.count} messages replayed ({self.skipped} skipped)')
+        Logger.info(f'Replay: {virtual / 3600:.1f} hours of observations in {elapsed:.1f} seconds '
+                    + f'({self.count / max(elapsed, 1e-9):.0f} messages/s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay captured WeatherFlow messages through the observation pipeline')
+    parser.add_argument('capture', help='capture file recorded with [System] CaptureFile')
+    parser.add_argument('--speed', type=float, default=0, help='time-warp factor (0 replays as fast as possible)')
+    parser.add_argument('--week-per-minute', action='store_true', help='replay one week of observations per minute')
+    parser.add_argument('--rest', action='store_true', help='allow WeatherFlow REST API requests during replay')
+    parser.add_argument('--summary', action='store_true', help='print final display values')
+    args = parser.parse_args()
+
+    # Initialise headless app. Disable message capture and derived state
+    # checkpoints so the replay never modifies the live console files
+    app = data_app()
+    app.config.set('System', 'CaptureFile', '')
+    app.config.set('System', 'StateFile',   '')
+    if not args.rest:
+        app.config.set('System', 'rest_api', '0')
+
+    # Replay capture file
+    speed = 7 * 24 * 60 if args.week_per_minute else args.speed
+    asyncio.run(replay_driver(app, args.capture, speed).run())
+
+    # Print final display values
+    if args.summary:
+        for key, value in sorted(app.last_display['Obs'].items()):
+            if isinstance(value, list):
+                print(f'{key:15} {value}')
+
+
+if __name__ == '__main__':
+    main()
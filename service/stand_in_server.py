@@ -0,0 +1,361 @@
+# WeatherFlow PiConsole: Raspberry Pi Python console for WeatherFlow Tempest and
+# Smart Home Weather stations.
+# Copyright (C) 2018-2023 Peter Davis
+
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Local stand-in for the WeatherFlow REST API and Websocket service. Serves the
+# bucket a and bucket e observation endpoints, better_forecast, station meta
+# data and the Websocket listen protocol from synthetic or captured data, with
+# optional latency, error and payload size injection. Point the console at the
+# stand-in server with the [System] section of wfpiconsole.ini:
+#
+#   RestURL      = http://127.0.0.1:8090/swd/rest
+#   WebsocketURL = ws://127.0.0.1:8091/swd/data
+#
+#   python -m service.stand_in_server                             Synthetic Tempest
+#   python -m service.stand_in_server --interval 0.1              Ten observations per second
+#   python -m service.stand_in_server --latency 250 --error-rate 0.05
+#   python -m service.stand_in_server --capture capture.jsonl --speed 60
+
+# Prevent Kivy from parsing the stand-in server command line arguments
+import os
+os.environ['KIVY_NO_ARGS'] = '1'
+
+# Import required library modules
+from lib.replay             import read_capture
+from lib                    import synthetic_data
+
+# Import required Kivy modules
+from kivy.logger            import Logger
+
+# Import required Python modules
+from http.server            import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse           import urlparse, parse_qs
+import websockets
+import threading
+import argparse
+import asyncio
+import random
+import json
+import time
+import re
+
+
+# ==============================================================================
+# DEFINE 'stand_in_data' CLASS
+# ==============================================================================
+class stand_in_data():
+
+    """ Station definition and fault injection settings shared by the REST and
+    Websocket stand-in servers
+    """
+
+    def __init__(self, args):
+        self.station_id  = args.station
+        self.devices     = {device_type: device_id for device_type, device_id in [('tempest', args.tempest),
+                                                                                ('sky',     args.sky),
+                                                                                ('out_air', args.out_air),
+                                                                                ('in_air',  args.in_air)] if device_id}
+        self.latitude    = args.latitude
+        self.longitude   = args.longitude
+        self.timezone    = args.timezone
+        self.elevation   = args.elevation
+        self.latency     = args.latency / 1000
+        self.error_rate  = args.error_rate
+        self.scale       = args.payload_scale
+        self.interval    = args.interval
+        self.capture     = args.capture
+        self.speed       = args.speed
+        self.random      = random.Random(args.seed)
+        self.random_lock = threading.Lock()
+
+    def device_type(self, device_id):
+
+        """ Return the device type for the specified device ID
+
+        INPUTS:
+            device_id           Device ID
+
+        OUTPUT:
+            device_type         Device type, or None if device ID is unknown
+        """
+
+        for device_type, known_id in self.devices.items():
+            if str(known_id) == str(device_id):
+                return device_type
+        return None
+
+    def inject_error(self):
+
+        """ Return True when the next response should fail
+        """
+
+        with self.random_lock:
+            return self.random.random() < self.error_rate
+
+    def station(self):
+        return synthetic_data.station(self.station_id, self.devices, self.latitude, self.longitude,
+                                      self.timezone, self.elevation)
+
+
+# ==============================================================================
+# DEFINE 'rest_handler' CLASS
+# ==============================================================================
+class rest_handler(BaseHTTPRequestHandler):
+
+    """ Handles WeatherFlow REST API requests
+    """
+
+    def do_GET(self):
+        data = self.server.stand_in
+        time.sleep(data.latency)
+        if data.inject_error():
+            self.reply(500, {'status': {'status_code': 500, 'status_message': 'INJECTED ERROR'}})
+            return
+
+        # Extract endpoint and query parameters
+        url   = urlparse(self.path)
+        path  = re.sub(r'^/swd/rest', '', url.path).rstrip('/')
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        now   = int(time.time())
+
+        # Observations for a single device
+        match = re.fullmatch(r'/observations/device/(\d+)', path)
+        if match:
+            device_type = data.device_type(match.group(1))
+            if device_type is None:
+                self.reply(404, {'status': {'status_code': 404, 'status_message': 'NOT FOUND'}})
+                return
+            start_time = int(query.get('time_start', now - 86400))
+            end_time   = int(query.get('time_end',   now))
+            self.reply(200, synthetic_data.observations(match.group(1), device_type, start_time, end_time,
+                                                        query.get('bucket', 'a'), data.scale))
+            return
+
+        # Latest observations and meta data for station
+        match = re.fullmatch(r'/observations/station/(\d+)', path)
+        if match:
+            station = data.station()
+            self.reply(200, {'status': {'status_code': 0, 'status_message': 'SUCCESS'},
+                             'station_id': station['station_id'],
+                             'station_name': station['name'],
+                             'public_name': station['public_name'],
+                             'latitude': station['latitude'],
+                             'longitude': station['longitude'],
+                             'elevation': station['station_meta']['elevation'],
+                             'timezone': station['timezone'],
+                             'obs': []})
+            return
+
+        # Station meta data
+        if path == '/stations' or re.fullmatch(r'/stations/(\d+)', path):
+            self.reply(200, {'status': {'status_code': 0, 'status_message': 'SUCCESS'},
+                             'stations': [data.station()]})
+            return
+
+        # Hourly and daily forecast
+        if path == '/better_forecast':
+            self.reply(200, synthetic_data.forecast(now, data.timezone, data.scale))
+            return
+
+        self.reply(404, {'status': {'status_code': 404, 'status_message': 'NOT FOUND'}})
+
+    def reply(self, code, response):
+
+        """ Send JSON response
+
+        INPUTS:
+            code                HTTP status code
+            response            Response dictionary
+        """
+
+        body = json.dumps(response).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        Logger.debug('StandIn: REST ' + format % args)
+
+
+# ==============================================================================
+# DEFINE 'websocket_server' CLASS
+# ==============================================================================
+class websocket_server():
+
+    """ Implements the WeatherFlow Websocket listen protocol. Each listen_start
+    or listen_rapid_start request is acknowledged and starts a stream of
+    observations for the requested device
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    async def send(self, websocket, message):
+
+        """ Send message after the configured latency, replacing it with a
+        malformed message at the configured error rate
+
+        INPUTS:
+            websocket           Client connection
+            message             Message dictionary
+        """
+
+        if self.data.latency:
+            await asyncio.sleep(self.data.latency)
+        if self.data.inject_error():
+            await websocket.send('{"type": "')
+        else:
+            await websocket.send(json.dumps(message))
+
+    async def handler(self, websocket, path=None):
+        streams = {}
+        await self.send(websocket, {'type': 'connection_opened'})
+        try:
+            async for request in websocket:
+                try:
+                    request = json.loads(request)
+                    action, device_id = request['type'], request['device_id']
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if action in ['listen_start', 'listen_rapid_start']:
+                    await self.send(websocket, {'type': 'ack', 'id': request.get('id')})
+                    rapid = action == 'listen_rapid_start'
+                    if (rapid, str(device_id)) not in streams:
+                        if self.data.capture:
+                            stream = self.stream_capture(websocket, rapid)
+                        else:
+                            stream = self.stream_synthetic(websocket, device_id, rapid)
+                        streams[(rapid, str(device_id))] = asyncio.create_task(stream)
+                elif action in ['listen_stop', 'listen_rapid_stop']:
+                    await self.send(websocket, {'type': 'ack', 'id': request.get('id')})
+                    task = streams.pop((action == 'listen_rapid_stop', str(device_id)), None)
+                    if task is not None:
+                        task.cancel()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for task in streams.values():
+                task.cancel()
+
+    async def stream_synthetic(self, websocket, device_id, rapid):
+
+        """ Stream synthetic observations for the specified device. Observation
+        times advance by the real device reporting interval for every message,
+        so fast streams cover many hours of observations
+
+        INPUTS:
+            websocket           Client connection
+            device_id           Device ID
+            rapid               True for rapid wind observations
+        """
+
+        device_type = 'rapid_wind' if rapid else self.data.device_type(device_id)
+        if device_type is None:
+            return
+        ob_time  = time.time()
+        ob_step  = 3 if rapid else 60
+        interval = self.data.interval / 20 if rapid else self.data.interval
+        try:
+            while True:
+                await self.send(websocket, synthetic_data.message(device_id, device_type, ob_time))
+                ob_time += ob_step
+                await asyncio.sleep(interval)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def stream_capture(self, websocket, rapid):
+
+        """ Stream captured observations, replacing recorded device IDs with the
+        stand-in device IDs. Messages are paced by their recorded receive times
+        divided by the speed factor
+
+        INPUTS:
+            websocket           Client connection
+            rapid               True to stream rapid wind observations,
+                                otherwise all other observations
+        """
+
+        targets = {'obs_st':     self.data.devices.get('tempest'),
+                   'obs_sky':    self.data.devices.get('sky'),
+                   'obs_air':    self.data.devices.get('out_air') or self.data.devices.get('in_air'),
+                   'rapid_wind': self.data.devices.get('tempest') or self.data.devices.get('sky'),
+                   'evt_strike': self.data.devices.get('tempest') or self.data.devices.get('out_air')}
+        last_time = None
+        try:
+            for record_time, source, message in read_capture(self.data.capture):
+                if not isinstance(message, dict) or message.get('type') not in targets:
+                    continue
+                if (message['type'] == 'rapid_wind') != rapid or not targets[message['type']]:
+                    continue
+                if self.data.speed and last_time is not None:
+                    await asyncio.sleep(max(record_time - last_time, 0) / self.data.speed)
+                last_time = record_time
+                message = dict(message, device_id=int(targets[message['type']]))
+                await self.send(websocket, message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+async def serve_websocket(data, host, port):
+    server = websocket_server(data)
+    async with websockets.serve(server.handler, host, port):
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the WeatherFlow REST API and Websocket service')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--rest-port', type=int, default=8090, help='REST API port')
+    parser.add_argument('--websocket-port', type=int, default=8091, help='Websocket port')
+    parser.add_argument('--station', default='1000', help='station ID')
+    parser.add_argument('--tempest', default='1001', help='Tempest device ID (blank for none)')
+    parser.add_argument('--sky', default='', help='Sky device ID')
+    parser.add_argument('--out-air', default='', help='outdoor Air device ID')
+    parser.add_argument('--in-air', default='', help='indoor Air device ID')
+    parser.add_argument('--latitude', type=float, default=51.5)
+    parser.add_argument('--longitude', type=float, default=-0.12)
+    parser.add_argument('--timezone', default='Europe/London')
+    parser.add_argument('--elevation', type=float, default=20)
+    parser.add_argument('--latency', type=float, default=0, help='latency added to every response in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of responses that fail')
+    parser.add_argument('--payload-scale', type=int, default=1, help='REST observation and forecast payload multiplier')
+    parser.add_argument('--interval', type=float, default=60, help='seconds between synthetic Websocket observations')
+    parser.add_argument('--capture', help='stream Websocket observations from a capture file')
+    parser.add_argument('--speed', type=float, default=1, help='capture time-warp factor (0 streams as fast as possible)')
+    parser.add_argument('--seed', type=int, default=0, help='error injection random seed')
+    args = parser.parse_args()
+    data = stand_in_data(args)
+
+    # Start REST API server
+    rest_server = ThreadingHTTPServer((args.host, args.rest_port), rest_handler)
+    rest_server.stand_in = data
+    threading.Thread(target=rest_server.serve_forever, daemon=True, name='REST').start()
+    Logger.info(f'StandIn: RestURL      = http://{args.host}:{args.rest_port}/swd/rest')
+    Logger.info(f'StandIn: WebsocketURL = ws://{args.host}:{args.websocket_port}/swd/data')
+
+    # Run Websocket server until interrupted
+    try:
+        asyncio.run(serve_websocket(data, args.host, args.websocket_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rest_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -17,41 +17,83 @@
 
 # Import required library modules
 from lib.observation_parser import obs_parser
+from lib.stations           import station_parser
 from lib.system             import system
+from lib                    import message_router
+from lib                    import stations
+from lib                    import tracing
+from lib                    import metrics
+from lib                    import replay
 
 # Import required Kivy modules
 from kivy.logger            import Logger
 from kivy.app               import App
 
 # Import required Python modules
-import threading
 import asyncio
 import socket
-import json
+
+# Define datagram buffer size and maximum number of datagrams received on each
+# wakeup of the event loop
+DATAGRAM_SIZE = 65535
+BATCH_SIZE    = 64
 
 
 # ==============================================================================
 # DEFINE 'EchoClientProtocol' CLASS
 # ==============================================================================
-class EchoClientProtocol(asyncio.Protocol):
+class EchoClientProtocol():
+
+    """ Receives UDP datagrams from the socket reader callback. All datagrams
+    waiting in the socket are received on each wakeup into a preallocated
+    buffer, and are decoded directly from the buffer without copying
+    """
+
     def __init__(self, _loop, _udp_connection, udp_client):
         self._udp_connection = _udp_connection
         self._asyncio_loop   = _loop
         self.udp_client      = udp_client
-        self.transport       = None
+        self.buffer          = bytearray(DATAGRAM_SIZE)
 
-    def connection_made(self, transport):
-        self.transport = transport
+    def read_ready(self):
+        sock = self.udp_client.socket
+        for _ in range(BATCH_SIZE):
+            try:
+                size, addr = sock.recvfrom_into(self.buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as exception:
+                self.error_received(exception)
+                break
+            self.message_received(self.buffer, size)
 
     def datagram_received(self, data, addr):
-        self.udp_client.message = json.loads(data.decode())
-        self._asyncio_loop.create_task(self.udp_client._udp_client__async__decode_message())
+        self.message_received(data, len(data))
 
-    def error_received(self, exception):
-        Logger.error(f'UDP: {self.system.log_time()} - Error received: {exception}')
+    def message_received(self, data, size):
+        client = self.udp_client
+        ignored_type = client.router.ignored_type(data, size)
+        if ignored_type is not None:
+            metrics.inc('messages_received_total', client='udp', type=ignored_type)
+            return
+        trace = tracing.begin()
+        try:
+            message = message_router.loads_view(memoryview(data)[:size])
+            if not isinstance(message, dict):
+                raise ValueError('message is not a JSON object')
+        except ValueError:
+            metrics.inc('message_errors_total', client='udp')
+            Logger.error(f'UDP: {client.system.log_time()} - Parsing error: {bytes(data[:size])}')
+            return
+        tracing.mark(trace, 'decode')
+        client.message, client.trace = message, trace
+        metrics.inc('messages_received_total', client='udp', type=message.get('type', 'unknown'))
+        if client.capture is not None:
+            client.capture.record('udp', message)
+        self._asyncio_loop.create_task(client._udp_client__async__decode_message(message, trace))
 
-    def connection_lost(self, exc):
-        pass
+    def error_received(self, exception):
+        Logger.error(f'UDP: {self.udp_client.system.log_time()} - Error received: {exception}')
 
 
 # ==============================================================================
@@ -60,7 +102,7 @@ class EchoClientProtocol(asyncio.Protocol):
 class udp_client():
 
     @classmethod
-    async def create(cls):
+    async def create(cls, connect=True, station_parsers=None):
 
         # Initialise udp_client
         self = App.get_running_app().connection_client = udp_client()
@@ -81,37 +123,70 @@ class udp_client():
         self.ping_timeout     = 60
         self.sleep_time       = 10
         self.thread_list      = {}
+        self.queue_list       = {}
         self.task_list        = {}
         self.connected        = False
         self.socket           = None
         self.udp_port         = 50222
         self.udp_ip           = '0.0.0.0'
+        self.trace            = None
+        self.message          = None
+        self.dedupe           = None
+        self._switch_device   = False
+        self.router           = message_router.message_router('UDP', 'serial_number', 'SN', ['evt_precip'])
 
-        # Initialise Observation Parser
-        self.app.obsParser = obs_parser()
+        # Initialise Observation Parsers of primary and secondary stations,
+        # unless they are shared with another connection client, and message
+        # capture
+        if station_parsers is None:
+            self.app.obsParser = obs_parser()
+            station_parsers = {name: station_parser(name, self.config) for name in stations.names(self.config)}
+        self.stations = station_parsers
+        self.router.compile(self.config, self.stations)
+        self.capture = replay.open_capture(self.config)
 
         # Open UDP socket and return udp_client
-        await self.__async__open_socket()
+        if connect:
+            await self.__async__open_socket()
         return self
 
     async def __async__open_socket(self):
         while not self.connected:
             try:
                 Logger.info(f'UDP: {self.system.log_time()} - Opening socket')
+                metrics.inc('connection_attempts_total', client='udp')
                 self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
                 self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.set_buffer_size()
+                self.socket.setblocking(False)
                 self.socket.bind((self.udp_ip, self.udp_port))
-                self.transport, self.protocol = await self._asyncio_loop.create_datagram_endpoint(
-                    lambda: EchoClientProtocol(self._asyncio_loop, self._udp_connection, self),
-                    sock=self.socket)
+                self.protocol = EchoClientProtocol(self._asyncio_loop, self._udp_connection, self)
+                self._asyncio_loop.add_reader(self.socket, self.protocol.read_ready)
                 self.connected = True
+                metrics.gauge('connection_up', 1, client='udp')
                 Logger.info(f'UDP: {self.system.log_time()} - Socket open')
                 await self.__async__get_devices()
-                self.app.obsParser.flagAPI = [1, 1, 1, 1]
             except Exception as error:
                 Logger.error(f'UDP: {self.system.log_time()} - Connection error: {error}')
                 await asyncio.sleep(self.sleep_time)
 
+    def set_buffer_size(self):
+
+        """ Set the socket receive buffer size specified in the configuration
+        file, so that bursts of datagrams are not lost while the event loop is
+        busy. The operating system may limit the buffer size
+        """
+
+        buffer_size = self.config['System'].get('UDPBufferSize', '')
+        if not buffer_size:
+            return
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, int(buffer_size))
+        except (OSError, ValueError) as error:
+            Logger.warning(f'UDP: {self.system.log_time()} - Unable to set receive buffer size: {error}')
+        Logger.info(f'UDP: {self.system.log_time()} - Receive buffer size '
+                    f'{self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)} bytes')
+
     async def __async__get_devices(self):
         self.device_list = {'tempest': None, 'sky': None, 'out_air': None, 'in_air': None}
         if self.config['Station']['TempestSN']:
@@ -123,73 +198,32 @@ class udp_client():
                 self.device_list['out_air'] = self.config['Station']['OutAirSN']
         if self.config['Station']['InAirSN']:
             self.device_list['in_air'] = self.config['Station']['InAirSN']
-        if all(device is None for device in self.device_list.values()):
+        if all(device is None for device in self.device_list.values()) and not self.stations:
             Logger.warning(f'UDP: {system().log_time()} - Data unavailable; no device IDs specified')
+        self.router.compile(self.config, self.stations)
 
     async def __async__close_socket(self):
         Logger.info(f'UDP: {self.system.log_time()} - Closing socket')
         try:
-            self.transport.close()
+            self._asyncio_loop.remove_reader(self.socket)
+            self.socket.close()
             Logger.info(f'UDP: {self.system.log_time()} - Socket closed')
             self.connected = False
+            metrics.gauge('connection_up', 0, client='udp')
         except Exception:
             Logger.info(f'Websocket: {self.system.log_time()} - Unable to close socket')
 
-    async def __async__decode_message(self):
+    async def __async__decode_message(self, message=None, trace=None):
+        message = self.message if message is None else message
+        trace = self.trace if trace is None else trace
+        tracing.mark(trace, 'receive')
         try:
-            if self.message:
-                if 'type' in self.message:
-                    if self.message['type'] in ['hub_status', 'device_status', 'evt_precip']:
-                        pass
-                    else:
-                        if 'serial_number' in self.message:
-                            if self.message['type'] == 'obs_st':
-                                if self.message['serial_number'] == self.config['Station']['TempestSN']:
-                                    if 'obs_st' in self.thread_list:
-                                        while self.thread_list['obs_st'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.thread_list['obs_st'] = threading.Thread(target=self.app.obsParser.parse_obs_st,
-                                                                                  args=(self.message, self.config, ),
-                                                                                  name="obs_st")
-                                    self.thread_list['obs_st'].start()
-                            elif self.message['type'] == 'obs_sky':
-                                if self.message['serial_number'] == self.config['Station']['SkySN']:
-                                    if 'obs_sky' in self.thread_list:
-                                        while self.thread_list['obs_sky'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.thread_list['obs_sky'] = threading.Thread(target=self.app.obsParser.parse_obs_sky,
-                                                                                   args=(self.message, self.config, ),
-                                                                                   name='obs_sky')
-                                    self.thread_list['obs_sky'].start()
-                            elif self.message['type'] == 'obs_air':
-                                if self.message['serial_number'] == self.config['Station']['OutAirSN']:
-                                    if 'obs_out_air' in self.thread_list:
-                                        while self.thread_list['obs_out_air'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.thread_list['obs_out_air'] = threading.Thread(target=self.app.obsParser.parse_obs_out_air,
-                                                                                       args=(self.message, self.config, ),
-                                                                                       name='obs_out_air')
-                                    self.thread_list['obs_out_air'].start()
-                                elif self.message['serial_number'] == self.config['Station']['InAirSN']:
-                                    if 'obs_in_air' in self.thread_list:
-                                        while self.thread_list['obs_in_air'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.thread_list['obs_in_air'] = threading.Thread(target=self.app.obsParser.parse_obs_in_air,
-                                                                                      args=(self.message, self.config, ),
-                                                                                      name='obs_in_air')
-                                    self.thread_list['obs_in_air'].start()
-                            elif self.message['type'] == 'rapid_wind':
-                                if self.message['serial_number'] in [self.config['Station']['TempestSN'], self.config['Station']['SkySN']]:
-                                    self.app.obsParser.parse_rapid_wind(self.message, self.config)
-                            elif self.message['type'] == 'evt_strike':
-                                if self.message['serial_number'] in [self.config['Station']['TempestSN'], self.config['Station']['OutAirSN']]:
-                                    self.app.obsParser.parse_evt_strike(self.message, self.config)
-                            else:
-                                Logger.warning(f'Websocket: {self.system.log_time()} - Unknown message type: {json.dumps(self.message)}')
-                        else:
-                            Logger.warning(f'Websocket: {self.system.log_time()} - Missing device ID: {json.dumps(self.message)}')
-                else:
-                    Logger.warning(f'Websocket: {self.system.log_time()} - Missing message type: {json.dumps(self.message)}')
+            if self._switch_device:
+                self._switch_device = False
+                await self.__async__get_devices()
+            message_route = self.router.route(message)
+            if message_route is not None:
+                await message_router.dispatch(self, message_route, message, trace)
         except asyncio.CancelledError:
             raise
 
@@ -211,9 +245,10 @@ class udp_client():
         return False
 
 
-async def main():
+async def run(udp):
     try:
-        udp = await udp_client.create()
+        if not udp.connected:
+            await udp._udp_client__async__open_socket()
         udp.task_list['listen'] = asyncio.create_task(udp._udp_client__async__listen())
         udp.task_list['cancel'] = asyncio.create_task(udp._udp_client__async__cancel())
         await asyncio.gather(*list(udp.task_list.values()))
@@ -221,6 +256,11 @@ async def main():
         if not udp._keep_running:
             await udp._udp_client__async__close_socket()
 
+
+async def main():
+    udp = await udp_client.create()
+    await run(udp)
+
 if __name__ == '__main__':
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -17,7 +17,14 @@
 
 # Import required library modules
 from lib.observation_parser import obs_parser
+from lib.request_api        import weatherflow_api
+from lib.stations           import station_parser
 from lib.system             import system
+from lib                    import message_router
+from lib                    import stations
+from lib                    import tracing
+from lib                    import metrics
+from lib                    import replay
 
 # Import required Kivy modules
 from kivy.logger            import Logger
@@ -25,11 +32,9 @@ from kivy.app               import App
 
 # Import required Python modules
 import websockets
-import threading
 import asyncio
 import certifi
 import socket
-import json
 import time
 import ssl
 
@@ -40,7 +45,7 @@ import ssl
 class websocketClient():
 
     @classmethod
-    async def create(cls):
+    async def create(cls, connect=True, station_parsers=None):
 
         # Initialise websocketClient
         self = App.get_running_app().connection_client = websocketClient()
@@ -53,6 +58,7 @@ class websocketClient():
         self.system = system()
 
         # Initialise websocketClient class variables
+        self._asyncio_loop     = asyncio.get_running_loop()
         self._keep_running     = True
         self._switch_device    = False
         self.watchdog_timeout  = 300
@@ -60,17 +66,33 @@ class websocketClient():
         self.ping_timeout      = 60
         self.sleep_time        = 10
         self.thread_list       = {}
+        self.queue_list        = {}
         self.task_list         = {}
         self.watchdog_list     = {}
+        self.watchdog_timers   = {}
         self.connected         = False
         self.connection        = None
         self.url               = None
-
-        # Initialise Observation Parser
-        self.app.obsParser = obs_parser()
+        self.trace             = None
+        self.message           = None
+        self.dedupe            = None
+        self.router            = message_router.message_router('Websocket', 'device_id', 'ID',
+                                                               ['connection_opened', 'ack', 'evt_precip'])
+
+        # Initialise Observation Parsers of primary and secondary stations,
+        # unless they are shared with another connection client, and message
+        # capture
+        if station_parsers is None:
+            self.app.obsParser = obs_parser()
+            station_parsers = {name: station_parser(name, self.config) for name in stations.names(self.config)}
+        self.stations = station_parsers
+        self.station_devices = {}
+        self.router.compile(self.config, self.stations)
+        self.capture = replay.open_capture(self.config)
 
         # Connect to specified Websocket URL and return websocketClient
-        await self.__async__connect()
+        if connect:
+            await self.__async__connect()
         return self
 
     async def __async__connect(self):
@@ -78,7 +100,7 @@ class websocketClient():
         # Verify WeatherFlow token and StationID are specified in .ini file
         self.config = self.app.config
         if self.config['Keys']['WeatherFlow']:
-            self.url = 'wss://swd.weatherflow.com/swd/data?token=' + self.config['Keys']['WeatherFlow']
+            self.url = weatherflow_api.websocket_url(self.config) + '?token=' + self.config['Keys']['WeatherFlow']
         else:
             return
 
@@ -86,18 +108,22 @@ class websocketClient():
         while not self.connected:
             try:
                 Logger.info(f'Websocket: {self.system.log_time()} - Opening connection')
-                ssl_context     = ssl.create_default_context(cafile=certifi.where())
+                metrics.inc('connection_attempts_total', client='websocket')
+                if self.url.startswith('wss://'):
+                    ssl_context = ssl.create_default_context(cafile=certifi.where())
+                else:
+                    ssl_context = None
                 self.connection = await websockets.connect(self.url, ssl=ssl_context)
                 self.message    = await asyncio.wait_for(self.connection.recv(), timeout=self.reply_timeout)
-                self.message    = json.loads(self.message)
+                self.message    = message_router.loads(self.message)
                 try:
                     if 'type' in self.message and self.message['type'] == 'connection_opened':
                         await self.__async__get_devices()
                         await self.__async__listen_devices('listen_start')
-                        self.app.obsParser.flagAPI = [1, 1, 1, 1]
                         self.connected = True
+                        metrics.gauge('connection_up', 1, client='websocket')
                         Logger.info(f'Websocket: {self.system.log_time()} - Connection open')
-                        if all(device is None for device in self.device_list.values()):
+                        if all(device is None for device in self.device_list.values()) and not self.stations:
                             Logger.warning(f'Websocket: {system().log_time()} - Data unavailable; no device IDs specified')
                     else:
                         Logger.error(f'Websocket: {self.system.log_time()} - Connection message error')
@@ -116,14 +142,28 @@ class websocketClient():
 
     async def __async__disconnect(self):
         Logger.info(f'Websocket: {self.system.log_time()} - Closing connection')
+        self.stop_watchdog()
         try:
             await asyncio.wait_for(self.connection.close(), timeout=5)
             self.connected = False
+            metrics.gauge('connection_up', 0, client='websocket')
             Logger.info(f'Websocket: {self.system.log_time()} - Connection closed')
         except Exception:
             Logger.info(f'Websocket: {self.system.log_time()} - Unable to close connection')
 
+    async def __async__reconnect(self):
+        await self.__async__disconnect()
+        self.connected = False
+        await self.__async__connect()
+
     async def __async__verify(self):
+
+        # Wait for the watchdog to reconnect if it has closed the connection,
+        # instead of opening a second connection
+        watchdog = self.task_list.get('watchdog')
+        if watchdog is not None and not watchdog.done():
+            await asyncio.shield(watchdog)
+            return
         try:
             pong = await self.connection.ping()
             await asyncio.wait_for(pong, timeout=self.ping_timeout)
@@ -134,38 +174,49 @@ class websocketClient():
             await self.__async__connect()
 
     async def __async__get_devices(self):
-        self.device_list = {'tempest': None, 'sky': None, 'out_air': None, 'in_air': None}
-        if self.config['Station']['TempestID']:
-            self.device_list['tempest'] = self.config['Station']['TempestID']
-            self.watchdog_list['obs_st'], self.watchdog_list['rapid_wind']  = time.time(), time.time()
+        self.watchdog_list   = {}
+        self.device_list     = self.station_device_list(self.config)
+        self.station_devices = {name: self.station_device_list(parser.config, name) for name, parser in self.stations.items()}
+        self.router.compile(self.config, self.stations)
+        self.start_watchdog()
+
+    def station_device_list(self, config, station=None):
+        prefix = '' if station is None else station + ':'
+        device_list = {'tempest': None, 'sky': None, 'out_air': None, 'in_air': None}
+        if config['Station']['TempestID']:
+            device_list['tempest'] = config['Station']['TempestID']
+            self.watchdog_list[prefix + 'obs_st'], self.watchdog_list[prefix + 'rapid_wind']  = time.time(), time.time()
         else:
-            if self.config['Station']['SkyID']:
-                self.device_list['sky'] = self.config['Station']['SkyID']
-                self.watchdog_list['obs_sky'], self.watchdog_list['rapid_wind']  = time.time(), time.time()
-            if self.config['Station']['OutAirID']:
-                self.device_list['out_air'] = self.config['Station']['OutAirID']
-                self.watchdog_list['obs_out_air']  = time.time()
-        if self.config['Station']['InAirID']:
-            self.device_list['in_air'] = self.config['Station']['InAirID']
-            self.watchdog_list['obs_in_air']  = time.time()
+            if config['Station']['SkyID']:
+                device_list['sky'] = config['Station']['SkyID']
+                self.watchdog_list[prefix + 'obs_sky'], self.watchdog_list[prefix + 'rapid_wind']  = time.time(), time.time()
+            if config['Station']['OutAirID']:
+                device_list['out_air'] = config['Station']['OutAirID']
+                self.watchdog_list[prefix + 'obs_out_air']  = time.time()
+        if config['Station']['InAirID']:
+            device_list['in_air'] = config['Station']['InAirID']
+            self.watchdog_list[prefix + 'obs_in_air']  = time.time()
+        return device_list
 
     async def __async__listen_devices(self, action):
         devices = []
-        if self.device_list['tempest'] or self.device_list['sky']:
-            devices.append('{"type":"' + action + '",'
-                           + ' "device_id":' + (self.device_list['tempest'] or self.device_list['sky']) + ','
-                           + ' "id":"tempest_sky"}')
-            devices.append('{"type":"' + action.split('_')[0] + '_rapid_' + action.split('_')[1] + '",'
-                           + ' "device_id":' + (self.device_list['tempest'] or self.device_list['sky']) + ','
-                           + ' "id":"rapid_wind"}')
-        if self.device_list['out_air']:
-            devices.append('{"type":"' + action + '",'
-                           + ' "device_id":' + self.device_list['out_air'] + ','
-                           + ' "id":"outdoor_air"}')
-        if self.device_list['in_air']:
-            devices.append('{"type":"' + action + '",'
-                           + ' "device_id":' + self.device_list['in_air'] + ','
-                           + ' "id":"indoor_air"}')
+        device_lists = [('', self.device_list)] + [(':' + name, device_list) for name, device_list in self.station_devices.items()]
+        for suffix, device_list in device_lists:
+            if device_list['tempest'] or device_list['sky']:
+                devices.append('{"type":"' + action + '",'
+                               + ' "device_id":' + (device_list['tempest'] or device_list['sky']) + ','
+                               + ' "id":"tempest_sky' + suffix + '"}')
+                devices.append('{"type":"' + action.split('_')[0] + '_rapid_' + action.split('_')[1] + '",'
+                               + ' "device_id":' + (device_list['tempest'] or device_list['sky']) + ','
+                               + ' "id":"rapid_wind' + suffix + '"}')
+            if device_list['out_air']:
+                devices.append('{"type":"' + action + '",'
+                               + ' "device_id":' + device_list['out_air'] + ','
+                               + ' "id":"outdoor_air' + suffix + '"}')
+            if device_list['in_air']:
+                devices.append('{"type":"' + action + '",'
+                               + ' "device_id":' + device_list['in_air'] + ','
+                               + ' "id":"indoor_air' + suffix + '"}')
         for device in devices:
             await self.connection.send(device)
 
@@ -173,8 +224,13 @@ class websocketClient():
         try:
             message = await asyncio.wait_for(self.connection.recv(), timeout=self.reply_timeout)
             try:
-                return json.loads(message)
+                self.trace = tracing.begin()
+                message = message_router.loads(message)
+                tracing.mark(self.trace, 'decode')
+                metrics.inc('messages_received_total', client='websocket', type=message.get('type', 'unknown'))
+                return message
             except Exception:
+                metrics.inc('message_errors_total', client='websocket')
                 Logger.error(f'Websocket: {self.system.log_time()} - Parsing error: {message}')
                 return {}
         except asyncio.CancelledError:
@@ -184,74 +240,48 @@ class websocketClient():
             await self.task_list['verify']
             return {}
 
-    async def __async__watchdog(self):
-        now = time.time()
-        watchdog_triggered = False
-        for ob in self.watchdog_list:
-            if self.watchdog_list[ob] < (now - self.watchdog_timeout):
-                watchdog_triggered = True
-                break
-        if watchdog_triggered:
-            Logger.warning(f'Websocket: {self.system.log_time()} - Watchdog triggered {ob}')
-            await self.__async__disconnect()
-            await self.__async__connect()
+    def start_watchdog(self):
+        self.stop_watchdog()
+        for stream in self.watchdog_list:
+            self.watchdog_timers[stream] = self._asyncio_loop.call_later(self.watchdog_timeout, self.check_watchdog, stream)
+
+    def stop_watchdog(self):
+        for timer in self.watchdog_timers.values():
+            timer.cancel()
+        self.watchdog_timers = {}
+
+    def check_watchdog(self, stream):
 
-    async def __async__decodeMessage(self):
+        # Rearm watchdog timer if stream has delivered a message since the
+        # timer was started
+        if stream not in self.watchdog_list:
+            return
+        elapsed = time.time() - self.watchdog_list[stream]
+        if elapsed < self.watchdog_timeout:
+            self.watchdog_timers[stream] = self._asyncio_loop.call_later(self.watchdog_timeout - elapsed, self.check_watchdog, stream)
+            return
+
+        # Reconnect if stream has timed out. Reconnecting restarts the
+        # watchdog timers, and the listen task waits for the reconnection
+        # before receiving from the new connection
+        watchdog = self.task_list.get('watchdog')
+        if watchdog is not None and not watchdog.done():
+            return
+        Logger.warning(f'Websocket: {self.system.log_time()} - Watchdog triggered {stream}')
+        metrics.inc('watchdog_triggers_total', client='websocket', type=stream)
+        self.task_list['watchdog'] = self._asyncio_loop.create_task(self.__async__reconnect())
+
+    async def __async__decodeMessage(self, message=None, trace=None):
+        message = self.message if message is None else message
+        trace = self.trace if trace is None else trace
+        tracing.mark(trace, 'receive')
         try:
-            if self.message:
-                if 'type' in self.message:
-                    if self.message['type'] in ['connection_opened', 'ack', 'evt_precip']:
-                        pass
-                    else:
-                        if 'device_id' in self.message:
-                            if self.message['type'] == 'obs_st':
-                                if 'obs_st' in self.thread_list:
-                                    while self.thread_list['obs_st'].is_alive():
-                                        await asyncio.sleep(0.1)
-                                self.watchdog_list['obs_st'] = time.time()
-                                self.thread_list['obs_st'] = threading.Thread(target=self.app.obsParser.parse_obs_st,
-                                                                              args=(self.message, self.config, ),
-                                                                              name="obs_st")
-                                self.thread_list['obs_st'].start()
-                            elif self.message['type'] == 'obs_sky':
-                                if 'obs_sky' in self.thread_list:
-                                    while self.thread_list['obs_sky'].is_alive():
-                                        await asyncio.sleep(0.1)
-                                self.watchdog_list['obs_sky'] = time.time()
-                                self.thread_list['obs_sky'] = threading.Thread(target=self.app.obsParser.parse_obs_sky,
-                                                                               args=(self.message, self.config, ),
-                                                                               name='obs_sky')
-                                self.thread_list['obs_sky'].start()
-                            elif self.message['type'] == 'obs_air':
-                                if str(self.message['device_id']) == self.config['Station']['OutAirID']:
-                                    if 'obs_out_air' in self.thread_list:
-                                        while self.thread_list['obs_out_air'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.watchdog_list['obs_out_air'] = time.time()
-                                    self.thread_list['obs_out_air'] = threading.Thread(target=self.app.obsParser.parse_obs_out_air,
-                                                                                       args=(self.message, self.config, ),
-                                                                                       name='obs_out_air')
-                                    self.thread_list['obs_out_air'].start()
-                                elif str(self.message['device_id']) == self.config['Station']['InAirID']:
-                                    if 'obs_in_air' in self.thread_list:
-                                        while self.thread_list['obs_in_air'].is_alive():
-                                            await asyncio.sleep(0.1)
-                                    self.watchdog_list['obs_in_air'] = time.time()
-                                    self.thread_list['obs_in_air'] = threading.Thread(target=self.app.obsParser.parse_obs_in_air,
-                                                                                      args=(self.message, self.config, ),
-                                                                                      name='obs_in_air')
-                                    self.thread_list['obs_in_air'].start()
-                            elif self.message['type'] == 'rapid_wind':
-                                self.watchdog_list['rapid_wind'] = time.time()
-                                self.app.obsParser.parse_rapid_wind(self.message, self.config)
-                            elif self.message['type'] == 'evt_strike':
-                                self.app.obsParser.parse_evt_strike(self.message, self.config)
-                            else:
-                                Logger.warning(f'Websocket: {self.system.log_time()} - Unknown message type: {json.dumps(self.message)}')
-                        else:
-                            Logger.warning(f'Websocket: {self.system.log_time()} - Missing device ID: {json.dumps(self.message)}')
-                else:
-                    Logger.warning(f'Websocket: {self.system.log_time()} - Missing message type: {json.dumps(self.message)}')
+            message_route = self.router.route(message)
+            if message_route is not None:
+                watchdog_key = message_router.route_key(message_route)
+                if watchdog_key in self.watchdog_list:
+                    self.watchdog_list[watchdog_key] = time.time()
+                await message_router.dispatch(self, message_route, message, trace)
         except asyncio.CancelledError:
             raise
 
@@ -259,7 +289,8 @@ class websocketClient():
         try:
             while self._keep_running:
                 self.message = await self.__async__getMessage()
-                await self.__async__watchdog()
+                if self.capture is not None and self.message:
+                    self.capture.record('websocket', self.message)
                 await self.__async__decodeMessage()
         except asyncio.CancelledError:
             raise
@@ -279,11 +310,12 @@ class websocketClient():
         return False
 
 
-async def main():
-    websocket = await websocketClient.create()
+async def run(websocket):
     if not websocket.config['Keys']['WeatherFlow']:
         Logger.warning(f'Websocket: {system().log_time()} - Conection unavailable; WeatherFlow Access Token missing')
     else:
+        if not websocket.connected:
+            await websocket._websocketClient__async__connect()
         while websocket._keep_running:
             try:
                 websocket.task_list['listen'] = asyncio.create_task(websocket._websocketClient__async__listen())
@@ -301,6 +333,11 @@ async def main():
                     websocket._switch_device = False
 
 
+async def main():
+    websocket = await websocketClient.create()
+    await run(websocket)
+
+
 if __name__ == '__main__':
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -0,0 +1,76 @@
+""" Shared fixtures for the tests of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import types
+import sys
+import os
+import pytest
+
+# Import console modules from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Define time of observations used by tests: 2023-06-15 12:00:00 UTC
+NOON = 1686830400
+
+
+@pytest.fixture
+def config():
+
+    """ Station configuration of a TEMPEST station with REST API services
+    disabled
+    """
+
+    return {'Station': {'StationID': '1000',       'TempestID': '2000',   'TempestSN': 'ST-00000001',
+                        'SkyID': '',               'SkySN': '',           'OutAirID': '',
+                        'OutAirSN': '',            'InAirID': '',         'InAirSN': '',
+                        'TempestHeight': '2',      'SkyHeight': '',       'OutAirHeight': '',
+                        'Elevation': '20',         'Latitude': '51.5',    'Longitude': '-0.1',
+                        'Timezone': 'Europe/London'},
+            'System':  {'rest_api': '0',           'Connection': 'UDP',   'StateFile': ''},
+            'Units':   {'Temp': 'c',               'Pressure': 'mb',      'Wind': 'mps',
+                        'Direction': 'degrees',    'Precip': 'mm',        'Distance': 'km',
+                        'Other': 'metric'},
+            'Display': {'TimeFormat': '24 hr'},
+            'FeelsLike': {'ExtremelyCold': '-5', 'FreezingCold': '0',  'VeryCold': '5',
+                          'Cold': '10',          'Mild': '15',         'Warm': '20',
+                          'Hot': '25',           'VeryHot': '30'}}
+
+
+@pytest.fixture
+def running_app(monkeypatch, config):
+
+    """ Running app holding the station configuration, as used by log messages
+    """
+
+    app_module = pytest.importorskip('kivy.app')
+    app = types.SimpleNamespace(config=config)
+    monkeypatch.setattr(app_module.App, 'get_running_app', staticmethod(lambda: app))
+    return app
+
+
+@pytest.fixture
+def clock():
+
+    """ Fix the console clock at NOON and restore the system clock afterwards
+    """
+
+    from lib import wall_clock
+    current = {'time': NOON}
+    wall_clock.set_source(lambda: current['time'])
+    yield current
+    wall_clock.reset_source()
@@ -0,0 +1,100 @@
+""" Tests for the derived observation checkpoint of the Raspberry Pi Python
+console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import threading
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from lib              import observation_parser
+from lib.records      import Extreme, Accumulation
+
+
+def checkpoint_parser(config, checkpoint_file):
+
+    """ Return an observation parser holding only the state used by the
+    checkpoint
+    """
+
+    parser = observation_parser.obs_parser.__new__(observation_parser.obs_parser)
+    parser.config          = config
+    parser.derive_obs      = observation_parser.derive_obs.copy()
+    parser.last_ob_time    = {}
+    parser.flag_api        = [1, 1, 1, 1]
+    parser.checkpoint_file = checkpoint_file
+    parser.checkpoint_lock = threading.Lock()
+    return parser
+
+
+@pytest.fixture
+def saved(config, running_app, clock, tmp_path):
+
+    """ Save a checkpoint with a daily maximum temperature and rain
+    accumulation
+    """
+
+    checkpoint_file = str(tmp_path / 'wfpiconsole.state')
+    parser = checkpoint_parser(config, checkpoint_file)
+    parser.derive_obs['outTempMax'] = Extreme(21.5, 'c', clock['time'] - 600, 's', 21.5, clock['time'])
+    parser.derive_obs['rainAccum']  = {'today':     Accumulation(1.2, 'mm', 1.2, clock['time']),
+                                       'yesterday': Accumulation(None, 'mm'),
+                                       'month':     Accumulation(10.2, 'mm', 9.0, clock['time']),
+                                       'year':      Accumulation(80.2, 'mm', 79.0, clock['time'])}
+    parser.last_ob_time['obs_st'] = clock['time'] - 60
+    parser.save_derived_state()
+    return checkpoint_file
+
+
+def test_restores_records_on_same_station_and_day(config, clock, saved):
+    parser = checkpoint_parser(config, saved)
+    clock['time'] += 3600
+    parser.load_derived_state(config)
+    assert parser.derive_obs['outTempMax'] == Extreme(21.5, 'c', clock['time'] - 4200, 's', 21.5, clock['time'] - 3600)
+    assert isinstance(parser.derive_obs['outTempMax'], Extreme)
+    assert isinstance(parser.derive_obs['rainAccum']['today'], Accumulation)
+    assert parser.derive_obs['rainAccum']['month'].total == 9.0
+    assert parser.last_ob_time == {'obs_st': clock['time'] - 3660}
+    assert parser.flag_api[0] == 0
+
+
+def test_discards_checkpoint_of_other_station(config, clock, saved):
+    config['Station']['TempestSN'] = 'ST-00000002'
+    parser = checkpoint_parser(config, saved)
+    parser.load_derived_state(config)
+    assert parser.derive_obs['outTempMax'] == observation_parser.derive_obs['outTempMax']
+    assert parser.last_ob_time == {}
+    assert parser.flag_api == [1, 1, 1, 1]
+
+
+def test_discards_checkpoint_of_previous_station_day(config, clock, saved):
+    clock['time'] += 12 * 3600
+    parser = checkpoint_parser(config, saved)
+    parser.load_derived_state(config)
+    assert parser.derive_obs['rainAccum'] == observation_parser.derive_obs['rainAccum']
+    assert parser.flag_api == [1, 1, 1, 1]
+
+
+def test_ignores_missing_or_corrupt_checkpoint(config, running_app, tmp_path):
+    missing = checkpoint_parser(config, str(tmp_path / 'missing.state'))
+    missing.load_derived_state(config)
+    assert missing.derive_obs == observation_parser.derive_obs
+    (tmp_path / 'corrupt.state').write_text('{"station": ')
+    corrupt = checkpoint_parser(config, str(tmp_path / 'corrupt.state'))
+    corrupt.load_derived_state(config)
+    assert corrupt.derive_obs == observation_parser.derive_obs
@@ -0,0 +1,114 @@
+""" Tests for the derived variable engine of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import types
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from lib                import derived_engine as engine_module
+from lib.derived_engine import derived_engine, derived_node, display_node, dependency_order
+from lib.records        import Ob
+
+
+@pytest.fixture
+def calls():
+    return {'double': 0, 'plus': 0, 'total': 0}
+
+
+@pytest.fixture
+def engine(monkeypatch, calls):
+
+    """ Engine evaluating a stateless variable derived from a device
+    observation, a stateless variable derived from it and a stateful running
+    total
+    """
+
+    def double(obs, drv, device, api, config):
+        calls['double'] += 1
+        return Ob(obs['x'][0] * 2, '%')
+
+    def plus(obs, drv, device, api, config):
+        calls['plus'] += 1
+        return Ob(drv['double'][0] + 1, '%')
+
+    def total(obs, drv, device, api, config):
+        calls['total'] += 1
+        return Ob(drv['total'][0] + obs['x'][0], '%')
+
+    monkeypatch.setattr(engine_module, 'derived_nodes', [
+        derived_node('plus',   [],    ['double'], plus,   ('obs_st',)),
+        derived_node('double', ['x'], [],         double, ('obs_st',)),
+        derived_node('total',  ['x'], ['total'],  total,  ('obs_st',), stateful=True)])
+    monkeypatch.setattr(engine_module, 'display_nodes', [
+        display_node('Double', 'derive', 'double', 'Other', 'Humidity', ('obs_st',))])
+    return derived_engine()
+
+
+@pytest.fixture
+def parser():
+    return types.SimpleNamespace(device_obs={'x': Ob(1.0, '%')},
+                                 derive_obs={'double': Ob(None, '%'), 'plus': Ob(None, '%'), 'total': Ob(0.0, '%')},
+                                 display_obs={}, api_data={})
+
+
+def test_nodes_follow_their_dependencies(engine):
+    names = [node.name for node in engine.nodes]
+    assert names.index('double') < names.index('plus')
+    assert sorted(names) == ['double', 'plus', 'total']
+
+
+def test_dependency_cycle_is_rejected():
+    nodes = [derived_node('a', [], ['b'], None, ('obs_st',)), derived_node('b', [], ['a'], None, ('obs_st',))]
+    with pytest.raises(ValueError):
+        dependency_order(nodes)
+
+
+def test_unchanged_inputs_are_not_recalculated(engine, parser, config, calls):
+    engine.derive(parser, '2000', config, 'obs_st')
+    engine.derive(parser, '2000', config, 'obs_st')
+    assert calls == {'double': 1, 'plus': 1, 'total': 2}
+    assert parser.derive_obs['plus'] == Ob(3.0, '%')
+    assert parser.derive_obs['total'] == Ob(2.0, '%')
+
+
+def test_changed_input_recalculates_dependents(engine, parser, config, calls):
+    engine.derive(parser, '2000', config, 'obs_st')
+    parser.device_obs['x'] = Ob(2.0, '%')
+    engine.derive(parser, '2000', config, 'obs_st')
+    assert calls == {'double': 2, 'plus': 2, 'total': 2}
+    assert parser.derive_obs['plus'] == Ob(5.0, '%')
+
+
+def test_other_message_types_do_not_recalculate(engine, parser, config, calls):
+    engine.derive(parser, '2000', config, 'rapid_wind')
+    assert calls == {'double': 0, 'plus': 0, 'total': 0}
+
+
+def test_invalidate_forces_recalculation_and_reformatting(engine, parser, config, calls):
+    engine.derive(parser, '2000', config, 'obs_st')
+    engine.format(parser, config, 'obs_st')
+    parser.display_obs['Double'] = None
+    engine.format(parser, config, 'obs_st')
+    assert parser.display_obs['Double'] is None
+    engine.invalidate()
+    engine.derive(parser, '2000', config, 'obs_st')
+    engine.format(parser, config, 'obs_st')
+    assert calls['double'] == 2
+    assert parser.display_obs['Double'] == ['2', '%']
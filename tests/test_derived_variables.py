@@ -0,0 +1,167 @@
+""" Tests for the derived variables of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import numpy as np
+import random
+import json
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from lib.request_api import weatherflow_api
+from lib             import derived_variables as derive
+from lib             import devices
+from lib.records     import Ob, Reading
+
+
+def station_SLP(pressure, elevation):
+
+    """ Sea level pressure calculated with the formula used before the
+    pressure reducer was introduced
+    """
+
+    P0, Rd, gamma_s, g, T0 = 1013.25, 287.05, 0.0065, 9.80665, 288.15
+    return (pressure
+            * (1 + ((P0 / pressure)**((Rd * gamma_s) / g))
+            * ((gamma_s * elevation) / T0))**(g / (Rd * gamma_s)))
+
+
+@pytest.mark.parametrize('elevation', [0.0, 22.0, 350.5, 2500.0])
+def test_pressure_reducer_matches_station_formula(elevation):
+    reducer  = derive.pressure_reducer(elevation)
+    pressure = np.linspace(700.0, 1050.0, 36)
+    assert reducer(pressure) == pytest.approx([station_SLP(P, elevation) for P in pressure], rel=1e-12)
+    assert reducer(1000.0) == pytest.approx(station_SLP(1000.0, elevation), rel=1e-12)
+
+
+def test_pressure_reducer_propagates_missing_pressure():
+    reduced = derive.pressure_reducer(22.0)(np.array([1000.0, np.nan]))
+    assert np.isnan(reduced[1]) and not np.isnan(reduced[0])
+
+
+def test_station_reducer_is_shared_per_elevation(config):
+    devices.configure(config)
+    reducer = derive.station_reducer('2000', config)
+    assert reducer.elevation == 22.0
+    assert derive.station_reducer('ST-00000001', config) is reducer
+    assert derive.station_reducer('9999', config) is None
+
+
+def test_SLP_uses_device_elevation(config, running_app):
+    devices.configure(config)
+    SLP = derive.SLP(Ob(1000.0, 'mb'), '2000', config)
+    assert isinstance(SLP, Reading)
+    assert SLP.value == pytest.approx(station_SLP(1000.0, 22.0), rel=1e-12)
+    assert SLP.base == SLP.value
+    assert derive.SLP(Ob(None, 'mb'), '2000', config) == Reading(None, 'mb')
+
+
+def strike_data(seed, start=1686744000, minutes=1440):
+
+    """ Return 24 hours of TEMPEST bucket_a observations with a random strike
+    count in each minute
+    """
+
+    generator = random.Random(seed)
+    data = []
+    for minute in range(minutes):
+        ob = [start + 60 * minute] + [0] * 21
+        ob[15] = generator.choice([0, 0, 0, 1, 2, 5])
+        data.append(ob)
+    return data
+
+
+def window_frequency(data, index, start_time, tolerance):
+
+    """ Strike frequency calculated by scanning the observations, as before
+    the strike series was introduced
+    """
+
+    api_time = [ob[0] for ob in data if ob[index] is not None]
+    d_time   = [abs(T - start_time) for T in api_time]
+    if min(d_time) >= tolerance:
+        return None
+    counts = [ob[index] for ob in data[d_time.index(min(d_time)):] if ob[index] is not None]
+    active = [count for count in counts if count > 0]
+    return sum(active) / len(active) if active else 0.0
+
+
+class api_response():
+
+    """ REST API response counting the number of times its content is decoded
+    """
+
+    def __init__(self, obs):
+        self.ok      = True
+        self.content = json.dumps({'status': {'status_message': 'SUCCESS'}, 'obs': obs}).encode()
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_strike_series_matches_window_scan(seed):
+    data   = strike_data(seed)
+    series = derive.strike_series(data, 15)
+    end    = data[-1][0]
+    for start_time, tolerance in [(end - 3 * 3600, 300), (end - 600, 120), (end - 3 * 3600 + 30, 300), (end - 90, 120)]:
+        assert series.frequency(start_time, tolerance) == pytest.approx(window_frequency(data, 15, start_time, tolerance))
+
+
+def test_strike_series_outside_tolerance_or_empty():
+    data = strike_data(0)
+    assert derive.strike_series(data, 15).frequency(data[0][0] - 600, 300) is None
+    assert derive.strike_series([], 15).frequency(data[0][0], 300) is None
+
+
+def test_strike_series_skips_missing_counts():
+    data = strike_data(1, minutes=10)
+    data[3][15] = None
+    series = derive.strike_series(data, 15)
+    counts = [ob[15] for ob in data if ob[15] is not None]
+    active = [count for count in counts if count > 0]
+    assert len(series.time) == 9
+    assert series.frequency(data[0][0], 60) == pytest.approx(sum(active) / len(active) if active else 0.0)
+
+
+def test_verify_response_decodes_content_once():
+    response = api_response(strike_data(0, minutes=10))
+    assert weatherflow_api.verify_response(response, 'obs')
+    assert response.json()['obs'] == response.json()['obs']
+    assert response.decoded == 1
+
+
+def test_strike_frequency_reuses_series_of_unchanged_content(config, running_app, monkeypatch):
+    config['System']['rest_api'] = '1'
+    devices.configure(config)
+    built = []
+    series = derive.strike_series
+    monkeypatch.setattr(derive, 'strike_series', lambda data, index: built.append(index) or series(data, index))
+    monkeypatch.setattr(derive, 'strike_series_cache', {})
+    data = strike_data(2)
+    ob_time = Ob(data[-1][0], 's')
+    first = derive.strike_frequency(ob_time, '2000', {'2000': {'24Hrs': api_response(data)}}, config)
+    again = derive.strike_frequency(ob_time, '2000', {'2000': {'24Hrs': api_response(data)}}, config)
+    assert len(built) == 1
+    assert again == first
+    data[-1][15] += 1
+    derive.strike_frequency(ob_time, '2000', {'2000': {'24Hrs': api_response(data)}}, config)
+    assert len(built) == 2
@@ -0,0 +1,99 @@
+""" Tests for the hub and device status of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import json
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from conftest import NOON
+from lib      import device_status
+from lib      import relay
+
+
+@pytest.fixture
+def status(monkeypatch):
+
+    """ Empty the latest status and status history of each hub and device
+    """
+
+    monkeypatch.setattr(device_status, 'hubs', {})
+    monkeypatch.setattr(device_status, 'devices', {})
+    monkeypatch.setattr(device_status, 'history', {})
+    monkeypatch.setattr(device_status, 'health_file', None)
+    yield device_status
+    if device_status.health_file is not None:
+        device_status.health_file.close()
+
+
+def device_message(timestamp, sensor_status=0):
+    return {'type': 'device_status', 'serial_number': 'ST-00000001', 'hub_sn': 'HB-00000001',
+            'timestamp': timestamp, 'uptime': 2189, 'voltage': 2.61, 'firmware_revision': 165,
+            'rssi': -17, 'hub_rssi': -87, 'sensor_status': sensor_status, 'debug': 0}
+
+
+@pytest.mark.parametrize('sensor_status, faults', [
+    (0x000, []),
+    (0x008, ['pressure']),
+    (0x006, []),
+    (0x00E, ['pressure']),
+    (0x101, ['lightning', 'light/UV']),
+    (0x1F9, ['lightning', 'pressure', 'temperature', 'humidity', 'wind', 'precip', 'light/UV']),
+    (0x8000, []),
+    (None, [])])
+def test_sensor_faults_decode_failed_sensor_bits(sensor_status, faults):
+    assert device_status.sensor_faults(sensor_status) == faults
+
+
+@pytest.mark.parametrize('uptime, text', [(None, '-'), (0, '0h 0m'), (2189, '0h 36m'), (90061, '1d 1h'), (864000, '10d 0h')])
+def test_uptime_text(uptime, text):
+    assert device_status.uptime_text(uptime) == text
+
+
+def test_restore_status_received_from_relay(status, config):
+    device = status.parse_device_status(device_message(NOON, 0x008), config)
+    hub    = status.parse_hub_status({'serial_number': 'HB-00000001', 'timestamp': NOON, 'firmware_revision': '177',
+                                      'uptime': 1670133, 'rssi': -62, 'reset_flags': 'BOR,PIN,POR'}, config)
+    received = json.loads(relay.encode({'ST-00000001': device, 'HB-00000001': hub}))
+    assert status.restore(received['ST-00000001']) == device
+    assert isinstance(status.restore(received['ST-00000001']), status.device_state)
+    assert status.restore(received['HB-00000001']) == hub
+    assert isinstance(status.restore(received['HB-00000001']), status.hub_state)
+    assert status.restore(device) is device
+
+
+def test_observation_count_covers_last_day(status, config, clock):
+    assert status.observation_count('ST-00000001') is None
+    for minute in range(-1500, 1):
+        status.parse_device_status(device_message(NOON + 60 * minute), config)
+    assert status.observation_count('ST-00000001') == 1440
+    assert status.observation_count('ST-00000001', period=3600) == 61
+    assert status.observation_count('ST-00000002') is None
+    assert len(status.history['ST-00000001']) == status.HISTORY_LENGTH
+    assert status.devices['ST-00000001'].timestamp == NOON
+
+
+def test_status_is_recorded_in_health_file(status, config, tmp_path):
+    config['System']['HealthFile'] = str(tmp_path / 'health.csv')
+    status.parse_device_status(device_message(NOON, 0x008), config)
+    status.parse_hub_status({'serial_number': 'HB-00000001', 'timestamp': NOON, 'uptime': 10}, config)
+    status.health_file.close()
+    assert (tmp_path / 'health.csv').read_text().splitlines() == [
+        f'device_status,ST-00000001,{NOON},165,2189,2.61,-17,-87,8',
+        f'hub_status,HB-00000001,{NOON},,10,,,,']
@@ -0,0 +1,125 @@
+""" Tests for the message router of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import asyncio
+import types
+import time
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from lib import message_router
+from lib.message_router import recent_keys, observation_key, route
+
+
+class recording_parser():
+
+    """ Observation parser recording the messages it is given
+    """
+
+    def __init__(self, config, delay=0):
+        self.config   = config
+        self.delay    = delay
+        self.messages = []
+
+    def parse_rapid_wind(self, message, config):
+        self.messages.append(message)
+
+    def parse_obs_st(self, message, config):
+        time.sleep(self.delay)
+        self.messages.append(message)
+
+
+def connection_client(name, parser, dedupe):
+    return types.SimpleNamespace(router=types.SimpleNamespace(client=name), app=types.SimpleNamespace(obsParser=parser),
+                                 stations={}, queue_list={}, thread_list={}, dedupe=dedupe)
+
+
+def test_recent_keys_remembers_observations():
+    keys = recent_keys()
+    assert not keys.seen(('obs_st', 1686830400))
+    assert keys.seen(('obs_st', 1686830400))
+    assert not keys.seen(('obs_st', 1686830460))
+    assert not keys.seen(('rapid_wind', 1686830400))
+
+
+def test_recent_keys_evicts_least_recently_used():
+    keys = recent_keys(size=2)
+    keys.seen('a')
+    keys.seen('b')
+    assert keys.seen('a')
+    keys.seen('c')
+    assert list(keys.keys) == ['a', 'c']
+    assert not keys.seen('b')
+    assert len(keys.keys) == 2
+
+
+def test_observation_key_identifies_observation_and_station():
+    obs_st = route('obs_st', 'parse_obs_st', True)
+    assert observation_key(obs_st, {'obs': [[1686830400, 0.1]]}) == ('obs_st', 1686830400)
+    assert observation_key(obs_st._replace(station='Cabin'), {'obs': [[1686830400]]}) == ('Cabin:obs_st', 1686830400)
+    assert observation_key(route('rapid_wind', 'parse_rapid_wind', False), {'ob': [1686830403, 1.2, 180]}) == ('rapid_wind', 1686830403)
+    assert observation_key(route('evt_strike', 'parse_evt_strike', False), {'evt': [1686830410, 12, 100]}) == ('evt_strike', 1686830410)
+    assert observation_key(obs_st, {'obs': []}) is None
+    assert observation_key(route('hub_status', 'parse_hub_status', False), {'uptime': 10}) is None
+
+
+def test_dispatch_discards_observation_received_by_other_client(config, running_app):
+    parser = recording_parser(config)
+    dedupe = recent_keys()
+    udp, websocket = connection_client('UDP', parser, dedupe), connection_client('Websocket', parser, dedupe)
+    rapid_wind = route('rapid_wind', 'parse_rapid_wind', False)
+    message = {'type': 'rapid_wind', 'ob': [1686830403, 1.2, 180]}
+
+    async def receive():
+        await message_router.dispatch(udp, rapid_wind, message, None)
+        await message_router.dispatch(websocket, rapid_wind, dict(message), None)
+        await message_router.dispatch(websocket, rapid_wind, {'type': 'rapid_wind', 'ob': [1686830406, 1.5, 185]}, None)
+
+    asyncio.run(receive())
+    assert [message['ob'][0] for message in parser.messages] == [1686830403, 1686830406]
+
+
+def test_dispatch_without_dedupe_passes_every_message(config, running_app):
+    parser = recording_parser(config)
+    client = connection_client('UDP', parser, None)
+    rapid_wind = route('rapid_wind', 'parse_rapid_wind', False)
+    message = {'type': 'rapid_wind', 'ob': [1686830403, 1.2, 180]}
+
+    async def receive():
+        await message_router.dispatch(client, rapid_wind, message, None)
+        await message_router.dispatch(client, rapid_wind, message, None)
+
+    asyncio.run(receive())
+    assert len(parser.messages) == 2
+
+
+def test_dispatch_parses_queued_observations_in_order(config, running_app):
+    parser = recording_parser(config, delay=0.01)
+    client = connection_client('UDP', parser, None)
+    obs_st = route('obs_st', 'parse_obs_st', True)
+
+    async def receive():
+        for minute in range(5):
+            await message_router.dispatch(client, obs_st, {'type': 'obs_st', 'obs': [[1686830400 + 60 * minute]]}, None)
+
+    asyncio.run(receive())
+    client.thread_list['obs_st'].join(timeout=5)
+    assert [message['obs'][0][0] for message in parser.messages] == [1686830400 + 60 * minute for minute in range(5)]
+    assert client.queue_list == {}
@@ -0,0 +1,71 @@
+""" Tests for the observation and derived variable records of the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import json
+import pytest
+
+# Import required library modules
+from lib         import records
+from lib.records import Ob, Extreme, PeakSun, Accumulation, Beaufort
+
+
+def test_records_keep_list_field_order():
+    assert list(Extreme(21.5, 'c', 1686830400, 's', 21.5, 1686830460)) == [21.5, 'c', 1686830400, 's', 21.5, 1686830460]
+    assert Extreme(None, 'c') == (None, 'c', '-', None, None, None)
+    assert Accumulation(None, 'mm') == (None, 'mm', None, None)
+    assert Beaufort(None, 'mps')[2:] == ('-', '-', '-')
+
+
+def test_records_are_immutable():
+    with pytest.raises(AttributeError):
+        Ob(20.0, 'c').value = 21.0
+    with pytest.raises(TypeError):
+        Ob(20.0, 'c')[0] = 21.0
+
+
+def test_restore_converts_checkpoint_lists_to_records():
+    saved = json.loads(json.dumps({'outTempMax': Extreme(21.5, 'c', 1686830400, 's', 21.5, 1686830460),
+                                   'peakSun':    PeakSun(1.5, 'hrs', '-')}))
+    restored = records.restore('outTempMax', saved['outTempMax'])
+    assert isinstance(restored, Extreme)
+    assert restored.extreme == 21.5
+    assert isinstance(records.restore('peakSun', saved['peakSun']), PeakSun)
+
+
+def test_restore_converts_each_accumulation_period():
+    restored = records.restore('rainAccum', {'today': [1.2, 'mm', 1.2, 1686830460], 'yesterday': [None, 'mm']})
+    assert restored == {'today': Accumulation(1.2, 'mm', 1.2, 1686830460), 'yesterday': Accumulation(None, 'mm')}
+    assert all(isinstance(period, Accumulation) for period in restored.values())
+
+
+def test_restore_leaves_other_values_unchanged():
+    assert records.restore('SLP', [1013.2, 'mb', 1013.2]) == [1013.2, 'mb', 1013.2]
+    record = Extreme(21.5, 'c')
+    assert records.restore('outTempMax', record) is record
+
+
+def test_units_and_format_accept_records(config):
+    observation = pytest.importorskip('lib.observation_format')
+    record = Extreme(21.5, 'c', 1686830400, 's', 21.5, 1686830460)
+    converted = observation.units(record, 'f')
+    assert isinstance(converted, list)
+    assert converted[:2] == [pytest.approx(70.7), 'f']
+    formatted = observation.format(converted, ['Temp', 'Time'], config)
+    assert formatted is converted
+    assert formatted[:4] == ['70.7', '\N{DEGREE FAHRENHEIT}', '13:00', 's']
+    assert record.value == 21.5
@@ -0,0 +1,142 @@
+""" Tests for the display value relay of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+import socket
+import time
+import json
+import pytest
+
+pytest.importorskip('kivy')
+
+# Import required library modules
+from lib import relay
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for relay')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server(monkeypatch, config, running_app):
+
+    """ Relay server listening on a free loopback port with an empty set of
+    display values
+    """
+
+    monkeypatch.setattr(relay, 'last_display', {category: {} for category in relay.CATEGORIES})
+    monkeypatch.setattr(relay, 'subscribers', [])
+    config['System'].update(RelayPort=str(free_port()), RelayHost='127.0.0.1', RelayKey='secret')
+    yield config
+    relay.stop()
+
+
+class relay_client():
+
+    """ Subscribed console reading relay messages one line at a time
+    """
+
+    def __init__(self, config, key):
+        self.connection = socket.create_connection(('127.0.0.1', int(config['System']['RelayPort'])), timeout=5)
+        self.lines      = self.connection.makefile('rb')
+        challenge = json.loads(self.lines.readline())['challenge']
+        if challenge is not None:
+            self.connection.sendall(relay.encode({'digest': relay.digest(key, challenge)}))
+
+    def receive(self):
+        line = self.lines.readline()
+        return json.loads(line) if line else None
+
+    def close(self):
+        self.lines.close()
+        self.connection.close()
+
+
+def test_encode_writes_one_compact_line():
+    assert relay.encode({'category': 'Obs', 'values': {'outTemp': ['21.5', 'c']}}) == b'{"category":"Obs","values":{"outTemp":["21.5","c"]}}\n'
+
+
+def test_digest_is_keyed_hmac():
+    assert relay.digest('secret', 'abc') == relay.digest('secret', 'abc')
+    assert relay.digest('secret', 'abc') != relay.digest('other', 'abc')
+    assert relay.digest('secret', 'abc') != relay.digest('secret', 'abd')
+
+
+def test_is_loopback():
+    assert relay.is_loopback('127.0.0.1')
+    assert relay.is_loopback('::1')
+    assert relay.is_loopback('localhost')
+    assert not relay.is_loopback('0.0.0.0')
+    assert not relay.is_loopback('192.168.1.10')
+    assert not relay.is_loopback('console.local')
+
+
+def test_subscriber_receives_snapshot_of_each_category(server):
+    relay.start(server)
+    relay.publish('Obs', {'outTemp': ['21.5', 'c']}, 'obs_st')
+    relay.publish('Status', {'ST-00000001': [1, 2, 3]})
+    client = relay_client(server, 'secret')
+    snapshot = [client.receive() for category in relay.CATEGORIES]
+    client.close()
+    assert [message['category'] for message in snapshot] == relay.CATEGORIES
+    assert snapshot[0] == {'category': 'Obs', 'values': {'outTemp': ['21.5', 'c']}, 'ob_type': 'obs_reset'}
+    assert snapshot[3]['values'] == {'ST-00000001': [1, 2, 3]}
+
+
+def test_subscriber_receives_only_changed_values(server):
+    relay.start(server)
+    relay.publish('Obs', {'outTemp': ['21.5', 'c'], 'Humidity': ['60', '%']}, 'obs_st')
+    client = relay_client(server, 'secret')
+    [client.receive() for category in relay.CATEGORIES]
+    wait_for(lambda: len(relay.subscribers) == 1)
+    relay.publish('Met', {'Sunrise': ['04:43', '']})
+    relay.publish('Obs', {'outTemp': ['21.6', 'c'], 'Humidity': ['60', '%']}, 'obs_st')
+    assert client.receive() == {'category': 'Met', 'values': {'Sunrise': ['04:43', '']}, 'ob_type': None}
+    assert client.receive() == {'category': 'Obs', 'values': {'outTemp': ['21.6', 'c']}, 'ob_type': 'obs_st'}
+    client.close()
+
+
+def test_subscriber_with_wrong_key_is_rejected(server):
+    relay.start(server)
+    client = relay_client(server, 'wrong')
+    assert client.receive() is None
+    client.close()
+    assert relay.subscribers == []
+
+
+def test_lan_relay_requires_key(server):
+    server['System'].update(RelayHost='0.0.0.0', RelayKey='')
+    relay.start(server)
+    assert relay.listener is None
+
+
+def test_loopback_relay_without_key_needs_no_answer(server):
+    server['System']['RelayKey'] = ''
+    relay.start(server)
+    client = relay_client(server, None)
+    assert client.receive()['category'] == 'Obs'
+    client.close()
@@ -0,0 +1,70 @@
+""" Tests for the solar event cache of the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2023 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required system modules
+from datetime import date, timedelta
+import pytest
+
+# Import required library modules
+from lib import solar
+
+
+@pytest.fixture
+def calculated(monkeypatch):
+
+    """ Empty the solar event cache and record each calculation
+    """
+
+    calculations = []
+    calculate = solar.calculate
+    monkeypatch.setattr(solar, 'cache', {})
+    monkeypatch.setattr(solar, 'calculate', lambda *args: calculations.append(args[2]) or calculate(*args))
+    return calculations
+
+
+def test_events_are_calculated_once_per_day(config, clock, calculated):
+    first = solar.events(config)
+    assert solar.events(config) is first
+    assert solar.events(config, date(2023, 6, 15)) is first
+    assert calculated == [date(2023, 6, 15)]
+
+
+def test_events_are_in_order_on_requested_day(config, calculated):
+    events = solar.events(config, date(2023, 6, 15))
+    assert events.date == date(2023, 6, 15)
+    assert events.dawn < events.sunrise < events.sunset < events.dusk
+    assert events.sunrise.date() == date(2023, 6, 15)
+
+
+def test_default_date_is_station_local_date(config, clock, calculated):
+    config['Station'].update(Timezone='Pacific/Auckland', Latitude='-36.8', Longitude='174.8')
+    clock['time'] += 11 * 3600
+    assert solar.events(config).date == date(2023, 6, 16)
+
+
+def test_cache_is_keyed_on_station_location(config, calculated):
+    solar.events(config, date(2023, 6, 15))
+    config['Station']['Latitude'] = '55.9'
+    solar.events(config, date(2023, 6, 15))
+    assert len(calculated) == 2
+
+
+def test_old_days_are_evicted(config, calculated):
+    start = date(2023, 6, 1)
+    for day in range(10):
+        solar.events(config, start + timedelta(days=day))
+    assert sorted(key[3] for key in solar.cache) == [start + timedelta(days=day) for day in range(6, 10)]